@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.config.config import Config
+from model.hash import Hash, HashArgon2, HashBcrypt, HashEngine
+
+
+def measure_verify(hash_handler: Hash, hashed: str, rounds: int) -> tuple[float, int]:
+    """
+    Verify a password rounds times in a fresh worker process.
+
+    Args:
+        hash_handler (Hash): The hash implementation to measure.
+        hashed (str): The stored hashed password.
+        rounds (int): The number of verifications.
+
+    Returns:
+        tuple[float, int]: The CPU milliseconds per verification and the growth of
+            the peak resident memory of the worker in KiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.process_time()
+    for _ in range(rounds):
+        hash_handler.verify("benchmark_password", hashed)
+    cpu_ms = (time.process_time() - start) * 1000 / rounds
+    return cpu_ms, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak
+
+
+async def run_logins(hash_engine: HashEngine, hashed: str, logins: int) -> float:
+    """
+    Verify the same password concurrently through the hash engine.
+
+    Returns:
+        float: The throughput in logins per second.
+    """
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[hash_engine.verify("benchmark_password", hashed) for _ in range(logins)]
+    )
+    return logins / (time.perf_counter() - start)
+
+
+async def main(rounds: int, logins: int, workers: int):
+    hash_handlers = {
+        f"bcrypt {Config.HASH_BCRYPT_ROUNDS}": HashBcrypt(Config.HASH_BCRYPT_ROUNDS),
+        (
+            f"argon2id t={Config.HASH_ARGON2_TIME_COST} "
+            f"m={Config.HASH_ARGON2_MEMORY_KIB} p={Config.HASH_ARGON2_PARALLELISM}"
+        ): HashArgon2(
+            Config.HASH_ARGON2_TIME_COST,
+            Config.HASH_ARGON2_MEMORY_KIB,
+            Config.HASH_ARGON2_PARALLELISM,
+        ),
+    }
+    print(f"{'hash':>28} {'cpu ms':>8} {'peak KiB':>9} {'logins/s':>9}")
+    for name, hash_handler in hash_handlers.items():
+        hashed = hash_handler.hash_password("benchmark_password")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            cpu_ms, peak_kib = executor.submit(
+                measure_verify, hash_handler, hashed, rounds
+            ).result()
+
+        hash_engine = HashEngine(hash_handler, pool_size=workers, queue_depth=logins)
+        # warm up the worker processes before measuring
+        await run_logins(hash_engine, hashed, workers)
+        throughput = await run_logins(hash_engine, hashed, logins)
+        hash_engine.shutdown()
+        print(f"{name:>28} {cpu_ms:>8.1f} {peak_kib:>9} {throughput:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the cost of bcrypt and Argon2id password verification."
+    )
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.logins, args.workers))
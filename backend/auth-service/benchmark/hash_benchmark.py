@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import os
+import time
+
+from model.hash import HashBcrypt, HashEngine
+
+
+async def run_logins(hash_engine: HashEngine, hashed: str, logins: int) -> float:
+    """
+    Verify the same password concurrently through the hash engine.
+
+    Args:
+        hash_engine (HashEngine): The engine used to verify passwords.
+        hashed (str): The stored hashed password.
+        logins (int): The number of concurrent login verifications.
+
+    Returns:
+        float: The throughput in logins per second.
+    """
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[hash_engine.verify("benchmark_password", hashed) for _ in range(logins)]
+    )
+    return logins / (time.perf_counter() - start)
+
+
+def run_inline(hashed: str, logins: int) -> float:
+    """
+    Verify passwords one after another in the current process,
+    which is what the sync login handler used to do.
+    """
+    hash_handler = HashBcrypt()
+    start = time.perf_counter()
+    for _ in range(logins):
+        hash_handler.verify("benchmark_password", hashed)
+    return logins / (time.perf_counter() - start)
+
+
+async def main(logins: int, max_workers: int):
+    hashed = HashBcrypt().hash_password("benchmark_password")
+    print(f"{'workers':>8} {'logins/s':>10} {'speedup':>8}")
+    baseline = run_inline(hashed, logins)
+    print(f"{'inline':>8} {baseline:>10.1f} {1.0:>8.2f}")
+
+    workers = 1
+    while workers <= max_workers:
+        hash_engine = HashEngine(HashBcrypt(), pool_size=workers, queue_depth=logins)
+        # warm up the worker processes before measuring
+        await run_logins(hash_engine, hashed, workers)
+        throughput = await run_logins(hash_engine, hashed, logins)
+        hash_engine.shutdown()
+        print(f"{workers:>8} {throughput:>10.1f} {throughput / baseline:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure how login throughput scales with hash worker count."
+    )
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.max_workers))
@@ -0,0 +1,85 @@
+import argparse
+import os
+import secrets
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from core.revocation import RevocationStore, revoked_tokens
+
+
+def seed(engine, count: int) -> list[str]:
+    """
+    Store count revocations made over the last day and expiring over the next
+    week, and return their ids.
+    """
+    now = datetime.now()
+    token_ids = [secrets.token_urlsafe(16) for _ in range(count)]
+    with engine.begin() as connection:
+        for start in range(0, count, 10000):
+            connection.execute(
+                insert(revoked_tokens),
+                [
+                    {
+                        "token_id": token_id,
+                        "expires_at": now + timedelta(seconds=600 + i % 604800),
+                        "revoked_at": now - timedelta(seconds=86400 * (1 - i / count)),
+                    }
+                    for i, token_id in enumerate(
+                        token_ids[start : start + 10000], start
+                    )
+                ],
+            )
+    return token_ids
+
+
+def main(sizes: list[int], lookups: int):
+    print(
+        f"{'revoked':>9} {'load s':>7} {'bytes/id':>9} "
+        f"{'lookup ns':>10} {'sync ms':>8}"
+    )
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = create_engine(f"sqlite:///{os.path.join(temp_dir, 'r.db')}")
+            revoked_tokens.metadata.create_all(engine)
+            token_ids = seed(engine, count)
+            store = RevocationStore(engine, float("inf"), 3600)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            store.sync()
+            load = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            payloads = [
+                {"sub": "1", "fam": token_ids[i % count] if i % 2 else "live"}
+                for i in range(lookups)
+            ]
+            start = time.perf_counter()
+            for payload in payloads:
+                store.revoked(payload)
+            lookup = (time.perf_counter() - start) / lookups * 1e9
+
+            # An incremental sync with nothing new, paid once per sync interval.
+            start = time.perf_counter()
+            store.sync()
+            sync = (time.perf_counter() - start) * 1000
+            print(
+                f"{count:>9} {load:>7.2f} {memory / count:>9.0f} "
+                f"{lookup:>10.0f} {sync:>8.2f}"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the load, memory and lookup cost of the revocation store."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.sizes, args.lookups)
@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+PAYLOAD = {"sub": "42", "exp": 4102444800}
+
+
+def keys() -> dict[str, tuple]:
+    """
+    Return the signing key, the verifying key and the verifying key as PEM of
+    every algorithm, RS256 is measured for reference only.
+    """
+    secret = "0123456789" * 4
+    result = {"HS256": (secret, secret, None)}
+    for algorithm, private_key in (
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+    ):
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        result[algorithm] = (private_key, private_key.public_key(), public_pem)
+    return result
+
+
+def per_call(function, repeat: int) -> float:
+    """Return the microseconds function takes per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000000
+
+
+def main(repeat: int):
+    print(f"{'algorithm':>10} {'sign us':>9} {'verify us':>10} {'verify pem us':>14}")
+    for algorithm, (signing_key, verifying_key, pem) in keys().items():
+        token = jwt.encode(PAYLOAD, signing_key, algorithm=algorithm)
+        sign = per_call(
+            lambda: jwt.encode(PAYLOAD, signing_key, algorithm=algorithm), repeat
+        )
+        verify = per_call(
+            lambda: jwt.decode(token, verifying_key, algorithms=[algorithm]), repeat
+        )
+        # Verifying from PEM parses the key on every call, which the key set avoids.
+        verify_pem = (
+            per_call(lambda: jwt.decode(token, pem, algorithms=[algorithm]), repeat)
+            if pem is not None
+            else verify
+        )
+        print(f"{algorithm:>10} {sign:>9.1f} {verify:>10.1f} {verify_pem:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the JWT sign and verify cost of every algorithm."
+    )
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
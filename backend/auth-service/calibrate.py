@@ -0,0 +1,69 @@
+import argparse
+import statistics
+import time
+
+from core.config.config import Config
+from model.hash import HashBcrypt
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Return the median milliseconds of one bcrypt hash at cost rounds."""
+    hash_handler = HashBcrypt(rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hash_handler.hash_password("calibration_password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    target_ms: float, samples: int, min_rounds: int = 4, max_rounds: int = 20
+) -> tuple[int, dict[int, float]]:
+    """
+    Measure bcrypt costs from min_rounds up until a hash takes longer than
+    target_ms and pick the highest cost within it.
+
+    Args:
+        target_ms (float): The latency budget of one hash in milliseconds.
+        samples (int): The number of hashes measured per cost.
+        min_rounds (int): The lowest cost measured, the bcrypt minimum is 4.
+        max_rounds (int): The highest cost measured.
+
+    Returns:
+        tuple[int, dict[int, float]]: The chosen cost, min_rounds when even that
+        exceeds target_ms, and the median milliseconds per measured cost.
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = measure(rounds, samples)
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pick the bcrypt cost whose hash time fits a latency target."
+    )
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="The latency budget of one password hash in milliseconds.",
+    )
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    chosen, timings = calibrate(args.target_ms, args.samples)
+    print(f"{'rounds':>6} {'ms':>9}")
+    for rounds, milliseconds in timings.items():
+        marker = " <" if rounds == chosen else ""
+        print(f"{rounds:>6} {milliseconds:>9.1f}{marker}")
+    print(
+        f"Set HASH.BCRYPT_ROUNDS: {chosen} in config.yaml "
+        f"(currently {Config.HASH_BCRYPT_ROUNDS}), passwords of other costs are "
+        "rehashed on their next login."
+    )
@@ -1,13 +1,15 @@
 from abc import ABC, abstractmethod
+import logging
 from typing import TypedDict
 from datetime import datetime
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
-from model.hash import HashBcrypt
-from model.user_database import UserDatabase, UserData
+from model.hash import get_hash_engine
+from model.user_database import AsyncUserDatabase, UserDatabase, UserData
 from core.token import JWTToken, TokenService
-from core.error import LoginWithWrongPasswordError
+from core.error import BaseAPIException, LoginWithWrongPasswordError
 
 
 class RegisterRequest(TypedDict):
@@ -44,14 +46,14 @@ class UserProfile(ABC):
     """
 
     @abstractmethod
-    def register(self, *args):
+    async def register(self, *args):
         """
         Register a new user with the provided credentials.
         """
         pass
 
     @abstractmethod
-    def login(self, *args):
+    async def login(self, *args):
         """
         Authenticate a user with the given credentials.
         """
@@ -65,11 +67,11 @@ class UsernamePasswordUserProfile(UserProfile):
     """
 
     def __init__(self):
-        self.hash_handler = HashBcrypt()
+        self.hash_handler = get_hash_engine()
         self.token_handler = TokenService(JWTToken)
-        self.user_database = UserDatabase()
+        self.user_database = AsyncUserDatabase()
 
-    def register(self, register_request: RegisterRequest) -> dict:
+    async def register(self, register_request: RegisterRequest) -> dict:
         """
         This function provide register with user name,password and mail.
 
@@ -80,7 +82,9 @@ class UsernamePasswordUserProfile(UserProfile):
             dict: success message and user name
         """
         # TODO: add check account exist
-        hash_password = self.hash_handler.hash_password(register_request["password"])
+        hash_password = await self.hash_handler.hash_password(
+            register_request["password"]
+        )
 
         new_user = UserData(
             user_name=register_request["user_name"],
@@ -88,7 +92,7 @@ class UsernamePasswordUserProfile(UserProfile):
             mail=register_request["mail"],
             created_at=datetime.now(),
         )
-        self.user_database.create(new_user)
+        await self.user_database.create(new_user)
         return {
             "message": "User successfully registered",
             "user_name": register_request["user_name"],
@@ -96,7 +100,9 @@ class UsernamePasswordUserProfile(UserProfile):
 
     # TODO: add login log and email check
     # TODO: add table to record login history
-    def login(self, login_request: LoginRequest, client_ip: str) -> tuple[dict, str]:
+    async def login(
+        self, login_request: LoginRequest, client_ip: str
+    ) -> tuple[dict, str, str]:
         """
         This function provide login with user name and password.
         After succes login , probide jwt in cookie.
@@ -106,16 +112,66 @@ class UsernamePasswordUserProfile(UserProfile):
 
         Returns:
             dict : success message
-            str : token
+            str : access token
+            str : refresh token
         """
-        retrieved_user = self.user_database.query(login_request["user_name"])
-        valid = self.hash_handler.verify(
+        retrieved_user = await self.user_database.query(login_request["user_name"])
+        valid = await self.hash_handler.verify(
             login_request["password"], retrieved_user.hashed_password
         )
         if not valid:
             raise LoginWithWrongPasswordError
-        encode_data = {"sub": str(retrieved_user.user_id)}
-        token = self.token_handler.generate_token(encode_data)
+        if self.hash_handler.needs_rehash(retrieved_user.hashed_password):
+            await self._rehash(retrieved_user, login_request["password"])
+        access_token, refresh_token = self.token_handler.generate_token_pair(
+            retrieved_user.user_id
+        )
 
         content = {"message": "Login success"}
-        return content, token
+        return content, access_token, refresh_token
+
+    async def _rehash(self, user: UserDatabase.User, password: str) -> None:
+        """
+        Store the password hashed with the configured parameters. The login
+        succeeds even if this fails, the next login tries again.
+        """
+        try:
+            hashed_password = await self.hash_handler.hash_password(password)
+            await self.user_database.update(user.user_id, hashed_password)
+        except BaseAPIException as e:
+            logging.warning("Failed to rehash password of user %d: %s", user.user_id, e)
+
+    async def refresh(self, refresh_token: str) -> tuple[dict, str, str]:
+        """
+        This function exchange a refresh token for a new token pair,
+        without checking the password again.
+
+        Args:
+            refresh_token(str): The refresh token from the cookie.
+
+        Returns:
+            dict : success message
+            str : access token
+            str : refresh token
+        """
+        # The revocation store writes through a sync connection.
+        access_token, refresh_token = await run_in_threadpool(
+            self.token_handler.refresh_token_pair, refresh_token
+        )
+        return {"message": "Token refreshed"}, access_token, refresh_token
+
+    async def logout(self, access_token: str | None, refresh_token: str | None) -> dict:
+        """
+        This function revoke every token of the login of the given tokens.
+
+        Args:
+            access_token(str|None): The access token from the cookie.
+            refresh_token(str|None): The refresh token from the cookie.
+
+        Returns:
+            dict : success message
+        """
+        await run_in_threadpool(
+            self.token_handler.revoke_token_family, refresh_token, access_token
+        )
+        return {"message": "Logout success"}
@@ -0,0 +1,126 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from core.config.config import Config
+from core.token import ASYMMETRIC_ALGORITHMS, public_jwk
+
+
+def read_key_set(path: str) -> dict:
+    """Return the JWKS in path, an empty one if the file does not exist."""
+    if not os.path.exists(path):
+        return {"keys": []}
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def write_atomic(path: str, content: bytes, mode: int = 0o644) -> None:
+    """
+    Replace path with content in one rename, so a reader never sees a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_key_set(path: str, key_set: dict) -> None:
+    """Write the JWKS to path."""
+    write_atomic(path, json.dumps(key_set, indent=2).encode())
+
+
+def generate(algorithm: str, private_key_path: str, key_set_path: str) -> str:
+    """
+    Create a signing key, publish its public key in the key set, then store the
+    private key. The previous keys stay in the key set, so the tokens they signed
+    still verify until they are retired.
+
+    Returns:
+        str: The kid of the new key.
+    """
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    jwk = public_jwk(private_key, algorithm)
+    key_set = read_key_set(key_set_path)
+    key_set["keys"].append(jwk)
+    write_key_set(key_set_path, key_set)
+    write_atomic(
+        private_key_path,
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+        mode=0o600,
+    )
+    return jwk["kid"]
+
+
+def retire(kid: str, key_set_path: str) -> bool:
+    """
+    Remove kid from the key set, tokens signed with it stop verifying.
+
+    Returns:
+        bool: True if the key set had kid.
+    """
+    key_set = read_key_set(key_set_path)
+    keys = [jwk for jwk in key_set["keys"] if jwk.get("kid") != kid]
+    if len(keys) == len(key_set["keys"]):
+        return False
+    write_key_set(key_set_path, {"keys": keys})
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Manage the JWT signing keys.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser(
+        "generate", help="Create a new signing key and publish its public key."
+    )
+    generate_parser.add_argument(
+        "--algorithm",
+        choices=ASYMMETRIC_ALGORITHMS,
+        default=(
+            Config.JWT_ALGORITHM
+            if Config.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS
+            else "EdDSA"
+        ),
+    )
+    retire_parser = commands.add_parser(
+        "retire", help="Remove a public key from the key set."
+    )
+    retire_parser.add_argument("kid")
+    commands.add_parser("list", help="List the kids of the key set.")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        kid = generate(
+            args.algorithm, Config.JWT_PRIVATE_KEY_PATH, Config.JWT_KEY_SET_PATH
+        )
+        logging.info(
+            "Created %s key %s, restart auth-service to sign with it",
+            args.algorithm,
+            kid,
+        )
+    elif args.command == "retire":
+        if not retire(args.kid, Config.JWT_KEY_SET_PATH):
+            parser.exit(1, f"{args.kid} is not in {Config.JWT_KEY_SET_PATH}\n")
+        logging.info("Retired key %s", args.kid)
+    else:
+        for jwk in read_key_set(Config.JWT_KEY_SET_PATH)["keys"]:
+            print(jwk.get("kid"), jwk.get("alg"))
@@ -1,8 +1,38 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from router import api_router
+from core.config.config import Config
+from core.database import get_engine, pool_statistics
+from core.migration import migrate
+from core.revocation import get_revocation_store
+from core.statistics import log_statistics
+from model.hash import get_hash_engine
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Migrate the schema when running against the sqlite stand-in, load the
+    revoked tokens before the first request, log the connection pool usage
+    every STATISTICS.LOG_SECONDS and release the hash worker
+    processes when the service stops.
+    """
+    if Config.DATABASE_BACKEND == "sqlite":
+        migrate(get_engine(Config.USER_DATABASE_URL))
+    await asyncio.to_thread(get_revocation_store().sync)
+    statistics_log = asyncio.create_task(
+        log_statistics(
+            Config.STATISTICS_LOG_SECONDS, {"Connection pool": pool_statistics}
+        )
+    )
+    yield
+    statistics_log.cancel()
+    get_hash_engine().shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(api_router)
@@ -1,13 +1,26 @@
 from abc import ABC, abstractmethod
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 import bcrypt
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from core.config.config import Config
+from core.error import HashEngineOverloadedError
 
 
 class Hash(ABC):
     """
     This class define interface for implementing hashing and
     verification method.
+
+    Attributes:
+        prefixes (tuple[str, ...]): The prefixes of the hashes it produces and verifies.
     """
 
+    prefixes: tuple[str, ...] = ()
+
     @abstractmethod
     def hash_password(self, password: str) -> str:
         """
@@ -33,13 +46,33 @@ class Hash(ABC):
             bool: True if verification was successful, False otherwise.
         """
 
+    @abstractmethod
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check whether hashed was made with other parameters than the configured ones.
+
+        Args:
+            hashed (str): The hashed password stored in the database.
+
+        Returns:
+            bool: True if the password should be hashed again.
+        """
+
 
 class HashBcrypt(Hash):
     """
     Implementation of the Hash interface using bcrypt algorithm
     for password hashing and verification.
+
+    Attributes:
+        rounds (int): The bcrypt cost factor, every step doubles the hashing time.
     """
 
+    prefixes = ("$2a$", "$2b$", "$2y$")
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
     def hash_password(self, password: str) -> str:
         """
         Hash the given plain text password using bcrypt.
@@ -50,7 +83,7 @@ class HashBcrypt(Hash):
         Returns:
             str: The resulting bcrypt hashed password as a UTF-8 string.
         """
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=self.rounds)
         hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
         return hashed_password.decode("utf-8")
 
@@ -66,3 +99,270 @@ class HashBcrypt(Hash):
             bool: True if the password matches the hashed password, False otherwise.
         """
         return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check whether the cost factor of a bcrypt hash differs from rounds.
+
+        Args:
+            hashed (str): The bcrypt hash, as in $2b$12$<salt and checksum>.
+
+        Returns:
+            bool: True if the cost factor differs from rounds.
+        """
+        return int(hashed.split("$")[2]) != self.rounds
+
+
+class HashArgon2(Hash):
+    """
+    Implementation of the Hash interface using Argon2id, which is memory hard,
+    so every guess of an attacker costs memory_cost KiB as well as CPU time.
+
+    Attributes:
+        time_cost (int): The number of passes over the memory.
+        memory_cost (int): The memory used by one hash in KiB.
+        parallelism (int): The number of lanes hashed by parallel threads.
+    """
+
+    prefixes = ("$argon2id$", "$argon2i$", "$argon2d$")
+
+    def __init__(
+        self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 1
+    ):
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+        self._hasher = PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            type=Type.ID,
+        )
+
+    def hash_password(self, password: str) -> str:
+        """
+        Hash the given plain text password using Argon2id.
+
+        Args:
+            password (str): The plain text password to be hashed.
+
+        Returns:
+            str: The hash in PHC string format, with its parameters and salt.
+        """
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        Verify a plain text password against a given Argon2 hash.
+
+        Args:
+            password (str): The plain text password to verify.
+            hashed (str): The Argon2 hash to compare against.
+
+        Returns:
+            bool: True if the password matches the hashed password, False otherwise.
+        """
+        try:
+            return self._hasher.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check whether the parameters of an Argon2 hash differ from the configured ones.
+
+        Args:
+            hashed (str): The Argon2 hash.
+
+        Returns:
+            bool: True if the hash was made with other parameters.
+        """
+        return self._hasher.check_needs_rehash(hashed)
+
+
+class HashDispatcher(Hash):
+    """
+    Hash new passwords with one Hash and verify the hashes of any of several,
+    picked by the prefix of the stored hash, so users keep logging in while their
+    passwords move to the new algorithm.
+
+    Attributes:
+        default (Hash): The implementation new passwords are hashed with.
+        hash_handlers (tuple[Hash, ...]): Every implementation, default included.
+    """
+
+    def __init__(self, default: Hash, *others: Hash):
+        self.default = default
+        self.hash_handlers = (default, *others)
+        self.prefixes = tuple(
+            prefix
+            for hash_handler in self.hash_handlers
+            for prefix in hash_handler.prefixes
+        )
+
+    def _handler(self, hashed: str) -> Hash | None:
+        """
+        Return the implementation of hashed, None if no implementation made it.
+        """
+        for hash_handler in self.hash_handlers:
+            if hashed.startswith(hash_handler.prefixes):
+                return hash_handler
+        return None
+
+    def hash_password(self, password: str) -> str:
+        """
+        Hash the given password with the default implementation.
+
+        Args:
+            password (str): The plain text password to be hashed.
+
+        Returns:
+            str: The resulting hashed password string.
+        """
+        return self.default.hash_password(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        Verify the given password with the implementation of hashed.
+
+        Args:
+            password (str): The plain text password to verify.
+            hashed (str): The hashed password stored in the database.
+
+        Returns:
+            bool: True if the password matches, False otherwise or for unknown formats.
+        """
+        hash_handler = self._handler(hashed)
+        return hash_handler is not None and hash_handler.verify(password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check whether hashed was not made by the default implementation with its
+        current parameters.
+
+        Args:
+            hashed (str): The hashed password stored in the database.
+
+        Returns:
+            bool: True if the password should be hashed again.
+        """
+        return self._handler(hashed) is not self.default or (
+            self.default.needs_rehash(hashed)
+        )
+
+
+class HashEngine:
+    """
+    Run a Hash implementation in a bounded process pool, so that CPU heavy
+    hashing does not block the event loop or the AnyIO worker threads.
+
+    Attributes:
+        hash_handler (Hash): The hash implementation executed in the worker processes.
+        pool_size (int): The number of worker processes.
+        queue_depth (int): The number of requests allowed to wait for a free worker.
+    """
+
+    def __init__(self, hash_handler: Hash, pool_size: int, queue_depth: int):
+        self.hash_handler = hash_handler
+        self.pool_size = pool_size if pool_size > 0 else os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Start the worker processes on first use.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.pool_size)
+        return self._executor
+
+    async def _submit(self, func, *args):
+        """
+        Run func in the process pool and wait for the result.
+
+        Raises:
+            HashEngineOverloadedError: If every worker is busy and the queue is full.
+        """
+        if self.pending >= self.pool_size + self.queue_depth:
+            raise HashEngineOverloadedError
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash_password(self, password: str) -> str:
+        """
+        Hash the given password in a worker process.
+
+        Args:
+            password (str): The password to be hashed.
+
+        Returns:
+            str: The resulting hashed password string.
+        """
+        return await self._submit(self.hash_handler.hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """
+        Verify the given password against hashed in a worker process.
+
+        Args:
+            password (str): The password that needs to be verified.
+            hashed (str): The hashed password stored in the database.
+
+        Returns:
+            bool: True if verification was successful, False otherwise.
+        """
+        return await self._submit(self.hash_handler.verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check whether hashed should be hashed again, which is cheap enough to
+        run without a worker process.
+
+        Args:
+            hashed (str): The hashed password stored in the database.
+
+        Returns:
+            bool: True if the password should be hashed again.
+        """
+        return self.hash_handler.needs_rehash(hashed)
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_hash_engine: HashEngine | None = None
+
+
+def get_hash_engine() -> HashEngine:
+    """
+    Return the process-wide hash engine, created from Config on first use.
+
+    Returns:
+        HashEngine: The shared hash engine.
+    """
+    global _hash_engine
+    if _hash_engine is None:
+        bcrypt_handler = HashBcrypt(Config.HASH_BCRYPT_ROUNDS)
+        argon2_handler = HashArgon2(
+            Config.HASH_ARGON2_TIME_COST,
+            Config.HASH_ARGON2_MEMORY_KIB,
+            Config.HASH_ARGON2_PARALLELISM,
+        )
+        if Config.HASH_ALGORITHM == "argon2id":
+            hash_handler = HashDispatcher(argon2_handler, bcrypt_handler)
+        else:
+            hash_handler = HashDispatcher(bcrypt_handler, argon2_handler)
+        _hash_engine = HashEngine(
+            hash_handler, Config.HASH_POOL_SIZE, Config.HASH_QUEUE_DEPTH
+        )
+    return _hash_engine
@@ -3,12 +3,12 @@ from typing import TypedDict
 import logging
 from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import validates
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.orm import validates, Session
+from sqlalchemy import Column, Integer, String, DateTime, update, delete
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 
-from core.database import DataBase
+from core.database import DataBase, AsyncDataBase
 from core.error import (
     InvalidHashedPassword,
     DatabaseCreateUserError,
@@ -21,6 +21,30 @@ from core.error import (
     DatabaseDeleteUserError,
 )
 
+# The formats of hashed_password: bcrypt and the Argon2 PHC string.
+HASH_PATTERNS = (
+    r"^\$2[aby]\$.{56}$",
+    r"^\$argon2(id|i|d)\$v=\d+\$m=\d+,t=\d+,p=\d+\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+$",
+)
+
+
+def check_hashed_password(value: str) -> str:
+    """
+    Check that a password is already hashed using bcrypt or Argon2.
+
+    Args:
+        value (str): The password string to check.
+
+    Returns:
+        str: The valid hashed password.
+
+    Raises:
+        InvalidHashedPassword: If the password does not match a HASH_PATTERNS format.
+    """
+    if not any(re.fullmatch(pattern, value) for pattern in HASH_PATTERNS):
+        raise InvalidHashedPassword
+    return value
+
 
 class UserData(TypedDict):
     """
@@ -53,8 +77,8 @@ class UserDatabase(DataBase):
             Create a new user with provided data.
         query(user_name:str) -> dict:
             Retrivew a user's information by user name.
-        update(user_name: str, hashed_password: str, mail: str) -> bool:
-            Update a exist user information by user_name using hashed_password and mail.
+        update(user_id: int, hashed_password: str|None, mail: str|None) -> None:
+            Update the given hashed_password and mail of an existing user.
         delete(user_id:int) -> bool:
             Delete the user data by user_id
     """
@@ -86,7 +110,7 @@ class UserDatabase(DataBase):
         @validates("hashed_password")
         def validate_hashed_password(self, _, value):
             """
-            Validates that the password is already hashed using bcrypt.
+            Validates that the password is already hashed using bcrypt or Argon2.
 
             Args:
                 key (str): The column name being validated.
@@ -96,12 +120,79 @@ class UserDatabase(DataBase):
                 str: The valid hashed password.
 
             Raises:
-                ValueError: If the password does not appear to be properly hashed.
+                InvalidHashedPassword: If the password is not properly hashed.
             """
-            # Check if it matches bcrypt hash pattern
-            if not re.fullmatch(r"^\$2[aby]\$.{56}$", value):
-                raise InvalidHashedPassword
-            return value
+            return check_hashed_password(value)
+
+    @classmethod
+    def _insert(cls, session: Session, user_data: UserData) -> None:
+        """
+        Add a user to session.
+        """
+        new_user = cls.User(
+            user_name=user_data["user_name"],
+            hashed_password=user_data["hashed_password"],
+            mail=user_data["mail"],
+            created_at=user_data["created_at"],
+        )
+        session.add(new_user)
+
+    @classmethod
+    def _select(cls, session: Session, user_name: str) -> User:
+        """
+        Select the user named user_name with session.
+        """
+        retrieved_user = (
+            session.query(cls.User).filter(cls.User.user_name == user_name).first()
+        )
+        if not retrieved_user:
+            raise DatabaseQueryUserNotFoundError
+        return retrieved_user
+
+    @classmethod
+    def _update(
+        cls,
+        session: Session,
+        user_id: int,
+        hashed_paaword: str | None = None,
+        mail: str | None = None,
+    ) -> None:
+        """
+        Update the given columns of the user identified by user_id with session,
+        in a single UPDATE statement without loading the user first.
+        """
+        values = {}
+        if hashed_paaword is not None:
+            # A bulk UPDATE skips the ORM validators, so check the hash explicitly.
+            values["hashed_password"] = check_hashed_password(hashed_paaword)
+        if mail is not None:
+            values["mail"] = mail
+        if not values:
+            return
+        result = session.execute(
+            update(cls.User)
+            .where(cls.User.user_id == user_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            logging.error("Error occurred while update user data: User doesn't exist")
+            raise DatabaseUpdateUserNotFoundError
+
+    @classmethod
+    def _delete(cls, session: Session, user_id: int) -> None:
+        """
+        Delete the user identified by user_id with session, in a single DELETE
+        statement without loading the user first.
+        """
+        result = session.execute(
+            delete(cls.User)
+            .where(cls.User.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            logging.error("Error occurred while delete user data: User doesn't exist")
+            raise DatabaseDeleteUserNotFoundError
 
     def create(self, user_data: UserData) -> None:
         """
@@ -112,13 +203,7 @@ class UserDatabase(DataBase):
         """
         session = self.session()
         try:
-            new_user = self.User(
-                user_name=user_data["user_name"],
-                hashed_password=user_data["hashed_password"],
-                mail=user_data["mail"],
-                created_at=user_data["created_at"],
-            )
-            session.add(new_user)
+            self._insert(session, user_data)
             session.commit()
         except IntegrityError as e:
             session.rollback()
@@ -143,14 +228,7 @@ class UserDatabase(DataBase):
         """
         session = self.session()
         try:
-            retrieved_user = (
-                session.query(self.User)
-                .filter(self.User.user_name == user_name)
-                .first()
-            )
-            if not retrieved_user:
-                raise DatabaseQueryUserNotFoundError
-            return retrieved_user
+            return self._select(session, user_name)
         except SQLAlchemyError as e:
             session.rollback()
             logging.error("Error occurred while query transaction record: %s", e)
@@ -158,29 +236,22 @@ class UserDatabase(DataBase):
         finally:
             session.close()
 
-    def update(self, user_id: int, hashed_paaword: str, mail: str):
+    def update(
+        self, user_id: int, hashed_paaword: str | None = None, mail: str | None = None
+    ):
         """
-        Update the user data in the database that matches the given user_id.
+        Update the user data in the database that matches the given user_id,
+        a column given as None is left unchanged.
 
         Args:
             user_id (int) : The ID used to filter user data.
-            hashed_paaword (str) : The hashed password used to update user data.
-            mail(str) : The mail used to update user data.
+            hashed_paaword (str|None) : The hashed password used to update user data.
+            mail(str|None) : The mail used to update user data.
         """
         session = self.session()
         try:
-            update_user = (
-                session.query(self.User).filter(self.User.user_id == user_id).first()
-            )
-            if update_user:
-                update_user.hashed_password = hashed_paaword
-                update_user.mail = mail
-                session.commit()
-            else:
-                logging.error(
-                    "Error occurred while update user data: User doesn't exist"
-                )
-                raise DatabaseUpdateUserNotFoundError
+            self._update(session, user_id, hashed_paaword, mail)
+            session.commit()
         except SQLAlchemyError as e:
             session.rollback()
             logging.error("Error occurred while update user data: %s", e)
@@ -197,15 +268,8 @@ class UserDatabase(DataBase):
         """
         session = self.session()
         try:
-            user = session.query(self.User).filter(self.User.user_id == user_id).first()
-            if user:
-                session.delete(user)
-                session.commit()
-            else:
-                logging.error(
-                    "Error occurred while delete user data: User doesn't exist"
-                )
-                raise DatabaseDeleteUserNotFoundError
+            self._delete(session, user_id)
+            session.commit()
         except SQLAlchemyError as e:
             session.rollback()
             logging.error(
@@ -216,3 +280,106 @@ class UserDatabase(DataBase):
             raise DatabaseDeleteUserError from e
         finally:
             session.close()
+
+
+class AsyncUserDatabase(AsyncDataBase):
+    """
+    A class to manage CRUD (Create, Read, Update, Delete) operations for user data
+    from asyncio code.
+
+    It runs the same statements as UserDatabase through an AsyncSession,
+    so the connection is driven by the async driver on the event loop.
+
+    Methods:
+        create(user_data:dict) -> None:
+            Create a new user with provided data.
+        query(user_name:str) -> dict:
+            Retrivew a user's information by user name.
+        update(user_id: int, hashed_password: str|None, mail: str|None) -> None:
+            Update the given hashed_password and mail of an existing user.
+        delete(user_id:int) -> bool:
+            Delete the user data by user_id
+    """
+
+    User = UserDatabase.User
+
+    async def create(self, user_data: UserData) -> None:
+        """
+        Insert a user data into the database.
+
+        Args:
+            user_data (UserData) : The user data to be inserted.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(UserDatabase._insert, user_data)
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                logging.error("IntegrityError while creating user: %s", e)
+                raise UsernameAlreadyExistsError("Username already exists") from e
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while creating user data: %s", e)
+                raise DatabaseCreateUserError from e
+
+    async def query(self, user_name: str) -> User:
+        """
+        Query user data from the database that match the given user name.
+
+        Args:
+            user_name (str) : The user name used to filter user data.
+
+        Returns:
+            User: The user query with user name
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(UserDatabase._select, user_name)
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while query transaction record: %s", e)
+                raise DatabaseQueryUserError from e
+
+    async def update(
+        self, user_id: int, hashed_paaword: str | None = None, mail: str | None = None
+    ):
+        """
+        Update the user data in the database that matches the given user_id,
+        a column given as None is left unchanged.
+
+        Args:
+            user_id (int) : The ID used to filter user data.
+            hashed_paaword (str|None) : The hashed password used to update user data.
+            mail(str|None) : The mail used to update user data.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(
+                    UserDatabase._update, user_id, hashed_paaword, mail
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while update user data: %s", e)
+                raise DatabaseUpdateUserError from e
+
+    async def delete(self, user_id: int) -> None:
+        """
+        Delete the user data in the database that matches the given user_id.
+
+        Args:
+            user_id (int) : The ID used to filter user data.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(UserDatabase._delete, user_id)
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error(
+                    "Error occurred while deleting user data for user id %d: %s",
+                    user_id,
+                    e,
+                )
+                raise DatabaseDeleteUserError from e
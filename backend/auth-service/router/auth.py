@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 from fastapi import HTTPException
 
+from core.config.config import Config
 from core.error import (
     BaseAPIException,
     make_error_content,
@@ -9,6 +10,10 @@ from core.error import (
     DatabaseCreateUserError,
     UsernameAlreadyExistsError,
     InvalidUserNameOrPassword,
+    HashEngineOverloadedError,
+    RefreshTokenNotFound,
+    RefreshTokenInvalid,
+    DatabaseRevokeTokenError,
     ErrorResponse,
 )
 from controller.user_profile import (
@@ -20,6 +25,36 @@ from controller.user_profile import (
 router = APIRouter()
 
 
+def set_token_cookies(
+    response: JSONResponse, access_token: str, refresh_token: str
+) -> None:
+    """
+    Store the token pair in http only cookies. Both live as long as the refresh
+    token, so an expired access token is still sent and answered with 401, which
+    tells the client to refresh. The refresh token is only sent to auth-service.
+    """
+    max_age = Config.JWT_REFRESH_EXPIRE_DAYS * 86400
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        max_age=max_age,
+        expires=max_age,
+        samesite="Strict",
+        secure=True,
+    )
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        max_age=max_age,
+        expires=max_age,
+        path=Config.JWT_REFRESH_COOKIE_PATH,
+        samesite="Strict",
+        secure=True,
+    )
+
+
 @router.post(
     "/register",
     tags=["users"],
@@ -35,9 +70,13 @@ router = APIRouter()
             "model": ErrorResponse,
             "content": make_error_content([UsernameAlreadyExistsError]),
         },
+        503: {
+            "model": ErrorResponse,
+            "content": make_error_content([HashEngineOverloadedError]),
+        },
     },
 )
-def user_register(register_request: RegisterRequest, request: Request):
+async def user_register(register_request: RegisterRequest, request: Request):
     """
     Register a new user.
 
@@ -46,7 +85,7 @@ def user_register(register_request: RegisterRequest, request: Request):
     """
     user_profile_handler = UsernamePasswordUserProfile()
     try:
-        result = user_profile_handler.register(register_request)
+        result = await user_profile_handler.register(register_request)
         return JSONResponse(content=result, status_code=200)
     except BaseAPIException as e:
         error = e.to_dict()
@@ -64,9 +103,13 @@ def user_register(register_request: RegisterRequest, request: Request):
             "model": ErrorResponse,
             "content": make_error_content([InvalidUserNameOrPassword]),
         },
+        503: {
+            "model": ErrorResponse,
+            "content": make_error_content([HashEngineOverloadedError]),
+        },
     },
 )
-def login(login_request: LoginRequest, request: Request):
+async def login(login_request: LoginRequest, request: Request):
     """
     Login user with login information.
 
@@ -76,20 +119,96 @@ def login(login_request: LoginRequest, request: Request):
     try:
         client_ip = request.client.host
         user_profile_handler = UsernamePasswordUserProfile()
-        result, token = user_profile_handler.login(login_request, client_ip)
+        result, access_token, refresh_token = await user_profile_handler.login(
+            login_request, client_ip
+        )
         response = JSONResponse(content=result, status_code=200)
-        response.set_cookie(
-            key="access_token",
-            value=token,
-            httponly=True,
-            max_age=3600,
-            expires=3600,
+        set_token_cookies(response, access_token, refresh_token)
+        return response
+    except HashEngineOverloadedError as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+    except BaseAPIException as e:
+        error = InvalidUserNameOrPassword().to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
+@router.post(
+    "/refresh",
+    tags=["users"],
+    response_model=dict,
+    responses={
+        401: {
+            "model": ErrorResponse,
+            "content": make_error_content([RefreshTokenInvalid]),
+        },
+        404: {
+            "model": ErrorResponse,
+            "content": make_error_content([RefreshTokenNotFound]),
+        },
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseRevokeTokenError]),
+        },
+    },
+)
+async def refresh(request: Request):
+    """
+    Exchange the refresh token cookie for a new access token and refresh token.
+    """
+    try:
+        refresh_token = request.cookies.get("refresh_token")
+        if refresh_token is None:
+            raise RefreshTokenNotFound
+        user_profile_handler = UsernamePasswordUserProfile()
+        result, access_token, refresh_token = await user_profile_handler.refresh(
+            refresh_token
+        )
+        response = JSONResponse(content=result, status_code=200)
+        set_token_cookies(response, access_token, refresh_token)
+        return response
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
+@router.post(
+    "/logout",
+    tags=["users"],
+    response_model=dict,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseRevokeTokenError]),
+        },
+    },
+)
+async def logout(request: Request):
+    """
+    Revoke every token of the current login and clear the token cookies.
+    """
+    try:
+        user_profile_handler = UsernamePasswordUserProfile()
+        result = await user_profile_handler.logout(
+            request.cookies.get("access_token"), request.cookies.get("refresh_token")
+        )
+        response = JSONResponse(content=result, status_code=200)
+        response.delete_cookie("access_token", samesite="Strict", secure=True)
+        response.delete_cookie(
+            "refresh_token",
+            path=Config.JWT_REFRESH_COOKIE_PATH,
             samesite="Strict",
             secure=True,
         )
         return response
     except BaseAPIException as e:
-        error = InvalidUserNameOrPassword().to_dict()
+        error = e.to_dict()
         raise HTTPException(
             status_code=error["status_code"], detail=error["detail"]
         ) from e
@@ -0,0 +1,102 @@
+import unittest
+import os
+import tempfile
+import logging
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import event
+
+from model.user_database import AsyncUserDatabase, UserData
+from model.hash import HashBcrypt
+from core.error import (
+    UsernameAlreadyExistsError,
+    DatabaseQueryUserNotFoundError,
+    DatabaseUpdateUserNotFoundError,
+    DatabaseDeleteUserNotFoundError,
+)
+
+logging.getLogger().addHandler(logging.NullHandler())
+
+
+class TestAsyncUserDB(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the asyncio user database against a sqlite stand-in.
+    """
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.temp_dir.name, 'test.db')}"
+        with patch("core.database.Config.ASYNC_USER_DATABASE_URL", url):
+            self.user_database = AsyncUserDatabase()
+        await self.user_database.create_tables(self.user_database.User.metadata)
+        self.hash_method = HashBcrypt()
+        self.user_data: UserData = {
+            "user_name": "test_user",
+            "hashed_password": self.hash_method.hash_password("test_password"),
+            "mail": "test_mail@example.com",
+            "created_at": datetime(2025, 5, 29, 3, 36, 24, 776730),
+        }
+
+    async def asyncTearDown(self):
+        await self.user_database.engine.dispose()
+        self.temp_dir.cleanup()
+
+    async def test_crud(self):
+        """
+        Test the basic CRUD operations (Create, Read, Update, Delete) on the user database.
+        """
+        # insert
+        await self.user_database.create(self.user_data)
+        with self.assertRaises(UsernameAlreadyExistsError):
+            await self.user_database.create(self.user_data)
+
+        # query
+        retrieved_user = await self.user_database.query(self.user_data["user_name"])
+        self.assertEqual(retrieved_user.user_name, self.user_data["user_name"])
+        with self.assertRaises(DatabaseQueryUserNotFoundError):
+            await self.user_database.query("nonexistent_user")
+
+        # update
+        update_mail = "update_mail@example.com"
+        hashed_paaword = self.hash_method.hash_password("update_password")
+        await self.user_database.update(
+            retrieved_user.user_id, hashed_paaword, update_mail
+        )
+        updated_user = await self.user_database.query(self.user_data["user_name"])
+        self.assertEqual(updated_user.mail, update_mail)
+        self.assertEqual(updated_user.hashed_password, hashed_paaword)
+        with self.assertRaises(DatabaseUpdateUserNotFoundError):
+            await self.user_database.update(999, hashed_paaword, update_mail)
+
+        # delete
+        await self.user_database.delete(retrieved_user.user_id)
+        with self.assertRaises(DatabaseDeleteUserNotFoundError):
+            await self.user_database.delete(retrieved_user.user_id)
+
+    async def test_update_round_trips(self):
+        """
+        Test that update and delete each send one statement to the database.
+        """
+        await self.user_database.create(self.user_data)
+        user = await self.user_database.query(self.user_data["user_name"])
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement.split()[0].upper())
+
+        sync_engine = self.user_database.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record_statement)
+        try:
+            await self.user_database.update(
+                user.user_id, self.user_data["hashed_password"], "new@example.com"
+            )
+            self.assertEqual(statements, ["UPDATE"])
+            statements.clear()
+            await self.user_database.delete(user.user_id)
+            self.assertEqual(statements, ["DELETE"])
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record_statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from core.database import get_engine, pool_statistics
+from core.statistics import log_statistics
+from model.user_database import UserDatabase
+
+
+class TestEngineRegistry(unittest.TestCase):
+    """
+    Test case for the shared engine and connection pool registry.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.temp_dir.name, 'registry.db')}"
+
+    def tearDown(self):
+        get_engine(self.url).dispose()
+        self.temp_dir.cleanup()
+
+    def test_engine_is_shared(self):
+        """Test that the same URL always returns the same engine."""
+        self.assertIs(get_engine(self.url), get_engine(self.url))
+
+    def test_database_instances_share_engine(self):
+        """Test that every DataBase subclass instance uses the registered engine."""
+        self.assertIs(UserDatabase().engine, UserDatabase().engine)
+
+    def test_checkout_statistics(self):
+        """Test that checkouts are counted in the pool statistics."""
+        engine = get_engine(self.url)
+        for _ in range(3):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        statistics = engine.pool.statistics()
+        self.assertEqual(statistics["checkouts"], 3)
+        self.assertEqual(statistics["checked_out"], 0)
+        self.assertEqual(statistics["timeouts"], 0)
+        self.assertGreaterEqual(
+            statistics["total_checkout_time"], statistics["max_checkout_time"]
+        )
+        self.assertIn(
+            engine.url.render_as_string(hide_password=True), pool_statistics()
+        )
+
+    @patch("core.database.Config.DATABASE_POOL_TIMEOUT", 0.01)
+    @patch("core.database.Config.DATABASE_MAX_OVERFLOW", 0)
+    @patch("core.database.Config.DATABASE_POOL_SIZE", 1)
+    def test_checkout_timeout(self):
+        """Test that a checkout which waits longer than the pool timeout is counted."""
+        engine = get_engine(self.url)
+        with engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                engine.connect()
+
+        self.assertEqual(engine.pool.statistics()["timeouts"], 1)
+
+
+class TestStatisticsLog(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the periodic statistics log.
+    """
+
+    async def test_log_statistics(self):
+        """Test that every source is logged each interval until cancelled."""
+        with self.assertLogs(level="INFO") as logs:
+            task = asyncio.create_task(
+                log_statistics(0.01, {"Connection pool": lambda: {"checkouts": 3}})
+            )
+            await asyncio.sleep(0.05)
+            task.cancel()
+        self.assertGreaterEqual(len(logs.output), 2)
+        self.assertEqual(
+            logs.output[0], "INFO:root:Connection pool statistics: {'checkouts': 3}"
+        )
+
+    async def test_log_statistics_disabled(self):
+        """Test that an interval of 0 returns at once."""
+        await asyncio.wait_for(log_statistics(0, {"Connection pool": dict}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
+import asyncio
 from argon2.exceptions import VerifyMismatchError
 
-from model.hash import HashBcrypt
+from model.hash import HashArgon2, HashBcrypt, HashDispatcher, HashEngine
+from core.error import HashEngineOverloadedError
 
 
 class TestBcrypt(unittest.TestCase):
@@ -34,6 +36,136 @@ class TestBcrypt(unittest.TestCase):
         self.assertTrue(self.hash_method.verify(self.password, hashed_password))
         self.assertFalse(self.hash_method.verify("wrong_password", hashed_password))
 
+    def test_rounds_and_needs_rehash(self):
+        """
+        Test that the cost factor is configurable and detected in stored hashes.
+        """
+        hashed_password = HashBcrypt(rounds=4).hash_password(self.password)
+
+        self.assertTrue(hashed_password.startswith("$2b$04$"))
+        self.assertTrue(HashBcrypt(rounds=4).verify(self.password, hashed_password))
+        self.assertFalse(HashBcrypt(rounds=4).needs_rehash(hashed_password))
+        self.assertTrue(HashBcrypt(rounds=5).needs_rehash(hashed_password))
+
+
+class TestArgon2(unittest.TestCase):
+    """
+    Test case for hash with Argon2id.
+    """
+
+    def setUp(self):
+        self.password = "test_password"
+        self.hash_method = HashArgon2(time_cost=1, memory_cost=1024, parallelism=1)
+
+    def test_hash_and_verify(self):
+        """
+        Test that passwords are hashed in the Argon2id PHC format and verified.
+        """
+        hashed_password = self.hash_method.hash_password(self.password)
+
+        self.assertTrue(hashed_password.startswith("$argon2id$v=19$m=1024,t=1,p=1$"))
+        self.assertNotEqual(
+            hashed_password, self.hash_method.hash_password(self.password)
+        )
+        self.assertTrue(self.hash_method.verify(self.password, hashed_password))
+        self.assertFalse(self.hash_method.verify("wrong_password", hashed_password))
+        self.assertFalse(self.hash_method.verify(self.password, "$argon2id$broken"))
+
+    def test_needs_rehash(self):
+        """
+        Test that hashes made with other parameters need a rehash.
+        """
+        hashed_password = self.hash_method.hash_password(self.password)
+
+        self.assertFalse(self.hash_method.needs_rehash(hashed_password))
+        for other in (
+            HashArgon2(time_cost=2, memory_cost=1024, parallelism=1),
+            HashArgon2(time_cost=1, memory_cost=2048, parallelism=1),
+        ):
+            self.assertTrue(other.needs_rehash(hashed_password))
+
+
+class TestHashDispatcher(unittest.TestCase):
+    """
+    Test case for verifying bcrypt and Argon2 hashes side by side.
+    """
+
+    def setUp(self):
+        self.password = "test_password"
+        self.bcrypt = HashBcrypt(rounds=4)
+        self.argon2 = HashArgon2(time_cost=1, memory_cost=1024, parallelism=1)
+        self.hash_method = HashDispatcher(self.argon2, self.bcrypt)
+
+    def test_verify_either_format(self):
+        """
+        Test that hashes of both implementations are verified by the dispatcher.
+        """
+        for hashed_password in (
+            self.bcrypt.hash_password(self.password),
+            self.argon2.hash_password(self.password),
+        ):
+            self.assertTrue(self.hash_method.verify(self.password, hashed_password))
+            self.assertFalse(self.hash_method.verify("wrong", hashed_password))
+        self.assertFalse(self.hash_method.verify(self.password, "plain"))
+
+    def test_hash_and_needs_rehash(self):
+        """
+        Test that new hashes use the default and other formats need a rehash.
+        """
+        hashed_password = self.hash_method.hash_password(self.password)
+
+        self.assertTrue(hashed_password.startswith("$argon2id$"))
+        self.assertFalse(self.hash_method.needs_rehash(hashed_password))
+        self.assertTrue(
+            self.hash_method.needs_rehash(self.bcrypt.hash_password(self.password))
+        )
+        self.assertTrue(
+            HashDispatcher(self.bcrypt, self.argon2).needs_rehash(hashed_password)
+        )
+
+
+class TestHashEngine(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for running bcrypt in the process pool.
+    """
+
+    def setUp(self):
+        self.password = "test_password"
+        self.hash_engine = HashEngine(HashBcrypt(), pool_size=2, queue_depth=1)
+
+    def tearDown(self):
+        self.hash_engine.shutdown()
+
+    async def test_hash_and_verify(self):
+        """
+        Test hash password and verify it in the worker processes.
+        """
+        hashed_password = await self.hash_engine.hash_password(self.password)
+
+        self.assertTrue(HashBcrypt().verify(self.password, hashed_password))
+        self.assertTrue(await self.hash_engine.verify(self.password, hashed_password))
+        self.assertFalse(
+            await self.hash_engine.verify("wrong_password", hashed_password)
+        )
+        self.assertEqual(self.hash_engine.pending, 0)
+
+    async def test_queue_full(self):
+        """
+        Test that requests beyond pool size and queue depth are rejected.
+        """
+        hashed_password = HashBcrypt().hash_password(self.password)
+        results = await asyncio.gather(
+            *[
+                self.hash_engine.verify(self.password, hashed_password)
+                for _ in range(4)
+            ],
+            return_exceptions=True,
+        )
+
+        self.assertEqual(results[:3], [True, True, True])
+        self.assertIsInstance(results[3], HashEngineOverloadedError)
+        self.assertEqual(self.hash_engine.pending, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
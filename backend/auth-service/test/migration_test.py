@@ -0,0 +1,168 @@
+import unittest
+import os
+import tempfile
+from sqlalchemy import func, inspect, insert, select
+from datetime import datetime
+
+from core.database import get_engine
+from core.migration import (
+    MIGRATIONS,
+    HOT_QUERIES,
+    migrate,
+    applied_versions,
+    explain,
+    verify_indexes,
+    transactions,
+    monthly_spending,
+    items,
+    CreateMonthlySpending,
+    NormalizeProductNames,
+)
+
+
+class TestMigration(unittest.TestCase):
+    """
+    Test case for the versioned schema migrations against a sqlite stand-in.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = get_engine(
+            f"sqlite:///{os.path.join(self.temp_dir.name, 'migration.db')}"
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_migrate_is_repeatable(self):
+        """Test that migrations are applied once and in version order."""
+        versions = [migration.version for migration in MIGRATIONS]
+
+        self.assertEqual(migrate(self.engine), sorted(versions))
+        self.assertEqual(migrate(self.engine), [])
+        self.assertEqual(applied_versions(self.engine), set(versions))
+
+    def test_upgrade_on_existing_schema(self):
+        """Test that upgrades skip tables and indexes which already exist."""
+        with self.engine.begin() as connection:
+            for migration in MIGRATIONS:
+                migration.upgrade(connection)
+            for migration in MIGRATIONS:
+                migration.upgrade(connection)
+
+        self.assertEqual(len(migrate(self.engine)), len(MIGRATIONS))
+        index_names = {
+            index["name"] for index in inspect(self.engine).get_indexes("transactions")
+        }
+        self.assertIn("ix_transactions_user_date", index_names)
+        self.assertIn("ix_transactions_user_category_date", index_names)
+
+    def test_monthly_spending_backfill(self):
+        """Test that the rollup migration backfills the existing transactions."""
+        migrate(self.engine, [m for m in MIGRATIONS if m.version < 3])
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(transactions),
+                [
+                    {
+                        "user_id": 1,
+                        "category": category,
+                        "product_name": "pizza",
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": date,
+                    }
+                    for category, date in [
+                        ("food", datetime(2025, 1, 1)),
+                        ("food", datetime(2025, 1, 31)),
+                        (None, datetime(2025, 2, 1)),
+                    ]
+                ],
+            )
+
+        self.assertIn(CreateMonthlySpending.version, migrate(self.engine))
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                monthly_spending.select().order_by(monthly_spending.c.month)
+            ).all()
+        self.assertEqual(
+            [tuple(row) for row in rows],
+            [
+                (1, "2025-01", "food", "cash", 200, 2),
+                (1, "2025-02", "", "cash", 100, 1),
+            ],
+        )
+
+    def test_normalize_product_names(self):
+        """Test that product names move to items and transactions keep their names."""
+        migrate(
+            self.engine,
+            [m for m in MIGRATIONS if m.version < NormalizeProductNames.version],
+        )
+        names = ["pizza", "Pizza", "pizza", "bus"]
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(transactions),
+                [
+                    {
+                        "user_id": 1,
+                        "category": "food",
+                        "product_name": name,
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": datetime(2025, 1, 1),
+                    }
+                    for name in names
+                ],
+            )
+
+        self.assertIn(NormalizeProductNames.version, migrate(self.engine))
+        with self.engine.begin() as connection:
+            NormalizeProductNames().upgrade(connection)
+            rows = connection.execute(
+                select(items.c.product_name)
+                .join(transactions, transactions.c.item_id == items.c.item_id)
+                .order_by(transactions.c.transaction_id)
+            ).scalars()
+            self.assertEqual(list(rows), names)
+            self.assertEqual(
+                connection.execute(select(func.count()).select_from(items)).scalar(),
+                3,
+            )
+        columns = {
+            column["name"]
+            for column in inspect(self.engine).get_columns("transactions")
+        }
+        self.assertNotIn("product_name", columns)
+
+    def test_hot_queries_use_indexes(self):
+        """Test that EXPLAIN shows every hot query using its index."""
+        migrate(self.engine)
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(transactions),
+                [
+                    {
+                        "user_id": user_id,
+                        "category": "food",
+                        "item_id": 1,
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": datetime(2025, 1, 1),
+                    }
+                    for user_id in range(50)
+                ],
+            )
+            statement, index_name = HOT_QUERIES["list user transactions"]
+            plan = explain(connection, statement)
+
+        self.assertTrue(any(index_name in line for line in plan), plan)
+        self.assertTrue(all(verify_indexes(self.engine).values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
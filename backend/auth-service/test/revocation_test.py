@@ -0,0 +1,132 @@
+import unittest
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select, update
+
+from core.revocation import RevocationStore, revoked_tokens
+
+
+class TestRevocationStore(unittest.TestCase):
+    """
+    Test case for the revocation store against a sqlite stand-in.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.temp_dir.name, 'revocation.db')}"
+        )
+        revoked_tokens.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def store(self, sync_interval=0, bucket_seconds=3600):
+        return RevocationStore(self.engine, sync_interval, bucket_seconds)
+
+    def test_revoke(self):
+        """
+        Test that an id is revoked once and is known at once by the revoking store.
+        """
+        store = self.store(sync_interval=3600)
+        expires_at = time.time() + 60
+
+        self.assertTrue(store.revoke("jti", expires_at))
+        self.assertFalse(store.revoke("jti", expires_at))
+        self.assertTrue(store.is_revoked("jti"))
+        self.assertFalse(store.is_revoked("other"))
+        self.assertTrue(store.revoked({"sub": "1", "fam": "jti"}))
+        self.assertFalse(store.revoked({"sub": "1"}))
+
+    def test_use(self):
+        """
+        Test that a single use id is claimed once and not loaded in memory.
+        """
+        first, second = self.store(), self.store()
+
+        self.assertTrue(first.use("jti", time.time() + 60))
+        self.assertFalse(second.use("jti", time.time() + 60))
+        self.assertFalse(first.is_revoked("jti"))
+        self.assertEqual(len(second), 0)
+
+    def test_revoke_is_shared(self):
+        """
+        Test that a revocation reaches another store through the table, and that
+        reusing an id revoked by another store is detected.
+        """
+        first, second = self.store(), self.store()
+        second.sync()
+
+        first.revoke("fam", time.time() + 60)
+
+        self.assertTrue(second.is_revoked("fam"))
+        self.assertFalse(second.revoke("fam", time.time() + 60))
+
+    def test_sync_reads_late_commits(self):
+        """
+        Test that a revocation stamped before the last one seen is still loaded.
+        """
+        store = self.store()
+        store.revoke("first", time.time() + 60)
+        store.sync()
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(revoked_tokens).values(
+                    token_id="late",
+                    expires_at=datetime.now() + timedelta(minutes=1),
+                    revoked_at=store._high_water - timedelta(seconds=5),
+                )
+            )
+
+        self.assertTrue(store.is_revoked("late"))
+
+    def test_expired_buckets_are_dropped(self):
+        """
+        Test that ids are forgotten once their bucket has passed and that expired
+        rows are purged.
+        """
+        store = self.store(bucket_seconds=0.1)
+        store.revoke("short", time.time() + 0.1)
+        store.revoke("long", time.time() + 60)
+        self.assertEqual(len(store), 2)
+
+        time.sleep(0.3)
+        store.sync()
+
+        self.assertEqual(len(store), 1)
+        self.assertFalse(store.is_revoked("short"))
+        self.assertTrue(store.is_revoked("long"))
+        with self.engine.connect() as connection:
+            self.assertEqual(
+                connection.scalars(select(revoked_tokens.c.token_id)).all(), ["long"]
+            )
+
+    def test_first_sync_loads_live_revocations(self):
+        """
+        Test that a new store loads the revocations that have not expired.
+        """
+        self.store().revoke("live", time.time() + 60)
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(revoked_tokens).values(
+                    token_id="expired", expires_at=datetime.now() - timedelta(minutes=1)
+                )
+            )
+            connection.execute(
+                update(revoked_tokens)
+                .where(revoked_tokens.c.token_id == "expired")
+                .values(revoked_at=datetime.now() - timedelta(days=1))
+            )
+
+        store = self.store()
+        store.sync()
+
+        self.assertEqual(len(store), 1)
+        self.assertTrue(store.is_revoked("live"))
+
+
+if __name__ == "__main__":
+    unittest.main()
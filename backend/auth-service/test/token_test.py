@@ -1,15 +1,26 @@
 import unittest
+import os
+import tempfile
+import time
 from datetime import datetime
 from unittest.mock import patch, Mock
+import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 from fastapi import Request
 
-from core.token import JWTToken, TokenService
+from sqlalchemy import create_engine
+
+from core.cache import LRUCacheBackend
+from core.revocation import RevocationStore, revoked_tokens
+from core.token import JWTToken, KeySet, TokenCache, TokenService
+from keys import generate, retire
 from core.error import (
     AccessTokenNotFound,
     AccessTokenUserIDNotFound,
     AccessTokenExpired,
     AccessTokenInvalid,
+    AccessTokenRevoked,
+    RefreshTokenInvalid,
 )
 
 
@@ -98,5 +109,292 @@ class TestTokenServiceMethods(unittest.TestCase):
         self.assertEqual(user_id, 42)
 
 
+class TestTokenCache(unittest.TestCase):
+    """
+    Test case for the verified token cache.
+    """
+
+    def setUp(self):
+        self.mock_strategy = Mock()
+        self.token_cache = TokenCache(LRUCacheBackend(2, ttl=60), ttl=60)
+        self.token_service = TokenService(
+            lambda: self.mock_strategy, token_cache=self.token_cache
+        )
+        self.mock_strategy.decode.side_effect = lambda token: {
+            "sub": token,
+            "exp": time.time() + 600,
+        }
+
+    def test_cache_hit_skips_decode(self):
+        """
+        Test that a token is decoded once and later served from the cache.
+        """
+        for _ in range(3):
+            self.assertEqual(self.token_service.verify_token("1")["sub"], "1")
+
+        self.mock_strategy.decode.assert_called_once_with("1")
+        statistics = self.token_cache.statistics()
+        self.assertEqual((statistics["hits"], statistics["misses"]), (2, 1))
+
+    def test_cache_key_is_digest(self):
+        """
+        Test that the cache does not store the token itself.
+        """
+        self.token_service.verify_token("secret.jwt.token")
+
+        self.assertNotIn("secret.jwt.token", self.token_cache.backend._entries)
+        self.assertIn(
+            TokenCache.key("secret.jwt.token"), self.token_cache.backend._entries
+        )
+
+    def test_cache_honors_exp(self):
+        """
+        Test that payloads are not cached past their exp, nor without one.
+        """
+        self.mock_strategy.decode.side_effect = None
+        self.mock_strategy.decode.return_value = {"sub": 1, "exp": time.time() - 1}
+        self.token_service.verify_token("expired")
+        self.mock_strategy.decode.return_value = {"sub": 1}
+        self.token_service.verify_token("no exp")
+
+        self.assertEqual(self.token_cache.statistics()["size"], 0)
+
+        self.token_cache.set("short", {"sub": 1, "exp": time.time() + 0.05})
+        self.assertIsNotNone(self.token_cache.get("short"))
+        time.sleep(0.06)
+        self.assertIsNone(self.token_cache.get("short"))
+
+    def test_cache_eviction(self):
+        """
+        Test that the least recently used token is evicted beyond max_entries.
+        """
+        for token in ("1", "2", "1", "3", "1", "2"):
+            self.token_service.verify_token(token)
+
+        self.assertEqual(self.mock_strategy.decode.call_count, 4)
+        self.assertEqual(
+            self.token_cache.statistics(),
+            {"hits": 2, "misses": 4, "evictions": 2, "size": 2, "max_entries": 2},
+        )
+
+    def test_revocation_hook_applies_to_cached_token(self):
+        """
+        Test that a token revoked after it was cached is rejected on its next use.
+        """
+        revoked = set()
+        self.token_cache.add_revocation_hook(lambda payload: payload["sub"] in revoked)
+        self.token_service.verify_token("1")
+        self.token_service.verify_token("2")
+
+        revoked.add("1")
+
+        with self.assertRaises(AccessTokenRevoked):
+            self.token_service.verify_token("1")
+        self.assertIsNone(self.token_cache.get("1"))
+        self.assertEqual(self.token_service.verify_token("2")["sub"], "2")
+
+
+class TestAsymmetricToken(unittest.TestCase):
+    """
+    Test case for tokens signed with a private key and verified from the key set.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.private_key_path = os.path.join(self.temp_dir.name, "signing.pem")
+        self.key_set_path = os.path.join(self.temp_dir.name, "jwks.json")
+        # A long interval, keys must be found through the unknown kid reload.
+        self.key_set = KeySet(self.key_set_path, reload_interval=3600)
+        self.patches = [
+            patch("core.token.Config.JWT_PRIVATE_KEY_PATH", self.private_key_path),
+            patch("core.token._key_set", self.key_set),
+        ]
+        for config_patch in self.patches:
+            config_patch.start()
+
+    def tearDown(self):
+        for config_patch in self.patches:
+            config_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_sign_and_verify(self):
+        """
+        Test that EdDSA and ES256 tokens carry their kid and verify from the key set.
+        """
+        for algorithm in ("EdDSA", "ES256"):
+            with patch("core.token.Config.JWT_ALGORITHM", algorithm):
+                kid = generate(algorithm, self.private_key_path, self.key_set_path)
+                token = JWTToken().encode({"sub": "1"})
+
+                header = jwt.get_unverified_header(token)
+                self.assertEqual((header["alg"], header["kid"]), (algorithm, kid))
+                self.assertEqual(JWTToken().decode(token)["sub"], "1")
+        self.assertEqual(len(self.key_set.kids()), 2)
+
+    @patch("core.token.Config.JWT_ALGORITHM", "EdDSA")
+    def test_rotation(self):
+        """
+        Test that tokens of a previous key verify until it is retired.
+        """
+        old_kid = generate("EdDSA", self.private_key_path, self.key_set_path)
+        old_token = JWTToken().encode({"sub": "1"})
+        self.assertEqual(JWTToken().decode(old_token)["sub"], "1")
+
+        generate("EdDSA", self.private_key_path, self.key_set_path)
+        new_token = JWTToken().encode({"sub": "2"})
+        self.assertEqual(JWTToken().decode(new_token)["sub"], "2")
+        self.assertEqual(JWTToken().decode(old_token)["sub"], "1")
+
+        retire(old_kid, self.key_set_path)
+        self.key_set.reload()
+        with self.assertRaises(AccessTokenInvalid):
+            JWTToken().decode(old_token)
+        self.assertEqual(JWTToken().decode(new_token)["sub"], "2")
+
+    @patch("core.token.Config.JWT_ALGORITHM", "EdDSA")
+    def test_keys_parsed_once(self):
+        """
+        Test that the key set is not parsed again while the file is unchanged.
+        """
+        kid = generate("EdDSA", self.private_key_path, self.key_set_path)
+        key = self.key_set.get(kid)
+
+        self.key_set.reload()
+
+        self.assertIs(self.key_set.get(kid), key)
+
+    @patch("core.token.Config.JWT_ALGORITHM", "EdDSA")
+    def test_reject_unknown_and_hmac_tokens(self):
+        """
+        Test that tokens without a known kid and HMAC tokens are rejected.
+        """
+        generate("EdDSA", self.private_key_path, self.key_set_path)
+        other_key_set = os.path.join(self.temp_dir.name, "other.json")
+        generate("EdDSA", self.private_key_path, other_key_set)
+        unknown_token = JWTToken().encode({"sub": "1"})
+        hmac_token = jwt.encode(
+            {"sub": "1"}, "0123456789" * 4, algorithm="HS256", headers={"kid": "x"}
+        )
+
+        for token in (unknown_token, hmac_token, "not.a.token"):
+            with self.assertRaises(AccessTokenInvalid):
+                JWTToken().decode(token)
+
+
+class TestRefreshToken(unittest.TestCase):
+    """
+    Test case for token pairs, refresh token rotation and logout.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(self.temp_dir.name, 'revocation.db')}"
+        )
+        revoked_tokens.metadata.create_all(self.engine)
+        self.token_service = TokenService(
+            JWTToken,
+            token_cache=TokenCache(LRUCacheBackend(100, ttl=60), ttl=60),
+            revocation_store=RevocationStore(self.engine, 0, 3600),
+        )
+        self.mock_request = Mock(spec=Request)
+        self.mock_request.cookies = {}
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def current_user(self, access_token: str) -> int:
+        self.mock_request.cookies = {"access_token": access_token}
+        return self.token_service.get_current_user_from_cookie(self.mock_request)
+
+    def test_revocation_store_is_cache_hook(self):
+        """
+        Test that the revocation store is checked through the token cache hooks,
+        registered once however many services share the cache.
+        """
+        revocation_store = self.token_service.revocation_store
+        TokenService(
+            JWTToken,
+            token_cache=self.token_service.token_cache,
+            revocation_store=revocation_store,
+        )
+        self.assertEqual(
+            self.token_service.token_cache.revocation_hooks, [revocation_store.revoked]
+        )
+
+    def test_token_pair(self):
+        """
+        Test that the access token authenticates and the refresh token does not.
+        """
+        access_token, refresh_token = self.token_service.generate_token_pair(7)
+
+        self.assertEqual(self.current_user(access_token), 7)
+        with self.assertRaises(AccessTokenInvalid):
+            self.current_user(refresh_token)
+        with self.assertRaises(RefreshTokenInvalid):
+            self.token_service.refresh_token_pair(access_token)
+
+        refresh_payload = jwt.decode(refresh_token, options={"verify_signature": False})
+        access_payload = jwt.decode(access_token, options={"verify_signature": False})
+        self.assertEqual(refresh_payload["fam"], access_payload["fam"])
+        self.assertGreater(refresh_payload["exp"], access_payload["exp"])
+
+    def test_rotation(self):
+        """
+        Test that a refresh token is exchanged once, within its family.
+        """
+        _, refresh_token = self.token_service.generate_token_pair(7)
+
+        access_token, new_refresh_token = self.token_service.refresh_token_pair(
+            refresh_token
+        )
+
+        self.assertEqual(self.current_user(access_token), 7)
+        self.assertNotEqual(new_refresh_token, refresh_token)
+        self.assertEqual(
+            jwt.decode(new_refresh_token, options={"verify_signature": False})["fam"],
+            jwt.decode(refresh_token, options={"verify_signature": False})["fam"],
+        )
+
+    def test_reuse_revokes_family(self):
+        """
+        Test that presenting a used refresh token logs the whole family out.
+        """
+        first_access_token, refresh_token = self.token_service.generate_token_pair(7)
+        other_access_token, _ = self.token_service.generate_token_pair(7)
+        access_token, new_refresh_token = self.token_service.refresh_token_pair(
+            refresh_token
+        )
+        self.assertEqual(self.current_user(access_token), 7)
+
+        with self.assertRaises(RefreshTokenInvalid):
+            self.token_service.refresh_token_pair(refresh_token)
+
+        for token in (first_access_token, access_token):
+            with self.assertRaises(AccessTokenRevoked):
+                self.current_user(token)
+        with self.assertRaises(RefreshTokenInvalid):
+            self.token_service.refresh_token_pair(new_refresh_token)
+        self.assertEqual(self.current_user(other_access_token), 7)
+
+    def test_logout(self):
+        """
+        Test that logout revokes cached access tokens and the refresh token at once.
+        """
+        access_token, refresh_token = self.token_service.generate_token_pair(7)
+        self.assertEqual(self.current_user(access_token), 7)
+
+        self.assertTrue(
+            self.token_service.revoke_token_family(refresh_token, access_token)
+        )
+
+        with self.assertRaises(AccessTokenRevoked):
+            self.current_user(access_token)
+        with self.assertRaises(RefreshTokenInvalid):
+            self.token_service.refresh_token_pair(refresh_token)
+        self.assertFalse(self.token_service.revoke_token_family(None, "not.a.token"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,10 +2,11 @@ import unittest
 from datetime import datetime
 import logging
 from unittest.mock import patch, MagicMock
+from sqlalchemy import Delete, Update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.exc import IntegrityError
 
-from model.user_database import UserDatabase, UserData
+from model.user_database import UserDatabase, UserData, check_hashed_password
 from model.hash import HashBcrypt
 from core.error import (
     InvalidHashedPassword,
@@ -160,29 +161,25 @@ class TestUserDB(unittest.TestCase):
             mock_session.close.assert_called_once()
 
     def test_update_user_success(self):
-        """Test that updating an existing user succeeds."""
+        """Test that updating an existing user runs a single UPDATE."""
         mock_session = MagicMock()
-        mock_user = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_user
+        mock_session.execute.return_value.rowcount = 1
 
         update_hash_password = self.hash_method.hash_password("hashed_password_example")
 
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             self.user_database.update(
                 user_id=1, hashed_paaword=update_hash_password, mail="test@example.com"
             )
 
-            mock_session.query.assert_called_once_with(self.user_database.User)
-            mock_query.filter.assert_called_once()
-            mock_filter.first.assert_called_once()
-
-            self.assertEqual(mock_user.hashed_password, update_hash_password)
-            self.assertEqual(mock_user.mail, "test@example.com")
+            mock_session.query.assert_not_called()
+            mock_session.execute.assert_called_once()
+            statement = mock_session.execute.call_args.args[0]
+            self.assertIsInstance(statement, Update)
+            params = statement.compile().params
+            self.assertEqual(params["hashed_password"], update_hash_password)
+            self.assertEqual(params["mail"], "test@example.com")
+            self.assertEqual(params["user_id_1"], 1)
 
             mock_session.commit.assert_called_once()
             mock_session.close.assert_called_once()
@@ -190,16 +187,11 @@ class TestUserDB(unittest.TestCase):
     def test_update_user_not_exist(self):
         """Test that updating a non-existent user raises error."""
         mock_session = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = None
+        mock_session.execute.return_value.rowcount = 0
 
         update_hash_password = self.hash_method.hash_password("hashed_password_example")
 
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             with self.assertRaises(DatabaseUpdateUserNotFoundError):
                 self.user_database.update(
                     user_id=999,
@@ -207,24 +199,63 @@ class TestUserDB(unittest.TestCase):
                     mail="test@example.com",
                 )
 
+            mock_session.commit.assert_not_called()
             mock_session.close.assert_called_once()
 
+    def test_update_user_invalid_hash(self):
+        """Test that updating with an unhashed password never reaches the database."""
+        mock_session = MagicMock()
+
+        with patch.object(self.user_database, "session", return_value=mock_session):
+            with self.assertRaises(InvalidHashedPassword):
+                self.user_database.update(
+                    user_id=1, hashed_paaword="plain", mail="test@example.com"
+                )
+
+            mock_session.execute.assert_not_called()
+
+    def test_validate_hash_formats(self):
+        """Test that bcrypt and Argon2 hashes pass and other strings are rejected."""
+        for hashed_password in (
+            "$2b$12$" + "a" * 53,
+            "$argon2id$v=19$m=65536,t=3,p=1$YFqUL1YOsgNip9rh4wsdPg$"
+            "0M4PoxvMqYy6dPfHcWInLMEF17AVqj+qMIKLgPt4ZTs",
+        ):
+            self.assertEqual(check_hashed_password(hashed_password), hashed_password)
+            user = UserDatabase.User(hashed_password=hashed_password)
+            self.assertEqual(user.hashed_password, hashed_password)
+        for hashed_password in ("plain", "$argon2id$v=19$m=65536$salt$hash"):
+            with self.assertRaises(InvalidHashedPassword):
+                check_hashed_password(hashed_password)
+            with self.assertRaises(InvalidHashedPassword):
+                UserDatabase.User(hashed_password=hashed_password)
+
+    def test_update_user_password_only(self):
+        """Test that updating only the password leaves mail out of the UPDATE."""
+        mock_session = MagicMock()
+        mock_session.execute.return_value.rowcount = 1
+
+        update_hash_password = self.hash_method.hash_password("hashed_password_example")
+
+        with patch.object(self.user_database, "session", return_value=mock_session):
+            self.user_database.update(user_id=1, hashed_paaword=update_hash_password)
+
+            statement = mock_session.execute.call_args.args[0]
+            params = statement.compile().params
+            self.assertEqual(params["hashed_password"], update_hash_password)
+            self.assertNotIn("mail", params)
+            mock_session.commit.assert_called_once()
+
     def test_update_user_failure(self):
         """Test that a SQLAlchemyError during commit raises DatabaseUpdateUserError."""
         mock_session = MagicMock()
-        mock_user = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_user
+        mock_session.execute.return_value.rowcount = 1
 
         mock_session.commit.side_effect = SQLAlchemyError("DB Error")
 
         update_hash_password = self.hash_method.hash_password("hashed_password_example")
 
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             with self.assertRaises(DatabaseUpdateUserError):
                 self.user_database.update(
                     user_id=1,
@@ -236,57 +267,42 @@ class TestUserDB(unittest.TestCase):
             mock_session.close.assert_called_once()
 
     def test_delete_user_success(self):
-        """Test that deleting an existing user succeeds."""
+        """Test that deleting an existing user runs a single DELETE."""
         mock_session = MagicMock()
-        mock_user = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_user
+        mock_session.execute.return_value.rowcount = 1
 
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             self.user_database.delete(user_id=1)
 
-            mock_session.query.assert_called_once_with(self.user_database.User)
-            mock_query.filter.assert_called_once()
-            mock_filter.first.assert_called_once()
+            mock_session.query.assert_not_called()
+            mock_session.execute.assert_called_once()
+            statement = mock_session.execute.call_args.args[0]
+            self.assertIsInstance(statement, Delete)
+            self.assertEqual(statement.compile().params, {"user_id_1": 1})
 
-            mock_session.delete.assert_called_once_with(mock_user)
             mock_session.commit.assert_called_once()
             mock_session.close.assert_called_once()
 
     def test_delete_user_not_exist(self):
         """Test that deleting a non-existent user raises DatabaseDeleteUserNotFoundError."""
         mock_session = MagicMock()
+        mock_session.execute.return_value.rowcount = 0
 
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = None
-
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             with self.assertRaises(DatabaseDeleteUserNotFoundError):
                 self.user_database.delete(user_id=999)
 
+            mock_session.commit.assert_not_called()
             mock_session.close.assert_called_once()
 
     def test_delete_user_failure(self):
         """Test that SQLAlchemyError during commit raises DatabaseDeleteUserError."""
         mock_session = MagicMock()
-        mock_user = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_user
+        mock_session.execute.return_value.rowcount = 1
 
         mock_session.commit.side_effect = SQLAlchemyError("DB Error")
 
-        with patch(
-            "model.user_database.UserDatabase.User", new_callable=MagicMock
-        ), patch.object(self.user_database, "session", return_value=mock_session):
+        with patch.object(self.user_database, "session", return_value=mock_session):
             with self.assertRaises(DatabaseDeleteUserError):
                 self.user_database.delete(user_id=1)
 
@@ -8,13 +8,18 @@ from controller.user_profile import (
     RegisterRequest,
     LoginRequest,
 )
+from model.hash import HashArgon2, HashBcrypt, HashDispatcher, HashEngine
 from model.user_database import UserDatabase
-from core.error import LoginWithWrongPasswordError
+from core.error import (
+    LoginWithWrongPasswordError,
+    AccessTokenRevoked,
+    RefreshTokenInvalid,
+)
 
 logging.getLogger().addHandler(logging.NullHandler())
 
 
-class TestUserProfile(unittest.TestCase):
+class TestUserProfile(unittest.IsolatedAsyncioTestCase):
     """
     Test case for user register and login.
     """
@@ -40,22 +45,22 @@ class TestUserProfile(unittest.TestCase):
         delete_user = user_database.query(self.register_data["user_name"])
         user_database.delete(delete_user.user_id)
 
-    def test_user_register(self):
+    async def test_user_register(self):
         """
         Test user register and register with duplicate information.
         """
         user_profile_handler = UsernamePasswordUserProfile()
-        content = user_profile_handler.register(self.register_data)
+        content = await user_profile_handler.register(self.register_data)
         self.assertEqual(content["message"], "User successfully registered")
         self.assertEqual(content["user_name"], self.register_data["user_name"])
 
-    def test_user_login(self):
+    async def test_user_login(self):
         """
         Test user login and store JWT in cookie.
         """
         user_profile_handler = UsernamePasswordUserProfile()
-        user_profile_handler.register(self.register_data)
-        content, token = user_profile_handler.login(self.login_data, self.ip)
+        await user_profile_handler.register(self.register_data)
+        content, token, _ = await user_profile_handler.login(self.login_data, self.ip)
 
         mock_request = Mock()
         mock_request.cookies = MagicMock(spec=dict)
@@ -70,7 +75,86 @@ class TestUserProfile(unittest.TestCase):
         self.assertEqual(user_id, retrieved_user.user_id)
 
         with self.assertRaises(LoginWithWrongPasswordError):
-            user_profile_handler.login(self.wrong_data, self.ip)
+            await user_profile_handler.login(self.wrong_data, self.ip)
+
+    async def test_rehash_on_login(self):
+        """
+        Test that a password hashed with another cost is rehashed on login.
+        """
+        user_profile_handler = UsernamePasswordUserProfile()
+        await user_profile_handler.register(self.register_data)
+        user_database = UserDatabase()
+        user = user_database.query(self.register_data["user_name"])
+        old_hash = HashBcrypt(rounds=4).hash_password(self.register_data["password"])
+        user_database.update(user.user_id, old_hash, user.mail)
+
+        await user_profile_handler.login(self.login_data, self.ip)
+
+        new_hash = user_database.query(self.register_data["user_name"]).hashed_password
+        self.assertNotEqual(new_hash, old_hash)
+        self.assertFalse(user_profile_handler.hash_handler.needs_rehash(new_hash))
+        await user_profile_handler.login(self.login_data, self.ip)
+        self.assertEqual(
+            user_database.query(self.register_data["user_name"]).hashed_password,
+            new_hash,
+        )
+
+    async def test_migrate_to_argon2_on_login(self):
+        """
+        Test that a bcrypt password moves to Argon2id on login once it is the default.
+        """
+        user_profile_handler = UsernamePasswordUserProfile()
+        await user_profile_handler.register(self.register_data)
+        user_profile_handler.hash_handler = HashEngine(
+            HashDispatcher(
+                HashArgon2(time_cost=1, memory_cost=1024, parallelism=1),
+                HashBcrypt(),
+            ),
+            pool_size=1,
+            queue_depth=4,
+        )
+        try:
+            await user_profile_handler.login(self.login_data, self.ip)
+            user_database = UserDatabase()
+            hashed_password = user_database.query(
+                self.register_data["user_name"]
+            ).hashed_password
+            self.assertTrue(hashed_password.startswith("$argon2id$"))
+
+            await user_profile_handler.login(self.login_data, self.ip)
+            with self.assertRaises(LoginWithWrongPasswordError):
+                await user_profile_handler.login(self.wrong_data, self.ip)
+        finally:
+            user_profile_handler.hash_handler.shutdown()
+
+    async def test_refresh_and_logout(self):
+        """
+        Test refresh without the password and logout of the login.
+        """
+        user_profile_handler = UsernamePasswordUserProfile()
+        await user_profile_handler.register(self.register_data)
+        _, _, refresh_token = await user_profile_handler.login(self.login_data, self.ip)
+
+        content, token, new_refresh_token = await user_profile_handler.refresh(
+            refresh_token
+        )
+        self.assertEqual(content["message"], "Token refreshed")
+        mock_request = Mock()
+        mock_request.cookies = {"access_token": token}
+        user_id = user_profile_handler.token_handler.get_current_user_from_cookie(
+            mock_request
+        )
+        retrieved_user = UserDatabase().query(self.register_data["user_name"])
+        self.assertEqual(user_id, retrieved_user.user_id)
+
+        content = await user_profile_handler.logout(token, new_refresh_token)
+        self.assertEqual(content["message"], "Logout success")
+        with self.assertRaises(AccessTokenRevoked):
+            user_profile_handler.token_handler.get_current_user_from_cookie(
+                mock_request
+            )
+        with self.assertRaises(RefreshTokenInvalid):
+            await user_profile_handler.refresh(new_refresh_token)
 
 
 if __name__ == "__main__":
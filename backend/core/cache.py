@@ -0,0 +1,175 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, TypedDict
+import threading
+import time
+
+
+class CacheStatistics(TypedDict):
+    """
+    A class to represent the usage of a cache backend.
+
+    hits : int
+        The number of lookups that found a live entry.
+    misses : int
+        The number of lookups that found no entry or an expired one.
+    evictions : int
+        The number of entries dropped to stay within max_entries.
+    size : int
+        The number of entries currently stored.
+    max_entries : int
+        The configured maximum number of entries.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_entries: int
+
+
+class CacheBackend(ABC):
+    """
+    This class define interface for a key value store used as a cache.
+
+    Implementations may live in process or in a shared service, values must be
+    treated as immutable by callers.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """
+        Return the value of key, or None when it is missing or expired.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """
+        Store value under key.
+
+        Args:
+            key (str) : The key.
+            value (Any) : The value, not None.
+            ttl (float|None) : Seconds until the entry expires, the backend default when None.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Remove key if it exists.
+        """
+
+    @abstractmethod
+    def statistics(self) -> CacheStatistics:
+        """
+        Return the hit, miss and eviction counters.
+        """
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    In process cache that keeps at most max_entries entries, evicting the least
+    recently used one, and expires entries after ttl seconds.
+    It is thread safe and also serves as the stand-in for a shared backend in tests.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def statistics(self):
+        with self._lock:
+            return CacheStatistics(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=len(self._entries),
+                max_entries=self.max_entries,
+            )
+
+
+class UserCache:
+    """
+    Cache of per user query results on top of a CacheBackend.
+
+    Every key of a user holds the data version of the user, which the database
+    bumps with every write. A write by any process makes all cached results of
+    the user unreachable at once and they age out of the backend, which works for
+    any backend without listing or deleting keys by prefix.
+
+    The price is reading the version, one primary key lookup of the
+    transaction_versions table, on every call, hit or miss. In exchange a hit
+    is never older than the last committed write of any process, so the cache
+    needs no invalidation and is safe with several workers.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self._statistics_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, user_id: int, version: int, shape: Hashable) -> str:
+        """
+        Return the backend key of a query of user_id with the given shape, at the
+        data version of the user read before the query.
+        """
+        return f"{self.namespace}:{user_id}:{version}:{shape!r}"
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached result under key, None on a miss."""
+        value = self.backend.get(key)
+        with self._statistics_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache value under key."""
+        self.backend.set(key, value)
+
+    def statistics(self) -> CacheStatistics:
+        """
+        Return the hits and misses of cached results with the evictions and size
+        of the backend.
+        """
+        statistics = self.backend.statistics()
+        with self._statistics_lock:
+            statistics["hits"] = self.hits
+            statistics["misses"] = self.misses
+        return statistics
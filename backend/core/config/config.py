@@ -3,9 +3,53 @@ import yaml
 with open("core/config/config.yaml", "r") as file:
     config = yaml.safe_load(file)
 
+# The sqlite backend is a local stand-in for MySQL when testing without docker.
+if config["database"]["BACKEND"] == "sqlite":
+    _sync_url = f"sqlite:///{config['database']['SQLITE_PATH']}"
+    _async_url = f"sqlite+aiosqlite:///{config['database']['SQLITE_PATH']}"
+else:
+    _mysql_url = f"{config['mysql_db']['MYSQL_USER']}:{config['mysql_db']['MYSQL_PASSWORD']}@{config['mysql_db']['HOST']}:{config['mysql_db']['DATABASE_PORT']}/{config['mysql_db']['USER_DB']}"
+    _sync_url = f"mysql+pymysql://{_mysql_url}"
+    _async_url = f"mysql+aiomysql://{_mysql_url}"
+
 
 class Config:
-    USER_DATABASE_URL = f"mysql+pymysql://{config['mysql_db']['MYSQL_USER']}:{config['mysql_db']['MYSQL_PASSWORD']}@{config['mysql_db']['HOST']}:{config['mysql_db']['DATABASE_PORT']}/{config['mysql_db']['USER_DB']}"
+    DATABASE_BACKEND = config["database"]["BACKEND"]
+    USER_DATABASE_URL = _sync_url
+    ASYNC_USER_DATABASE_URL = _async_url
+    DATABASE_POOL_SIZE = config["mysql_db"]["POOL_SIZE"]
+    DATABASE_MAX_OVERFLOW = config["mysql_db"]["MAX_OVERFLOW"]
+    DATABASE_POOL_RECYCLE = config["mysql_db"]["POOL_RECYCLE"]
+    DATABASE_POOL_PRE_PING = config["mysql_db"]["POOL_PRE_PING"]
+    DATABASE_POOL_TIMEOUT = config["mysql_db"]["POOL_TIMEOUT"]
     JWT_SECRET_KEY = config["JWT"]["SECRET_KEY"]
     JWT_ALGORITHM = config["JWT"]["ALGORITHM"]
     JWT_EXPIRE_MINUTES = config["JWT"]["ACCESS_TOKEN_EXPIRE_MINUTES"]
+    JWT_REFRESH_EXPIRE_DAYS = config["JWT"]["REFRESH_TOKEN_EXPIRE_DAYS"]
+    JWT_REFRESH_COOKIE_PATH = config["JWT"]["REFRESH_COOKIE_PATH"]
+    JWT_PRIVATE_KEY_PATH = config["JWT"]["PRIVATE_KEY_PATH"]
+    JWT_KEY_SET_PATH = config["JWT"]["KEY_SET_PATH"]
+    JWT_KEY_SET_RELOAD_SECONDS = config["JWT"]["KEY_SET_RELOAD_SECONDS"]
+    HASH_POOL_SIZE = config["HASH"]["POOL_SIZE"]
+    HASH_QUEUE_DEPTH = config["HASH"]["QUEUE_DEPTH"]
+    HASH_ALGORITHM = config["HASH"]["ALGORITHM"]
+    HASH_BCRYPT_ROUNDS = config["HASH"]["BCRYPT_ROUNDS"]
+    HASH_ARGON2_TIME_COST = config["HASH"]["ARGON2_TIME_COST"]
+    HASH_ARGON2_MEMORY_KIB = config["HASH"]["ARGON2_MEMORY_KIB"]
+    HASH_ARGON2_PARALLELISM = config["HASH"]["ARGON2_PARALLELISM"]
+    IMPORT_CHUNK_SIZE = config["IMPORT"]["CHUNK_SIZE"]
+    CACHE_MAX_ENTRIES = config["CACHE"]["MAX_ENTRIES"]
+    CACHE_TTL = config["CACHE"]["TTL"]
+    CACHE_PRODUCT_INDEX_ENTRIES = config["CACHE"]["PRODUCT_INDEX_ENTRIES"]
+    CACHE_ITEM_ENTRIES = config["CACHE"]["ITEM_ENTRIES"]
+    CACHE_TOKEN_ENTRIES = config["CACHE"]["TOKEN_ENTRIES"]
+    CACHE_TOKEN_TTL = config["CACHE"]["TOKEN_TTL"]
+    ARCHIVE_HORIZON_DAYS = config["ARCHIVE"]["HORIZON_DAYS"]
+    ARCHIVE_BATCH_SIZE = config["ARCHIVE"]["BATCH_SIZE"]
+    REVOCATION_SYNC_SECONDS = config["REVOCATION"]["SYNC_SECONDS"]
+    REVOCATION_BUCKET_SECONDS = config["REVOCATION"]["BUCKET_SECONDS"]
+    WRITE_BEHIND_ENABLED = config["WRITE_BEHIND"]["ENABLED"]
+    WRITE_BEHIND_MAX_BATCH = config["WRITE_BEHIND"]["MAX_BATCH"]
+    WRITE_BEHIND_MAX_DELAY_MS = config["WRITE_BEHIND"]["MAX_DELAY_MS"]
+    WRITE_BEHIND_QUEUE_DEPTH = config["WRITE_BEHIND"]["QUEUE_DEPTH"]
+    STATISTICS_LOG_SECONDS = config["STATISTICS"]["LOG_SECONDS"]
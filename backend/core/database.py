@@ -1,11 +1,177 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, TypedDict
+import threading
+import time
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, Engine, MetaData
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 from core.config.config import Config
 
 
+class PoolStatistics(TypedDict):
+    """
+    A class to represent the connection pool usage of an engine.
+
+    size : int
+        The configured number of persistent connections.
+    checked_in : int
+        The number of idle connections in the pool.
+    checked_out : int
+        The number of connections currently in use.
+    overflow : int
+        The number of connections opened beyond size.
+    checkouts : int
+        The total number of connection checkouts.
+    timeouts : int
+        The number of checkouts that gave up after the pool timeout.
+    total_checkout_time : float
+        The total seconds spent waiting for a connection.
+    max_checkout_time : float
+        The longest single wait for a connection in seconds.
+    """
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    total_checkout_time: float
+    max_checkout_time: float
+
+
+class InstrumentedPoolMixin:
+    """
+    Pool mixin that records how often and how long callers wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._statistics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_checkout_time = 0.0
+        self.max_checkout_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._statistics_lock:
+                self.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._statistics_lock:
+            self.checkouts += 1
+            self.total_checkout_time += elapsed
+            self.max_checkout_time = max(self.max_checkout_time, elapsed)
+        return connection
+
+    def statistics(self) -> PoolStatistics:
+        """
+        Return the current pool usage.
+        """
+        with self._statistics_lock:
+            return PoolStatistics(
+                size=self.size(),
+                checked_in=self.checkedin(),
+                checked_out=self.checkedout(),
+                overflow=self.overflow(),
+                checkouts=self.checkouts,
+                timeouts=self.timeouts,
+                total_checkout_time=self.total_checkout_time,
+                max_checkout_time=self.max_checkout_time,
+            )
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout statistics, used by sync engines."""
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout statistics, used by async engines."""
+
+
+_engines: dict[str, Engine] = {}
+_async_engines: dict[str, AsyncEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def _pool_options() -> dict:
+    """
+    Return the connection pool options from Config.
+    """
+    return {
+        "pool_size": Config.DATABASE_POOL_SIZE,
+        "max_overflow": Config.DATABASE_MAX_OVERFLOW,
+        "pool_recycle": Config.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": Config.DATABASE_POOL_PRE_PING,
+        "pool_timeout": Config.DATABASE_POOL_TIMEOUT,
+    }
+
+
+def get_engine(url: str) -> Engine:
+    """
+    Return the process-wide engine for url, creating it on first use,
+    so that every DataBase instance shares one connection pool per database.
+
+    Args:
+        url (str): The database URL.
+
+    Returns:
+        Engine: The shared engine.
+    """
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+    with _engines_lock:
+        if url not in _engines:
+            _engines[url] = create_engine(
+                url, poolclass=InstrumentedQueuePool, **_pool_options()
+            )
+        return _engines[url]
+
+
+def get_async_engine(url: str) -> AsyncEngine:
+    """
+    Return the process-wide async engine for url, creating it on first use.
+
+    Args:
+        url (str): The database URL with an async driver (aiomysql, aiosqlite).
+
+    Returns:
+        AsyncEngine: The shared async engine.
+    """
+    engine = _async_engines.get(url)
+    if engine is not None:
+        return engine
+    with _engines_lock:
+        if url not in _async_engines:
+            _async_engines[url] = create_async_engine(
+                url, poolclass=InstrumentedAsyncQueuePool, **_pool_options()
+            )
+        return _async_engines[url]
+
+
+def pool_statistics() -> dict[str, PoolStatistics]:
+    """
+    Return the pool usage of every registered engine.
+
+    Returns:
+        dict[str, PoolStatistics]: The statistics keyed by the engine URL
+        with the password hidden.
+    """
+    engines = list(_engines.values()) + list(_async_engines.values())
+    return {
+        engine.url.render_as_string(hide_password=True): engine.pool.statistics()
+        for engine in engines
+    }
+
+
 class DataBase(ABC):
     """
     This class define interface for interacting with a
@@ -23,8 +189,12 @@ class DataBase(ABC):
         return cls._instance
 
     def __init__(self):
-        engine = create_engine(Config.USER_DATABASE_URL)
-        self.session = sessionmaker(bind=engine)
+        self.engine = get_engine(Config.USER_DATABASE_URL)
+        self.session = sessionmaker(bind=self.engine)
+
+    def pool_statistics(self) -> PoolStatistics:
+        """Return the usage of the shared connection pool."""
+        return self.engine.pool.statistics()
 
     @abstractmethod
     def create(self, *args, **kwargs):
@@ -41,3 +211,53 @@ class DataBase(ABC):
     @abstractmethod
     def delete(self, *args, **kwargs):
         """Delete data."""
+
+
+class AsyncDataBase(ABC):
+    """
+    This class define interface for interacting with a
+    database system from asyncio code.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        """
+        Each database instance should be implemented as a singleton to prevent excessive connection usage.
+        """
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        self.engine = get_async_engine(Config.ASYNC_USER_DATABASE_URL)
+        self.session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def pool_statistics(self) -> PoolStatistics:
+        """Return the usage of the shared connection pool."""
+        return self.engine.pool.statistics()
+
+    async def create_tables(self, *metadata: MetaData) -> None:
+        """
+        Create the tables of the given models if they do not exist.
+        MySQL tables come from mysql/init.sql, this is for the sqlite stand-in.
+        """
+        async with self.engine.begin() as connection:
+            for table_metadata in metadata:
+                await connection.run_sync(table_metadata.create_all)
+
+    @abstractmethod
+    async def create(self, *args, **kwargs):
+        """Create new data."""
+
+    @abstractmethod
+    async def query(self, *args, **kwargs) -> Any:
+        """Query data."""
+
+    @abstractmethod
+    async def update(self, *args, **kwargs):
+        """Update data."""
+
+    @abstractmethod
+    async def delete(self, *args, **kwargs):
+        """Delete data."""
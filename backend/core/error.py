@@ -117,6 +117,42 @@ class DatabaseDeleteTransactionError(BaseAPIException):
     error_code = 5009
 
 
+class HashEngineOverloadedError(BaseAPIException):
+    """Raised when the hash engine queue is full."""
+
+    error_name = "HashEngineOverloadedError"
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Too many password hashing requests, please retry later"
+    error_code = 5010
+
+
+class DatabaseBatchTransactionError(BaseAPIException):
+    """Raised when the transaction batch error."""
+
+    error_name = "DatabaseBatchTransactionError"
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    detail = "Failed to apply transaction batch"
+    error_code = 5011
+
+
+class TransactionWriterOverloadedError(BaseAPIException):
+    """Raised when the write-behind queue of transaction creates is full."""
+
+    error_name = "TransactionWriterOverloadedError"
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    detail = "Too many transaction creates, please retry later"
+    error_code = 5012
+
+
+class DatabaseRevokeTokenError(BaseAPIException):
+    """Raised when a token revocation could not be stored."""
+
+    error_name = "DatabaseRevokeTokenError"
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    detail = "Failed to revoke token"
+    error_code = 5013
+
+
 # User error 4XX
 class UsernameAlreadyExistsError(BaseAPIException):
     """Raised when the create user name exist."""
@@ -226,6 +262,87 @@ class AccessTokenInvalid(BaseAPIException):
     error_code = 4012
 
 
+class InvalidTransactionCursorError(BaseAPIException):
+    """Raised when the pagination cursor cannot be decoded."""
+
+    error_name = "InvalidTransactionCursorError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Invalid transaction cursor"
+    error_code = 4013
+
+
+class InvalidSummaryGroupError(BaseAPIException):
+    """Raised when a summary is grouped by more than one period."""
+
+    error_name = "InvalidSummaryGroupError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Summary can be grouped by at most one of day, week or month"
+    error_code = 4014
+
+
+class InvalidTransactionBatchError(BaseAPIException):
+    """Raised when a transaction batch is too large or an operation lacks its fields."""
+
+    error_name = "InvalidTransactionBatchError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Invalid transaction batch"
+    error_code = 4015
+
+
+class InvalidTransactionImportError(BaseAPIException):
+    """Raised when an imported file is not a UTF-8 CSV file."""
+
+    error_name = "InvalidTransactionImportError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Import file must be a UTF-8 encoded CSV file"
+    error_code = 4016
+
+
+class InvalidTransactionPatchError(BaseAPIException):
+    """Raised when a transaction patch does not contain any column to update."""
+
+    error_name = "InvalidTransactionPatchError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Transaction patch must update at least one column"
+    error_code = 4017
+
+
+class InvalidTransactionFilterError(BaseAPIException):
+    """Raised when a transaction filter has an unknown sort key or an empty range."""
+
+    error_name = "InvalidTransactionFilterError"
+    status_code = status.HTTP_400_BAD_REQUEST
+    detail = "Invalid transaction filter"
+    error_code = 4018
+
+
+class AccessTokenRevoked(BaseAPIException):
+    """Exception raised when the access token was revoked before it expired."""
+
+    error_name = "AccessTokenRevoked"
+    status_code = status.HTTP_401_UNAUTHORIZED
+    detail = "Access token has been revoked"
+    error_code = 4019
+
+
+class RefreshTokenNotFound(BaseAPIException):
+    """Exception raised when the refresh token is missing from the request."""
+
+    error_name = "RefreshTokenNotFound"
+    status_code = status.HTTP_404_NOT_FOUND
+    detail = "Refresh token not found from the request"
+    error_code = 4020
+
+
+class RefreshTokenInvalid(BaseAPIException):
+    """Exception raised when the refresh token is expired, revoked or reused."""
+
+    error_name = "RefreshTokenInvalid"
+    status_code = status.HTTP_401_UNAUTHORIZED
+    detail = "Refresh token is invalid"
+    error_code = 4021
+
+
 class ErrorResponse(TypedDict):
     """error response for api"""
 
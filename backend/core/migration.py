@@ -0,0 +1,551 @@
+from abc import ABC, abstractmethod
+import argparse
+import logging
+import sys
+from datetime import datetime
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects import mysql
+from sqlalchemy.sql import ColumnElement, Select
+
+from core.config.config import Config
+from core.database import get_engine
+
+# Schema snapshots used by the migrations. They are kept here instead of
+# importing the service models, so core does not depend on either service.
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=True),
+    Column("user_name", String(255), unique=True, nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("mail", String(255), unique=True, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+transactions = Table(
+    "transactions",
+    metadata,
+    Column("transaction_id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", Integer, nullable=False),
+    Column("category", String(100)),
+    # Replaced by item_id in NormalizeProductNames.
+    Column("product_name", String(255)),
+    Column("item_id", Integer),
+    Column("quantity", Integer, nullable=False, default=1),
+    Column("total_cost", Float, nullable=False),
+    Column("pay_by", String(255), nullable=False, default="cash"),
+    Column("date", DateTime, nullable=False),
+)
+
+items = Table(
+    "items",
+    metadata,
+    Column("item_id", Integer, primary_key=True, autoincrement=True),
+    # Binary collation on MySQL, names differing only in case are different items.
+    Column(
+        "product_name",
+        String(255).with_variant(
+            mysql.VARCHAR(255, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"
+        ),
+        unique=True,
+        nullable=False,
+    ),
+)
+
+transactions_archive = Table(
+    "transactions_archive",
+    metadata,
+    Column("transaction_id", Integer, primary_key=True, autoincrement=False),
+    Column("user_id", Integer, nullable=False),
+    Column("category", String(100)),
+    Column("item_id", Integer, nullable=False),
+    Column("quantity", Integer, nullable=False, default=1),
+    Column("total_cost", Float, nullable=False),
+    Column("pay_by", String(255), nullable=False, default="cash"),
+    Column("date", DateTime, nullable=False),
+    Index("ix_transactions_archive_user_date", "user_id", "date"),
+    Index("ix_transactions_archive_user_item", "user_id", "item_id"),
+)
+
+monthly_spending = Table(
+    "monthly_spending",
+    metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=False),
+    Column("month", String(7), primary_key=True),
+    Column("category", String(100), primary_key=True),
+    Column("pay_by", String(255), primary_key=True),
+    Column("total_cost", Float, nullable=False, default=0),
+    Column("count", Integer, nullable=False, default=0),
+)
+
+transaction_versions = Table(
+    "transaction_versions",
+    metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=False),
+    Column("version", Integer, nullable=False, default=0),
+)
+
+revoked_tokens = Table(
+    "revoked_tokens",
+    metadata,
+    Column("token_id", String(64), primary_key=True),
+    Column("kind", String(16), nullable=False, default="revoked"),
+    Column("expires_at", DateTime, nullable=False),
+    Column("revoked_at", DateTime, nullable=False, server_default=func.now()),
+    Index("ix_revoked_tokens_expires_at", "expires_at"),
+    Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def create_index(connection: Connection, index: Index) -> None:
+    """
+    Create index unless a index with the same name already exists.
+    On MySQL the index is built online, without blocking writes to the table.
+
+    Args:
+        connection (Connection) : The connection used to run the DDL.
+        index (Index) : The index to create.
+    """
+    table = index.table
+    existing = {item["name"] for item in inspect(connection).get_indexes(table.name)}
+    if index.name in existing:
+        logging.info("Index %s already exists, skip", index.name)
+        return
+    if connection.dialect.name == "mysql":
+        columns = ", ".join(f"`{column.name}`" for column in index.columns)
+        connection.exec_driver_sql(
+            f"ALTER TABLE `{table.name}` ADD INDEX `{index.name}` ({columns}), "
+            "ALGORITHM=INPLACE, LOCK=NONE"
+        )
+    else:
+        index.create(connection)
+
+
+class Migration(ABC):
+    """
+    This class define interface for a versioned schema change.
+
+    Every upgrade must be safe to run again on a schema that already has the change,
+    because MySQL commits DDL immediately and a migration can be interrupted before
+    its version is recorded.
+
+    Attributes:
+        version (int): The unique, increasing version of the migration.
+        description (str): A short description of the change.
+    """
+
+    version: int
+    description: str
+
+    @abstractmethod
+    def upgrade(self, connection: Connection) -> None:
+        """
+        Apply the schema change.
+
+        Args:
+            connection (Connection) : The connection used to run the DDL.
+        """
+
+
+class CreateBaseTables(Migration):
+    """Create the users and transactions tables of mysql/init.sql."""
+
+    version = 1
+    description = "create users and transactions tables"
+
+    def upgrade(self, connection):
+        users.create(connection, checkfirst=True)
+        transactions.create(connection, checkfirst=True)
+
+
+class AddTransactionIndexes(Migration):
+    """Add the composite indexes used by the transaction listing queries."""
+
+    version = 2
+    description = "add composite indexes to transactions"
+    indexes = [
+        Index("ix_transactions_user_date", transactions.c.user_id, transactions.c.date),
+        Index(
+            "ix_transactions_user_category_date",
+            transactions.c.user_id,
+            transactions.c.category,
+            transactions.c.date,
+        ),
+        Index(
+            "ix_transactions_user_pay_by_date",
+            transactions.c.user_id,
+            transactions.c.pay_by,
+            transactions.c.date,
+        ),
+    ]
+
+    def upgrade(self, connection):
+        for index in self.indexes:
+            create_index(connection, index)
+
+
+class CreateMonthlySpending(Migration):
+    """
+    Create the monthly_spending rollup and backfill it from the transactions.
+    The rollup can be recomputed later with `python -m rollup rebuild` in expense-service.
+    """
+
+    version = 3
+    description = "create and backfill monthly_spending rollup"
+
+    def upgrade(self, connection):
+        if inspect(connection).has_table(monthly_spending.name):
+            return
+        monthly_spending.create(connection)
+        if connection.dialect.name == "mysql":
+            month = func.date_format(transactions.c.date, "%Y-%m")
+        else:
+            month = func.strftime("%Y-%m", transactions.c.date)
+        groups = [
+            transactions.c.user_id,
+            month.label("month"),
+            func.coalesce(transactions.c.category, "").label("category"),
+            transactions.c.pay_by,
+        ]
+        connection.execute(
+            insert(monthly_spending).from_select(
+                ["user_id", "month", "category", "pay_by", "total_cost", "count"],
+                select(
+                    *groups,
+                    func.sum(transactions.c.total_cost),
+                    func.count(),
+                ).group_by(*groups),
+            )
+        )
+
+
+class CreateTransactionVersions(Migration):
+    """
+    Create the per user data version behind the ETag of GET /transaction.
+    A user without a row is at version 0, so nothing needs to be backfilled.
+    """
+
+    version = 4
+    description = "create transaction_versions"
+
+    def upgrade(self, connection):
+        transaction_versions.create(connection, checkfirst=True)
+
+
+class AddProductNameIndex(Migration):
+    """Add the index the product name autocomplete counts names from."""
+
+    version = 5
+    description = "add product name index to transactions"
+    index = Index(
+        "ix_transactions_user_product_name",
+        transactions.c.user_id,
+        transactions.c.product_name,
+    )
+
+    def upgrade(self, connection):
+        columns = {
+            column["name"] for column in inspect(connection).get_columns("transactions")
+        }
+        if "product_name" not in columns:
+            # Already normalized by NormalizeProductNames, nothing to index.
+            return
+        create_index(connection, self.index)
+
+
+def binary(connection: Connection, column: ColumnElement) -> ColumnElement:
+    """
+    Return column compared byte by byte, the default MySQL collation ignores case.
+    """
+    if connection.dialect.name == "mysql":
+        return column.collate("utf8mb4_bin")
+    return column
+
+
+class NormalizeProductNames(Migration):
+    """
+    Move the product names of the transactions to the items dictionary table
+    and replace them with item_id.
+
+    Every step checks the schema first, so an interrupted run can be resumed.
+    """
+
+    version = 6
+    description = "move transactions.product_name to items"
+    index = Index(
+        "ix_transactions_user_item", transactions.c.user_id, transactions.c.item_id
+    )
+
+    def upgrade(self, connection):
+        items.create(connection, checkfirst=True)
+        columns = {
+            column["name"] for column in inspect(connection).get_columns("transactions")
+        }
+        if "item_id" not in columns:
+            connection.exec_driver_sql(
+                "ALTER TABLE transactions ADD COLUMN item_id INTEGER"
+            )
+        if "product_name" in columns:
+            product_name = binary(connection, transactions.c.product_name)
+            connection.execute(
+                insert(items).from_select(
+                    ["product_name"],
+                    select(product_name)
+                    .distinct()
+                    .where(
+                        ~select(items.c.item_id)
+                        .where(items.c.product_name == product_name)
+                        .exists()
+                    ),
+                )
+            )
+            connection.execute(
+                update(transactions)
+                .where(transactions.c.item_id.is_(None))
+                .values(
+                    item_id=select(items.c.item_id)
+                    .where(items.c.product_name == product_name)
+                    .scalar_subquery()
+                )
+            )
+        create_index(connection, self.index)
+        if "product_name" in columns:
+            indexes = {
+                index["name"]
+                for index in inspect(connection).get_indexes("transactions")
+            }
+            if AddProductNameIndex.index.name in indexes:
+                AddProductNameIndex.index.drop(connection)
+            connection.exec_driver_sql(
+                "ALTER TABLE transactions DROP COLUMN product_name"
+            )
+            if connection.dialect.name == "mysql":
+                connection.exec_driver_sql(
+                    "ALTER TABLE transactions MODIFY item_id INT NOT NULL"
+                )
+
+
+class CreateTransactionArchive(Migration):
+    """
+    Create the cold table the archive job moves old transactions to.
+    It starts empty, `python -m archive` in expense-service fills it.
+    """
+
+    version = 7
+    description = "create transactions_archive"
+
+    def upgrade(self, connection):
+        transactions_archive.create(connection, checkfirst=True)
+
+
+class CreateRevokedTokens(Migration):
+    """
+    Create the table of revoked token and token family ids, the shared record
+    behind the in-memory revocation store of both services.
+    """
+
+    version = 8
+    description = "create revoked_tokens"
+
+    def upgrade(self, connection):
+        revoked_tokens.create(connection, checkfirst=True)
+
+
+MIGRATIONS: list[Migration] = [
+    CreateBaseTables(),
+    AddTransactionIndexes(),
+    CreateMonthlySpending(),
+    CreateTransactionVersions(),
+    AddProductNameIndex(),
+    NormalizeProductNames(),
+    CreateTransactionArchive(),
+    CreateRevokedTokens(),
+]
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    """
+    Return the versions already applied to the database of engine.
+    """
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def migrate(engine: Engine, migrations: list[Migration] = MIGRATIONS) -> list[int]:
+    """
+    Apply every migration that has not been applied yet, in version order.
+
+    Args:
+        engine (Engine) : The engine of the database to migrate.
+        migrations (list[Migration]) : The migrations to apply.
+
+    Returns:
+        list[int]: The versions applied by this call.
+    """
+    done = applied_versions(engine)
+    applied = []
+    for migration in sorted(migrations, key=lambda item: item.version):
+        if migration.version in done:
+            continue
+        logging.info("Apply migration %d: %s", migration.version, migration.description)
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                insert(schema_migrations).values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.now(),
+                )
+            )
+        applied.append(migration.version)
+    return applied
+
+
+# The columns of transactions after NormalizeProductNames.
+listed_columns = [column for column in transactions.c if column.name != "product_name"]
+
+# The hot queries of the services and the index each of them should use.
+HOT_QUERIES: dict[str, tuple[Select, str]] = {
+    "list user transactions": (
+        select(*listed_columns)
+        .where(transactions.c.user_id == 1)
+        .order_by(transactions.c.date.desc(), transactions.c.transaction_id.desc())
+        .limit(100),
+        "ix_transactions_user_date",
+    ),
+    "list user transactions by category": (
+        select(*listed_columns)
+        .where(transactions.c.user_id == 1, transactions.c.category == "food")
+        .order_by(transactions.c.date.desc())
+        .limit(100),
+        "ix_transactions_user_category_date",
+    ),
+    "list user transactions in a date range": (
+        select(*listed_columns)
+        .where(
+            transactions.c.user_id == 1,
+            transactions.c.date >= datetime(2025, 1, 1),
+            transactions.c.date < datetime(2025, 2, 1),
+            transactions.c.total_cost >= 100,
+        )
+        .order_by(transactions.c.date.desc())
+        .limit(100),
+        "ix_transactions_user_date",
+    ),
+    "count user items": (
+        select(transactions.c.item_id, func.count())
+        .where(transactions.c.user_id == 1)
+        .group_by(transactions.c.item_id),
+        "ix_transactions_user_item",
+    ),
+    "list user transactions by pay_by": (
+        select(*listed_columns)
+        .where(transactions.c.user_id == 1, transactions.c.pay_by == "cash")
+        .order_by(transactions.c.date.desc())
+        .limit(100),
+        "ix_transactions_user_pay_by_date",
+    ),
+    "find latest archived user transaction": (
+        select(func.max(transactions_archive.c.date)).where(
+            transactions_archive.c.user_id == 1
+        ),
+        "ix_transactions_archive_user_date",
+    ),
+    "sync revoked tokens": (
+        select(revoked_tokens.c.token_id, revoked_tokens.c.expires_at).where(
+            revoked_tokens.c.revoked_at >= datetime(2025, 1, 1)
+        ),
+        "ix_revoked_tokens_revoked_at",
+    ),
+}
+
+
+def explain(connection: Connection, statement: Select) -> list[str]:
+    """
+    Return the query plan of statement, one line per plan step.
+
+    Args:
+        connection (Connection) : The connection used to run EXPLAIN.
+        statement (Select) : The query to explain.
+
+    Returns:
+        list[str]: The plan lines. On sqlite they are the EXPLAIN QUERY PLAN details,
+        on MySQL they contain the table, the chosen key and the extra column.
+    """
+    sql = str(
+        statement.compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").mappings()
+        return [row["detail"] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings()
+    return [
+        f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}"
+        for row in rows
+    ]
+
+
+def verify_indexes(engine: Engine) -> dict[str, bool]:
+    """
+    Check with EXPLAIN that every hot query uses its index.
+
+    Returns:
+        dict[str, bool]: Whether each hot query uses its index, keyed by query name.
+    """
+    result = {}
+    with engine.connect() as connection:
+        for name, (statement, index_name) in HOT_QUERIES.items():
+            plan = explain(connection, statement)
+            result[name] = any(index_name in line for line in plan)
+            logging.info("%s: %s", name, " | ".join(plan))
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Manage the database schema.")
+    parser.add_argument("command", choices=["upgrade", "status", "verify"])
+    args = parser.parse_args()
+    engine = get_engine(Config.USER_DATABASE_URL)
+
+    if args.command == "upgrade":
+        logging.info("Applied versions: %s", migrate(engine) or "none")
+    elif args.command == "status":
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in done else "pending"
+            logging.info("%d %s: %s", migration.version, state, migration.description)
+    else:
+        verified = verify_indexes(engine)
+        for name, uses_index in verified.items():
+            logging.info("%s: %s", name, "ok" if uses_index else "NOT USING INDEX")
+        sys.exit(0 if all(verified.values()) else 1)
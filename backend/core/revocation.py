@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta
+import heapq
+import logging
+import math
+import threading
+import time
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Engine,
+    Index,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from core.config.config import Config
+from core.database import get_engine
+from core.error import DatabaseRevokeTokenError
+
+revoked_tokens = Table(
+    "revoked_tokens",
+    MetaData(),
+    Column("token_id", String(64), primary_key=True),
+    # "revoked" ids are loaded by every process, "used" ids are only claimed.
+    Column("kind", String(16), nullable=False, default="revoked"),
+    Column("expires_at", DateTime, nullable=False),
+    # Set by the database, so every process compares times of the same clock.
+    Column("revoked_at", DateTime, nullable=False, server_default=func.now()),
+    Index("ix_revoked_tokens_expires_at", "expires_at"),
+    Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+)
+
+# Revocations committed out of order by concurrent writers are read again for this
+# long after a sync saw a later one.
+SYNC_OVERLAP = timedelta(seconds=10)
+
+
+class RevocationStore:
+    """
+    The ids of revoked tokens, kept in memory and persisted to revoked_tokens.
+
+    A revoked id is remembered until the tokens carrying it expire. Lookups are one
+    set membership test. Every id is also filed in the expiry bucket of
+    bucket_seconds it falls in, and buckets are dropped whole once they have
+    passed, so pruning never scans the live ids.
+
+    The table is the shared record across processes: its primary key makes
+    revoke and use atomic, and every sync_interval seconds a lookup first loads the rows
+    revoked since the previous sync, so a revocation by auth-service reaches
+    expense-service within that interval.
+
+    Attributes:
+        engine (Engine): The engine of the database holding revoked_tokens.
+        sync_interval (float): The seconds between two loads of new revocations.
+        bucket_seconds (float): The width of an expiry bucket in seconds.
+    """
+
+    def __init__(self, engine: Engine, sync_interval: float, bucket_seconds: float):
+        self.engine = engine
+        self.sync_interval = sync_interval
+        self.bucket_seconds = bucket_seconds
+        self._revoked: set[str] = set()
+        self._buckets: dict[int, list[str]] = {}
+        self._bucket_heap: list[int] = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_at = float("-inf")
+        self._purged_at = float("-inf")
+        self._high_water: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _remember(self, token_id: str, expires_at: float) -> None:
+        """
+        Add token_id to the set and to its expiry bucket, the lock must be held.
+        """
+        if token_id in self._revoked or expires_at <= time.time():
+            return
+        bucket = math.ceil(expires_at / self.bucket_seconds)
+        if bucket not in self._buckets:
+            self._buckets[bucket] = []
+            heapq.heappush(self._bucket_heap, bucket)
+        self._buckets[bucket].append(token_id)
+        self._revoked.add(token_id)
+
+    def _prune(self, now: float) -> None:
+        """
+        Forget the ids of every bucket that has passed, the lock must be held.
+        """
+        while self._bucket_heap and self._bucket_heap[0] * self.bucket_seconds <= now:
+            for token_id in self._buckets.pop(heapq.heappop(self._bucket_heap)):
+                self._revoked.discard(token_id)
+
+    def _insert(self, token_id: str, expires_at: float, kind: str) -> bool:
+        """
+        Store token_id, return False if it is already stored.
+        """
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    insert(revoked_tokens).values(
+                        token_id=token_id,
+                        kind=kind,
+                        expires_at=datetime.fromtimestamp(expires_at),
+                    )
+                )
+        except IntegrityError:
+            return False
+        except SQLAlchemyError as e:
+            logging.error("Error occurred while revoking token: %s", e)
+            raise DatabaseRevokeTokenError from e
+        return True
+
+    def revoke(self, token_id: str, expires_at: float) -> bool:
+        """
+        Revoke token_id until expires_at, in this process at once and in the
+        others at their next sync.
+
+        Args:
+            token_id (str): The jti of a token or the id of a token family.
+            expires_at (float): The timestamp after which no token carrying
+                token_id is valid anymore.
+
+        Returns:
+            bool: False if token_id was already revoked, by this process or another.
+
+        Raises:
+            DatabaseRevokeTokenError: If the revocation could not be stored.
+        """
+        revoked = self._insert(token_id, expires_at, "revoked")
+        with self._lock:
+            self._remember(token_id, expires_at)
+        return revoked
+
+    def use(self, token_id: str, expires_at: float) -> bool:
+        """
+        Mark the single use token token_id as used until expires_at. The primary
+        key decides which of concurrent uses wins, so used ids are not loaded in
+        memory, which keeps the store as small as the number of revocations.
+
+        Args:
+            token_id (str): The jti of a refresh token.
+            expires_at (float): The timestamp when the token expires.
+
+        Returns:
+            bool: False if token_id was already used.
+
+        Raises:
+            DatabaseRevokeTokenError: If the use could not be stored.
+        """
+        return self._insert(token_id, expires_at, "used")
+
+    def is_revoked(self, token_id: str) -> bool:
+        """
+        Return True if token_id is revoked, loading new revocations when due.
+        """
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+        return token_id in self._revoked
+
+    def revoked(self, payload: dict) -> bool:
+        """
+        Revocation hook of the token cache, True if the jti or the family of the
+        token payload is revoked.
+        """
+        return any(
+            self.is_revoked(payload[claim])
+            for claim in ("jti", "fam")
+            if claim in payload
+        )
+
+    def sync(self) -> None:
+        """
+        Load the revocations stored since the last sync, all live ones the first
+        time, and prune the expired ones. A failed sync keeps what is loaded.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            # Another thread is syncing, use the ids loaded so far.
+            return
+        try:
+            self._synced_at = time.monotonic()
+            now = time.time()
+            statement = select(
+                revoked_tokens.c.token_id,
+                revoked_tokens.c.expires_at,
+                revoked_tokens.c.revoked_at,
+            ).where(revoked_tokens.c.kind == "revoked")
+            if self._high_water is None:
+                # Nothing seen yet, load every live revocation.
+                statement = statement.where(
+                    revoked_tokens.c.expires_at > datetime.fromtimestamp(now)
+                )
+            else:
+                statement = statement.where(
+                    revoked_tokens.c.revoked_at >= self._high_water - SYNC_OVERLAP
+                )
+            with self.engine.connect() as connection:
+                rows = connection.execute(statement).all()
+            with self._lock:
+                for row in rows:
+                    self._remember(row.token_id, row.expires_at.timestamp())
+                self._prune(now)
+            if rows:
+                latest = max(row.revoked_at for row in rows)
+                if self._high_water is None or latest > self._high_water:
+                    self._high_water = latest
+            if time.monotonic() - self._purged_at >= self.bucket_seconds:
+                self.purge()
+        except SQLAlchemyError as e:
+            logging.error("Keep the loaded revocations, sync failed: %s", e)
+        finally:
+            self._sync_lock.release()
+
+    def purge(self) -> int:
+        """
+        Delete the expired revocations from the table.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        self._purged_at = time.monotonic()
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                delete(revoked_tokens).where(
+                    revoked_tokens.c.expires_at <= datetime.now()
+                )
+            )
+        return result.rowcount
+
+
+_revocation_store: RevocationStore | None = None
+
+
+def get_revocation_store() -> RevocationStore:
+    """
+    Return the process-wide revocation store, created from Config on first use.
+
+    Returns:
+        RevocationStore: The shared revocation store.
+    """
+    global _revocation_store
+    if _revocation_store is None:
+        _revocation_store = RevocationStore(
+            get_engine(Config.USER_DATABASE_URL),
+            Config.REVOCATION_SYNC_SECONDS,
+            Config.REVOCATION_BUCKET_SECONDS,
+        )
+    return _revocation_store
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+from typing import Any, Callable, Mapping
+
+
+async def log_statistics(
+    interval: float, sources: Mapping[str, Callable[[], Any]]
+) -> None:
+    """
+    Log the statistics of every source at INFO level every interval seconds
+    until cancelled, run it as a task for the lifetime of a service.
+
+    Args:
+        interval (float) : The seconds between two logs, 0 or less logs nothing.
+        sources (Mapping) : The name of every statistics function, such as
+            core.database.pool_statistics.
+    """
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        for name, statistics in sources.items():
+            logging.info("%s statistics: %s", name, statistics())
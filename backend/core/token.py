@@ -1,16 +1,30 @@
 from abc import ABC, abstractmethod
+from typing import Callable
+import base64
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
 import jwt
+from cryptography.hazmat.primitives import serialization
 from jwt import ExpiredSignatureError, InvalidTokenError
 from datetime import datetime, timedelta
 from fastapi import Request
 
+from core.cache import CacheBackend, CacheStatistics, LRUCacheBackend
 from core.config.config import Config
 from core.error import (
     AccessTokenNotFound,
     AccessTokenUserIDNotFound,
     AccessTokenExpired,
     AccessTokenInvalid,
+    AccessTokenRevoked,
+    RefreshTokenInvalid,
 )
+from core.revocation import RevocationStore, get_revocation_store
 
 
 class TokenStrategy(ABC):
@@ -39,21 +53,175 @@ class TokenStrategy(ABC):
         """
 
 
+# Algorithms signed with a private key and verified from the key set, any other
+# algorithm is an HMAC shared through Config.JWT_SECRET_KEY.
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "ES256")
+
+# The JWK members hashed into a key's RFC 7638 thumbprint, per key type.
+THUMBPRINT_MEMBERS = {"OKP": ("crv", "kty", "x"), "EC": ("crv", "kty", "x", "y")}
+
+
+def public_jwk(private_key, algorithm: str) -> dict:
+    """
+    Return the public JWK of a private key, with its RFC 7638 thumbprint as kid.
+
+    Args:
+        private_key: An Ed25519 or P-256 private key object.
+        algorithm (str): The signing algorithm, one of ASYMMETRIC_ALGORITHMS.
+
+    Returns:
+        dict: The public JWK.
+    """
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(
+        private_key.public_key(), as_dict=True
+    )
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(
+        json.dumps(members, sort_keys=True, separators=(",", ":")).encode()
+    ).digest()
+    kid = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+    return dict(jwk, kid=kid, alg=algorithm, use="sig")
+
+
+class KeySet:
+    """
+    The public keys of a JWKS file, parsed once into key objects cached per kid.
+
+    The file is reloaded when its modification time changes, which is checked at
+    most every reload_interval seconds, and at once for an unknown kid so a key
+    published by a rotation is found by the first token signed with it.
+    Writers must replace the file atomically, an unreadable file keeps the keys
+    loaded before it.
+
+    Attributes:
+        path (str): The path of the JWKS file.
+        reload_interval (float): The seconds between modification time checks.
+    """
+
+    def __init__(self, path: str, reload_interval: float):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._mtime: int | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self, kid: str) -> jwt.PyJWK | None:
+        """
+        Return the parsed key of kid, None if the key set does not have it.
+        """
+        if (
+            kid not in self._keys
+            or time.monotonic() - self._checked_at >= self.reload_interval
+        ):
+            self.reload()
+        return self._keys.get(kid)
+
+    def reload(self) -> None:
+        """
+        Parse the file again if it changed since it was last loaded.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            if mtime is None:
+                self._keys = {}
+                return
+            try:
+                with open(self.path, "r") as file:
+                    jwks = json.load(file)
+            except (OSError, ValueError):
+                logging.exception("Keep the loaded keys, %s is unreadable", self.path)
+                return
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                try:
+                    key = jwt.PyJWK(jwk)
+                except jwt.PyJWTError:
+                    logging.warning("Skip unusable key %s", jwk.get("kid"))
+                    continue
+                if (
+                    key.key_id is None
+                    or key.algorithm_name not in ASYMMETRIC_ALGORITHMS
+                ):
+                    logging.warning("Skip key %s without kid or alg", key.key_id)
+                    continue
+                keys[key.key_id] = key
+            self._keys = keys
+
+    def kids(self) -> list[str]:
+        """Return the kids of the loaded keys."""
+        return list(self._keys)
+
+
+_key_set: KeySet | None = None
+
+
+def get_key_set() -> KeySet:
+    """
+    Return the process-wide key set, loaded from Config.JWT_KEY_SET_PATH.
+
+    Returns:
+        KeySet: The shared key set.
+    """
+    global _key_set
+    if _key_set is None:
+        _key_set = KeySet(Config.JWT_KEY_SET_PATH, Config.JWT_KEY_SET_RELOAD_SECONDS)
+    return _key_set
+
+
 class JWTToken(TokenStrategy):
-    """JWT-based implementation of the TokenStrategy interface."""
+    """
+    JWT-based implementation of the TokenStrategy interface.
+
+    With an HMAC Config.JWT_ALGORITHM, tokens are signed and verified with
+    Config.JWT_SECRET_KEY. With one of ASYMMETRIC_ALGORITHMS, tokens are signed with
+    the private key at Config.JWT_PRIVATE_KEY_PATH under its kid, and verified with
+    the public key of their kid in the key set, so verifiers hold no secret.
+    """
+
+    def __init__(self):
+        self._signing_key = None
+        self._signing_kid = None
+
+    def _load_signing_key(self) -> None:
+        """
+        Parse the private key once, its kid is the thumbprint of its public key.
+        """
+        with open(Config.JWT_PRIVATE_KEY_PATH, "rb") as file:
+            self._signing_key = serialization.load_pem_private_key(
+                file.read(), password=None
+            )
+        self._signing_kid = public_jwk(self._signing_key, Config.JWT_ALGORITHM)["kid"]
 
     def encode(self, data):
         """
-        Encodes a dictionary into a JWT token with an expiration time.
+        Encodes a dictionary into a JWT token with an expiration time,
+        the access token lifetime unless data has an exp.
         Args:
             data (dict): The data to include in the token payload.
         Returns:
             str: A JWT-encoded string.
         """
         encode_data = data.copy()
-        encode_data.update(
-            {"exp": datetime.now() + timedelta(minutes=Config.JWT_EXPIRE_MINUTES)}
+        encode_data.setdefault(
+            "exp", datetime.now() + timedelta(minutes=Config.JWT_EXPIRE_MINUTES)
         )
+        if Config.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS:
+            if self._signing_key is None:
+                self._load_signing_key()
+            return jwt.encode(
+                encode_data,
+                self._signing_key,
+                algorithm=Config.JWT_ALGORITHM,
+                headers={"kid": self._signing_kid},
+            )
         return jwt.encode(
             encode_data, Config.JWT_SECRET_KEY, algorithm=Config.JWT_ALGORITHM
         )
@@ -68,9 +236,18 @@ class JWTToken(TokenStrategy):
             dict: The decoded token payload.
         """
         try:
-            decode_data = jwt.decode(
-                token, Config.JWT_SECRET_KEY, algorithms=[Config.JWT_ALGORITHM]
-            )
+            if Config.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS:
+                kid = jwt.get_unverified_header(token).get("kid")
+                key = get_key_set().get(kid) if isinstance(kid, str) else None
+                if key is None:
+                    raise AccessTokenInvalid
+                decode_data = jwt.decode(
+                    token, key.key, algorithms=[key.algorithm_name]
+                )
+            else:
+                decode_data = jwt.decode(
+                    token, Config.JWT_SECRET_KEY, algorithms=[Config.JWT_ALGORITHM]
+                )
         except ExpiredSignatureError as e:
             raise AccessTokenExpired from e
         except InvalidTokenError as e:
@@ -78,18 +255,117 @@ class JWTToken(TokenStrategy):
         return decode_data
 
 
+RevocationHook = Callable[[dict], bool]
+
+
+class TokenCache:
+    """
+    Cache of verified token payloads on top of a CacheBackend.
+
+    Entries are keyed by the sha256 digest of the token, so the cache never holds
+    a usable token, and expire at the token's exp or after ttl seconds, whichever
+    comes first. Payloads without a numeric exp are never cached.
+
+    Revocation hooks are called with the payload on every lookup, hit or miss,
+    so a token revoked after it was cached is rejected on its next use.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.revocation_hooks: list[RevocationHook] = []
+
+    @staticmethod
+    def key(token: str) -> str:
+        """Return the backend key of token."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        """Return the verified payload of token, None on a miss."""
+        return self.backend.get(self.key(token))
+
+    def set(self, token: str, payload: dict) -> None:
+        """
+        Cache the verified payload of token until its exp, capped at ttl seconds.
+        """
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        ttl = min(exp - time.time(), self.ttl)
+        if ttl > 0:
+            self.backend.set(self.key(token), payload, ttl)
+
+    def discard(self, token: str) -> None:
+        """Drop the cached payload of token."""
+        self.backend.delete(self.key(token))
+
+    def add_revocation_hook(self, hook: RevocationHook) -> None:
+        """
+        Register hook, a function of the payload returning True when the token
+        has been revoked. A hook already registered is not added again.
+        """
+        if hook not in self.revocation_hooks:
+            self.revocation_hooks.append(hook)
+
+    def revoked(self, payload: dict) -> bool:
+        """Return True if any revocation hook rejects payload."""
+        return any(hook(payload) for hook in self.revocation_hooks)
+
+    def statistics(self) -> CacheStatistics:
+        """Return the hit, miss and eviction counters of the backend."""
+        return self.backend.statistics()
+
+
+_token_cache: TokenCache | None = None
+
+
+def get_token_cache() -> TokenCache:
+    """
+    Return the process-wide verified token cache, created from Config on first use.
+
+    Returns:
+        TokenCache: The shared token cache.
+    """
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(
+            LRUCacheBackend(Config.CACHE_TOKEN_ENTRIES, Config.CACHE_TOKEN_TTL),
+            Config.CACHE_TOKEN_TTL,
+        )
+    return _token_cache
+
+
 class TokenService:
-    """A service class that handles token generation and extraction using a strategy pattern."""
+    """
+    A service class that handles token generation and extraction using a strategy pattern.
+
+    A login issues a short lived access token and a refresh token sharing a family
+    id (fam), and every refresh rotates the refresh token within the family.
+    Revoking the family id revokes every token of the login, and the jti of a
+    refresh token is marked used when it is exchanged.
+    """
 
-    def __init__(self, strategy: TokenStrategy):
+    def __init__(
+        self,
+        strategy: TokenStrategy,
+        token_cache: TokenCache | None = None,
+        revocation_store: RevocationStore | None = None,
+    ):
         """
         Initializes the TokenService with a specific token strategy.
 
         Args:
            strategy (TokenStrategy): The token strategy implementation to use (e.g., JWTToken).
+           token_cache (TokenCache|None): The verified token cache, shared when None.
+           revocation_store (RevocationStore|None): The revoked ids, shared when None.
         """
 
         self.token_handler = strategy()
+        self.token_cache = get_token_cache() if token_cache is None else token_cache
+        self.revocation_store = (
+            get_revocation_store() if revocation_store is None else revocation_store
+        )
+        self.token_cache.add_revocation_hook(self.revocation_store.revoked)
 
     def generate_token(self, data: dict) -> str:
         """
@@ -103,6 +379,121 @@ class TokenService:
         """
         return self.token_handler.encode(data)
 
+    def generate_token_pair(
+        self, user_id: int, family: str | None = None
+    ) -> tuple[str, str]:
+        """
+        Generates an access token and a refresh token of the same family.
+
+        Args:
+            user_id (int): The user the tokens are issued to.
+            family (str|None): The family id to continue, a new family when None.
+
+        Returns:
+            tuple[str, str]: The access token and the refresh token.
+        """
+        family = family or secrets.token_urlsafe(16)
+        access_token = self.generate_token(
+            {"sub": str(user_id), "typ": "access", "fam": family}
+        )
+        refresh_token = self.generate_token(
+            {
+                "sub": str(user_id),
+                "typ": "refresh",
+                "fam": family,
+                "jti": secrets.token_urlsafe(16),
+                "exp": datetime.now() + timedelta(days=Config.JWT_REFRESH_EXPIRE_DAYS),
+            }
+        )
+        return access_token, refresh_token
+
+    @staticmethod
+    def _family_expiry(payload: dict) -> float:
+        """
+        Return when every token of the family of payload has expired. Any refresh
+        token issued later in the family was issued before payload expired, so it
+        expires at most one refresh lifetime after payload.
+        """
+        return payload["exp"] + Config.JWT_REFRESH_EXPIRE_DAYS * 86400
+
+    def refresh_token_pair(self, refresh_token: str) -> tuple[str, str]:
+        """
+        Exchanges a refresh token for a new token pair of its family. A refresh
+        token is accepted once, presenting it again revokes the whole family, as
+        one of the two holders must have stolen it.
+
+        Args:
+            refresh_token (str): The refresh token.
+
+        Returns:
+            tuple[str, str]: The new access token and refresh token.
+
+        Raises:
+            RefreshTokenInvalid: If the token is invalid, expired, revoked or reused.
+        """
+        try:
+            payload = self.token_handler.decode(refresh_token)
+        except (AccessTokenExpired, AccessTokenInvalid) as e:
+            raise RefreshTokenInvalid from e
+        claims = {"sub", "fam", "jti"}
+        if payload.get("typ") != "refresh" or not claims <= payload.keys():
+            raise RefreshTokenInvalid
+        if self.revocation_store.is_revoked(payload["fam"]):
+            raise RefreshTokenInvalid
+        if not self.revocation_store.use(payload["jti"], payload["exp"]):
+            logging.warning("Refresh token of user %s reused", payload["sub"])
+            self.revocation_store.revoke(payload["fam"], self._family_expiry(payload))
+            raise RefreshTokenInvalid
+        return self.generate_token_pair(int(payload["sub"]), payload["fam"])
+
+    def revoke_token_family(self, *tokens: str | None) -> bool:
+        """
+        Revokes the family of the first valid token, which logs out every token of
+        the login.
+
+        Args:
+            tokens (str|None): The tokens of the request, None when missing.
+
+        Returns:
+            bool: False if no token had a family to revoke.
+        """
+        for token in tokens:
+            if token is None:
+                continue
+            try:
+                payload = self.token_handler.decode(token)
+            except (AccessTokenExpired, AccessTokenInvalid):
+                continue
+            if "fam" in payload:
+                self.revocation_store.revoke(
+                    payload["fam"], self._family_expiry(payload)
+                )
+                return True
+        return False
+
+    def verify_token(self, token: str) -> dict:
+        """
+        Decodes a token, reusing the payload of an earlier verification of the
+        same token while it is cached.
+
+        Args:
+            token (str): The token to verify.
+
+        Returns:
+            dict: The decoded token payload.
+
+        Raises:
+            AccessTokenRevoked: If the token or its family is revoked.
+        """
+        payload = self.token_cache.get(token)
+        if payload is None:
+            payload = self.token_handler.decode(token)
+            self.token_cache.set(token, payload)
+        if self.token_cache.revoked(payload):
+            self.token_cache.discard(token)
+            raise AccessTokenRevoked
+        return payload
+
     def get_current_user_from_cookie(self, request: Request) -> int:
         """
         Extracts and decodes the token from the request's cookie to retrieve user information.
@@ -116,7 +507,9 @@ class TokenService:
         token = request.cookies.get("access_token")
         if token is None:
             raise AccessTokenNotFound
-        payload = self.token_handler.decode(token)
+        payload = self.verify_token(token)
+        if payload.get("typ") == "refresh":
+            raise AccessTokenInvalid
         user_id = payload.get("sub")
         if user_id is None:
             raise AccessTokenUserIDNotFound
@@ -0,0 +1,66 @@
+from typing import Iterable
+
+
+class _Node:
+    """A trie node with the best entries of its subtree."""
+
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.top: list[tuple[str, int]] = []
+
+
+class PrefixIndex:
+    """
+    Case insensitive prefix index over weighted names, used for autocomplete.
+
+    Every node keeps the `top` heaviest names of its subtree, so a lookup only
+    walks the prefix and never visits the subtree. The index is immutable once
+    built, rebuild it when the names change.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, int]], top: int):
+        """
+        Build the index.
+
+        Args:
+            entries (Iterable[tuple[str, int]]) : (name, weight) pairs.
+            top (int) : The number of names kept per node, the largest limit search supports.
+        """
+        self.top = top
+        self.size = 0
+        self._root = _Node()
+        # Inserting the heaviest names first keeps every node's top list sorted.
+        for name, weight in sorted(entries, key=lambda entry: (-entry[1], entry[0])):
+            self._insert(name, weight)
+
+    def _insert(self, name: str, weight: int) -> None:
+        node = self._root
+        self._keep(node, name, weight)
+        for char in name.casefold():
+            node = node.children.setdefault(char, _Node())
+            self._keep(node, name, weight)
+        self.size += 1
+
+    def _keep(self, node: _Node, name: str, weight: int) -> None:
+        if len(node.top) < self.top:
+            node.top.append((name, weight))
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Return the heaviest names starting with prefix, ignoring case.
+
+        Args:
+            prefix (str) : The typed text, an empty prefix matches every name.
+            limit (int) : The maximum number of names, at most top.
+
+        Returns:
+            list[tuple[str, int]]: (name, weight) pairs, heaviest first.
+        """
+        node = self._root
+        for char in prefix.casefold():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
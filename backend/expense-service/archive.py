@@ -0,0 +1,41 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from core.config.config import Config
+from model.transaction_database import TransactionDatabase
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(
+        description="Move transactions older than the horizon to transactions_archive."
+    )
+    parser.add_argument(
+        "--horizon-days",
+        type=int,
+        default=Config.ARCHIVE_HORIZON_DAYS,
+        help="Archive transactions older than this many days.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=Config.ARCHIVE_BATCH_SIZE,
+        help="The number of transactions moved per database transaction.",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.1,
+        help="Seconds to wait between batches, so writers are not starved of locks.",
+    )
+    args = parser.parse_args()
+    transaction_database = TransactionDatabase()
+
+    before = datetime.now() - timedelta(days=args.horizon_days)
+    total = 0
+    while moved := transaction_database.archive_batch(before, args.batch_size):
+        total += moved
+        logging.info("Archived %d transactions", total)
+        time.sleep(args.pause)
+    logging.info("Archived %d transactions older than %s", total, before)
@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, create_engine, insert
+from sqlalchemy.orm import Session
+
+from core.migration import items, migrate, transactions
+from model.transaction_database import QueryTransactionData, TransactionDatabase
+
+USERS = 100
+YEARS = 6
+END = datetime(2026, 1, 1)
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """
+    Create the schema and insert rows transactions spread evenly over YEARS years.
+    """
+    migrate(engine)
+    random.seed(0)
+    span = timedelta(days=365 * YEARS)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(items), [{"product_name": f"product_{i}"} for i in range(500)]
+        )
+        for chunk_start in range(0, rows, 10000):
+            connection.execute(
+                insert(transactions),
+                [
+                    {
+                        "user_id": i % USERS,
+                        "category": "food",
+                        "item_id": random.randint(1, 500),
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": END - span * random.random(),
+                    }
+                    for i in range(chunk_start, min(chunk_start + 10000, rows))
+                ],
+            )
+
+
+def archive(engine: Engine, before: datetime, batch_size: int) -> int:
+    """Move every transaction older than before to the archive, batch by batch."""
+    total = 0
+    with Session(engine) as session:
+        while moved := TransactionDatabase._archive_batch(session, before, batch_size):
+            session.commit()
+            total += moved
+    return total
+
+
+def scan(engine: Engine, query_data: QueryTransactionData, repeat: int) -> float:
+    """Return the milliseconds query_rows takes on average for every user."""
+    with Session(engine) as session:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for user_id in range(USERS):
+                TransactionDatabase._select_rows(
+                    session, dict(query_data, user_id=user_id)
+                )
+        return (time.perf_counter() - start) / repeat / USERS * 1000
+
+
+QUERIES: dict[str, QueryTransactionData] = {
+    "first page": {"limit": 100},
+    "last 90 days": {"date_from": END - timedelta(days=90)},
+    "last year by cost": {
+        "date_from": END - timedelta(days=365),
+        "sort": ["-total_cost"],
+        "limit": 100,
+    },
+    "whole history": {"date_to": END, "limit": 100, "sort": ["date"]},
+}
+
+
+def main(rows: int, horizon_days: int, batch_size: int, repeat: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(temp_dir, 'archive.db')}")
+        seed(engine, rows)
+        before = {name: scan(engine, query, repeat) for name, query in QUERIES.items()}
+
+        start = time.perf_counter()
+        moved = archive(engine, END - timedelta(days=horizon_days), batch_size)
+        archive_seconds = time.perf_counter() - start
+        after = {name: scan(engine, query, repeat) for name, query in QUERIES.items()}
+        engine.dispose()
+
+    print(f"rows: {rows}, archived: {moved} in {archive_seconds:.1f}s")
+    print(f"{'query':>18} {'hot only ms':>12} {'archived ms':>12}")
+    for name in QUERIES:
+        print(f"{name:>18} {before[name]:>12.3f} {after[name]:>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare user queries before and after archiving old transactions."
+    )
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--horizon-days", type=int, default=730)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.horizon_days, args.batch_size, args.repeat)
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import anyio
+
+from model.transaction_database import TransactionDatabase, AsyncTransactionDatabase
+
+BENCHMARK_USER_ID = -1
+
+
+def seed(rows: int) -> None:
+    """
+    Insert rows transactions for the benchmark user if they are not there yet.
+    """
+    transaction_database = TransactionDatabase()
+    existing = len(transaction_database.query({"user_id": BENCHMARK_USER_ID}))
+    for i in range(existing, rows):
+        transaction_database.create(
+            {
+                "user_id": BENCHMARK_USER_ID,
+                "category": "food",
+                "product_name": f"product_{i}",
+                "quantity": 1,
+                "total_cost": 100,
+                "pay_by": "cash",
+                "date": datetime(2025, 1, 1) + timedelta(minutes=i),
+            }
+        )
+
+
+async def run_sync_path(requests: int) -> float:
+    """
+    Run the sync query in AnyIO worker threads, which is how FastAPI
+    executes a sync route handler.
+
+    Returns:
+        float: The throughput in requests per second.
+    """
+    transaction_database = TransactionDatabase()
+    start = time.perf_counter()
+    async with anyio.create_task_group() as task_group:
+        for _ in range(requests):
+            task_group.start_soon(
+                anyio.to_thread.run_sync,
+                transaction_database.query,
+                {"user_id": BENCHMARK_USER_ID},
+            )
+    return requests / (time.perf_counter() - start)
+
+
+async def run_async_path(requests: int) -> float:
+    """
+    Run the async query as concurrent tasks on the event loop.
+
+    Returns:
+        float: The throughput in requests per second.
+    """
+    transaction_database = AsyncTransactionDatabase()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            transaction_database.query({"user_id": BENCHMARK_USER_ID})
+            for _ in range(requests)
+        ]
+    )
+    return requests / (time.perf_counter() - start)
+
+
+async def main(rows: int, concurrency: list[int]):
+    seed(rows)
+    print(f"{'concurrency':>12} {'sync req/s':>12} {'async req/s':>12}")
+    for requests in concurrency:
+        sync_throughput = await run_sync_path(requests)
+        async_throughput = await run_async_path(requests)
+        print(f"{requests:>12} {sync_throughput:>12.1f} {async_throughput:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the sync and async transaction query paths under concurrency."
+    )
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 100, 500, 1000]
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.concurrency))
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from controller.transaction import import_transactions
+
+BENCHMARK_USER_ID = -2
+
+
+def statement_lines(rows: int) -> Iterator[str]:
+    """
+    Generate the lines of a synthetic bank statement with rows transactions.
+    """
+    yield "category,product_name,quantity,total_cost,pay_by,date\n"
+    start = datetime(2025, 1, 1)
+    for i in range(rows):
+        date = (start + timedelta(minutes=i)).isoformat()
+        yield f"food,product_{i},1,{i % 500 + 1},card,{date}\n"
+
+
+async def main(rows: int, chunk_sizes: list[int]):
+    print(f"{'chunk size':>12} {'rows':>10} {'rows/s':>12}")
+    # a temporary file, like the spooled upload the route reads
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as csv_file:
+        csv_file.writelines(statement_lines(rows))
+        for chunk_size in chunk_sizes:
+            csv_file.seek(0)
+            start = time.perf_counter()
+            result = await import_transactions(BENCHMARK_USER_ID, csv_file, chunk_size)
+            throughput = result["imported"] / (time.perf_counter() - start)
+            print(f"{chunk_size:>12} {result['imported']:>10} {throughput:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the CSV import throughput for several chunk sizes."
+    )
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.chunk_sizes))
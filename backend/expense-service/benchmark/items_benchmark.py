@@ -0,0 +1,130 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, create_engine, insert, text
+
+from core.migration import MIGRATIONS, NormalizeProductNames, migrate, transactions
+
+USERS = 100
+PRODUCTS = 500
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """
+    Create the schema before NormalizeProductNames and insert rows transactions
+    with product names drawn from a realistic vocabulary.
+    """
+    migrate(
+        engine, [m for m in MIGRATIONS if m.version < NormalizeProductNames.version]
+    )
+    random.seed(0)
+    names = [
+        f"{random.choice(['Organic', 'Fresh', 'Family size', 'Imported'])} "
+        f"{random.choice(['whole milk', 'green tea', 'rice', 'coffee beans'])} "
+        f"{random.choice(['500g', '1L', '2kg', '12 pack'])} #{i}"
+        for i in range(PRODUCTS)
+    ]
+    start = datetime(2020, 1, 1)
+    with engine.begin() as connection:
+        for chunk_start in range(0, rows, 10000):
+            connection.execute(
+                insert(transactions),
+                [
+                    {
+                        "user_id": i % USERS,
+                        "category": "food",
+                        "product_name": random.choice(names),
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": start + timedelta(minutes=i),
+                    }
+                    for i in range(chunk_start, min(chunk_start + 10000, rows))
+                ],
+            )
+
+
+def size(path: str, engine: Engine) -> float:
+    """Return the size of the database file in MiB after VACUUM."""
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql(
+            "VACUUM"
+        )
+    return os.path.getsize(path) / 1024 / 1024
+
+
+def scan(engine: Engine, statement: str, repeat: int) -> float:
+    """Return the milliseconds statement takes on average for every user."""
+    with engine.connect() as connection:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for user_id in range(USERS):
+                connection.execute(text(statement), {"user_id": user_id}).all()
+        return (time.perf_counter() - start) / repeat / USERS * 1000
+
+
+LISTING = {
+    "before": (
+        "SELECT transaction_id, product_name, date FROM transactions "
+        "WHERE user_id = :user_id ORDER BY date DESC LIMIT 100"
+    ),
+    "after": (
+        "SELECT transaction_id, (SELECT product_name FROM items "
+        "WHERE items.item_id = transactions.item_id) AS product_name, date "
+        "FROM transactions WHERE user_id = :user_id ORDER BY date DESC LIMIT 100"
+    ),
+}
+FULL_SCAN = {
+    "before": (
+        "SELECT product_name, count(*) FROM transactions "
+        "WHERE user_id = :user_id GROUP BY product_name"
+    ),
+    "after": (
+        "SELECT items.product_name, counts.count FROM items JOIN "
+        "(SELECT item_id, count(*) AS count FROM transactions "
+        "WHERE user_id = :user_id GROUP BY item_id) AS counts "
+        "ON counts.item_id = items.item_id"
+    ),
+}
+
+
+def main(rows: int, repeat: int):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        before_path = os.path.join(temp_dir, "before.db")
+        after_path = os.path.join(temp_dir, "after.db")
+        before = create_engine(f"sqlite:///{before_path}")
+        seed(before, rows)
+        before.dispose()
+        shutil.copy(before_path, after_path)
+        after = create_engine(f"sqlite:///{after_path}")
+        start = time.perf_counter()
+        migrate(after)
+        migration_seconds = time.perf_counter() - start
+
+        print(f"rows: {rows}, migration: {migration_seconds:.1f}s")
+        print(f"{'':>8} {'size MiB':>10} {'listing ms':>12} {'count ms':>10}")
+        for name, engine, path in (
+            ("before", before, before_path),
+            ("after", after, after_path),
+        ):
+            print(
+                f"{name:>8} {size(path, engine):>10.1f} "
+                f"{scan(engine, LISTING[name], repeat):>12.3f} "
+                f"{scan(engine, FULL_SCAN[name], repeat):>10.3f}"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the size and scan speed of inline and interned product names."
+    )
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,101 @@
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable
+
+from model.transaction_database import TransactionDatabase
+
+BENCHMARK_USER_ID = -3
+
+
+def seed(rows: int) -> None:
+    """
+    Insert transactions for the benchmark user until there are rows of them.
+    """
+    transaction_database = TransactionDatabase()
+    summary = transaction_database.summarize(
+        {"user_id": BENCHMARK_USER_ID, "group_by": [], "start": None, "end": None}
+    )
+    existing = summary[0]["count"]
+    start = datetime(2020, 1, 1)
+    for chunk_start in range(existing, rows, 10000):
+        transaction_database.apply_batch(
+            BENCHMARK_USER_ID,
+            [
+                {
+                    "action": "create",
+                    "data": {
+                        "user_id": BENCHMARK_USER_ID,
+                        "category": "food",
+                        "product_name": f"product_{i}",
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": start + timedelta(minutes=i),
+                    },
+                }
+                for i in range(chunk_start, min(chunk_start + 10000, rows))
+            ],
+        )
+
+
+def orm_path(rows: int) -> list[dict]:
+    """The previous listing: Transaction objects, to_dict and del user_id."""
+    data = TransactionDatabase().query({"user_id": BENCHMARK_USER_ID, "limit": rows})
+    transactions = [transaction.to_dict() for transaction in data]
+    for transaction in transactions:
+        del transaction["user_id"]
+    return transactions
+
+
+def row_path(rows: int) -> list[dict]:
+    """The column projected listing used by query_user_transactions."""
+    data = TransactionDatabase().query_rows(
+        {"user_id": BENCHMARK_USER_ID, "limit": rows}
+    )
+    return [dict(row) for row in data]
+
+
+def measure(path: Callable[[int], list[dict]], rows: int) -> tuple[float, float]:
+    """
+    Run path once for CPU time and once under tracemalloc for peak memory.
+
+    Returns:
+        tuple[float, float]: The CPU microseconds per row and the peak MiB.
+    """
+    start = time.process_time()
+    path(rows)
+    cpu = time.process_time() - start
+
+    tracemalloc.start()
+    path(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu / rows * 1e6, peak / 1024 / 1024
+
+
+def main(sizes: list[int]):
+    seed(max(sizes))
+    print(
+        f"{'rows':>10} {'orm us/row':>12} {'row us/row':>12} "
+        f"{'orm peak MiB':>14} {'row peak MiB':>14}"
+    )
+    for rows in sizes:
+        orm_cpu, orm_peak = measure(orm_path, rows)
+        row_cpu, row_peak = measure(row_path, rows)
+        print(
+            f"{rows:>10} {orm_cpu:>12.2f} {row_cpu:>12.2f} "
+            f"{orm_peak:>14.1f} {row_peak:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the ORM and the column projected transaction listing."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    args = parser.parse_args()
+    main(args.sizes)
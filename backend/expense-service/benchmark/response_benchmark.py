@@ -0,0 +1,63 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.response import FastJSONResponse
+
+
+def listing(rows: int) -> dict:
+    """Return a GET /transaction response body with rows transactions."""
+    start = datetime(2025, 1, 1)
+    return {
+        "transactions": [
+            {
+                "transaction_id": i,
+                "category": "food",
+                "product_name": f"product_{i}",
+                "quantity": 1,
+                "total_cost": i % 500 + 0.5,
+                "pay_by": "cash",
+                "date": start + timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ],
+        "next_cursor": None,
+    }
+
+
+def default_response(content: dict) -> bytes:
+    """The encoding FastAPI applies to a dict returned from a route."""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast_response(content: dict) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def main(sizes: list[int], repeat: int):
+    print(f"{'rows':>10} {'default ms':>12} {'fast ms':>12} {'speedup':>8}")
+    for rows in sizes:
+        content = listing(rows)
+        assert default_response(content) == fast_response(content)
+        timings = []
+        for encode in (default_response, fast_response):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encode(content)
+            timings.append((time.perf_counter() - start) / repeat * 1000)
+        print(
+            f"{rows:>10} {timings[0]:>12.2f} {timings[1]:>12.2f} "
+            f"{timings[0] / timings[1]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the default FastAPI JSON encoding with FastJSONResponse."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from core.cache import LRUCacheBackend
+from core.token import JWTToken, TokenCache, TokenService
+
+
+def requests(users: int, count: int, skew: float) -> list[SimpleNamespace]:
+    """
+    Return count requests of users logged in users, each carrying the access token
+    cookie of its user. Users are picked from a Zipf distribution with exponent
+    skew, so a few active users send most of the requests as in real traffic.
+    """
+    token_handler = JWTToken()
+    cookies = [
+        {"access_token": token_handler.encode({"sub": str(user_id)})}
+        for user_id in range(users)
+    ]
+    weights = [1 / (rank + 1) ** skew for rank in range(users)]
+    random.seed(0)
+    return [
+        SimpleNamespace(cookies=cookies[user_id])
+        for user_id in random.choices(range(users), weights, k=count)
+    ]
+
+
+def run(token_service: TokenService, batch: list[SimpleNamespace]) -> float:
+    """Return the microseconds per request spent authenticating batch."""
+    start = time.perf_counter()
+    for request in batch:
+        token_service.get_current_user_from_cookie(request)
+    return (time.perf_counter() - start) / len(batch) * 1000000
+
+
+def main(users: int, count: int, skew: float, sizes: list[int]):
+    batch = requests(users, count, skew)
+    print(f"users: {users}, requests: {count}, zipf skew: {skew}")
+    print(f"{'entries':>8} {'us/request':>11} {'hit rate':>9} {'evictions':>10}")
+    for max_entries in sizes:
+        token_cache = TokenCache(LRUCacheBackend(max_entries, ttl=300), ttl=300)
+        token_service = TokenService(JWTToken, token_cache=token_cache)
+        elapsed = run(token_service, batch)
+        statistics = token_cache.statistics()
+        lookups = statistics["hits"] + statistics["misses"]
+        print(
+            f"{max_entries:>8} {elapsed:>11.2f} "
+            f"{statistics['hits'] / lookups:>9.1%} {statistics['evictions']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure token verification cost with and without the token cache."
+    )
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 100, 1000, 10000])
+    args = parser.parse_args()
+    main(args.users, args.requests, args.skew, args.sizes)
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+from unittest.mock import patch
+
+from model.transaction_database import AsyncTransactionDatabase, TransactionData
+from model.transaction_writer import TransactionWriter
+
+
+def transaction(client: int, i: int) -> TransactionData:
+    return {
+        "user_id": client,
+        "category": "food",
+        "product_name": f"product_{i % 50}",
+        "quantity": 1,
+        "total_cost": 100,
+        "pay_by": "cash",
+        "date": datetime(2025, 1, 1),
+    }
+
+
+async def run(
+    create: Callable[[TransactionData], Awaitable[None]], clients: int, creates: int
+) -> tuple[float, float, float, int]:
+    """
+    Let every client create its records one after the other, all clients at once.
+
+    Returns:
+        tuple[float, float, float, int]: The creates per second, the median and
+        the 99th percentile latency in milliseconds and the number of failures.
+    """
+    latencies = []
+    failures = 0
+
+    async def client(client_id: int):
+        nonlocal failures
+        for i in range(creates):
+            start = time.perf_counter()
+            try:
+                await create(transaction(client_id, i))
+            except Exception:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(client_id) for client_id in range(clients)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        failures,
+    )
+
+
+def report(mode: str, result: tuple[float, float, float, int], batch: float) -> None:
+    creates_per_second, p50, p99, failures = result
+    print(
+        f"{mode:>24} {creates_per_second:>10.0f} {p50:>8.2f} {p99:>8.2f} "
+        f"{failures:>7} {batch:>10.1f}"
+    )
+
+
+async def main(clients: int, creates: int, settings: list[tuple[int, float]]):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        url = f"sqlite+aiosqlite:///{os.path.join(temp_dir, 'write_behind.db')}"
+        with patch("core.database.Config.ASYNC_USER_DATABASE_URL", url):
+            transaction_database = AsyncTransactionDatabase()
+        await transaction_database.create_tables(
+            transaction_database.Transaction.metadata
+        )
+
+        print(f"clients: {clients}, creates per client: {creates}")
+        print(
+            f"{'mode':>24} {'creates/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'failed':>7} {'avg batch':>10}"
+        )
+        result = await run(transaction_database.create, clients, creates)
+        report("commit per create", result, 1)
+        for max_batch, max_delay_ms in settings:
+            writer = TransactionWriter(
+                transaction_database, max_batch, max_delay_ms / 1000, clients
+            )
+            result = await run(writer.create, clients, creates)
+            await writer.close()
+            usage = writer.statistics()
+            report(
+                f"batch {max_batch}, {max_delay_ms:g} ms",
+                result,
+                usage["writes"] / max(usage["batches"], 1),
+            )
+        await transaction_database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare a commit per create with the group commit writer."
+    )
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--creates", type=int, default=50)
+    parser.add_argument(
+        "--settings",
+        type=str,
+        nargs="+",
+        default=["16:1", "64:2", "64:5", "256:10"],
+        help="MAX_BATCH:MAX_DELAY_MS pairs of the writer to measure.",
+    )
+    args = parser.parse_args()
+    settings = [
+        (int(max_batch), float(max_delay_ms))
+        for max_batch, max_delay_ms in (item.split(":") for item in args.settings)
+    ]
+    asyncio.run(main(args.clients, args.creates, settings))
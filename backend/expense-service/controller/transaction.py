@@ -1,36 +1,619 @@
-from typing import Dict
+import asyncio
+import base64
+import binascii
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Literal, Mapping, TextIO
+from pydantic import TypeAdapter, ValidationError
 
-from model.transaction_database import TransactionData, TransactionDatabase
+from model.transaction_database import (
+    TransactionData,
+    TransactionOperation,
+    PatchTransactionData,
+    TransactionFilter,
+    TransactionDatabase,
+    AsyncTransactionDatabase,
+    EXPORT_COLUMNS,
+    SUMMARY_PERIODS,
+    SORT_KEYS,
+    DEFAULT_SORT,
+)
+from model.transaction_writer import get_transaction_writer
+from core.config.config import Config
+from core.cache import LRUCacheBackend, UserCache
+from core.trie import PrefixIndex
+from core.response import dumps
+from core.error import (
+    InvalidTransactionCursorError,
+    InvalidSummaryGroupError,
+    InvalidTransactionBatchError,
+    InvalidTransactionImportError,
+    InvalidTransactionPatchError,
+    InvalidTransactionFilterError,
+)
+
+MAX_BATCH_OPERATIONS = 1000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# The number of failed rows reported back by an import, the rest are only counted.
+MAX_IMPORT_ERRORS = 100
+# The distinct product names indexed per user for autocomplete, the most
+# frequent are kept, and the most suggestions one lookup returns.
+MAX_PRODUCT_NAMES = 5000
+MAX_PRODUCT_SUGGESTIONS = 20
+
+# The JSON types of the sort key values in a cursor.
+_CURSOR_TYPES = {
+    "date": str,
+    "total_cost": (int, float),
+    "quantity": int,
+    "product_name": str,
+    "category": str,
+    "pay_by": str,
+    "transaction_id": int,
+}
+
+_transaction_data_adapter = TypeAdapter(TransactionData)
+_transaction_cache: UserCache | None = None
+_product_index_cache: UserCache | None = None
+
+
+def get_transaction_cache() -> UserCache:
+    """
+    Return the process wide cache of transaction listings, creating it on first use.
+    """
+    global _transaction_cache
+    if _transaction_cache is None:
+        _transaction_cache = UserCache(
+            LRUCacheBackend(Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL),
+            "transactions",
+        )
+    return _transaction_cache
+
+
+def get_product_index_cache() -> UserCache:
+    """
+    Return the process wide cache of product name indexes, creating it on first
+    use. An index holds up to MAX_PRODUCT_NAMES names, so it has its own backend
+    bounded by CACHE.PRODUCT_INDEX_ENTRIES instead of sharing the listing one.
+    """
+    global _product_index_cache
+    if _product_index_cache is None:
+        _product_index_cache = UserCache(
+            LRUCacheBackend(Config.CACHE_PRODUCT_INDEX_ENTRIES, Config.CACHE_TTL),
+            "products",
+        )
+    return _product_index_cache
 
 
 # TODO: add user to transaction_data
-def create_transaction(user, transaction_data: TransactionData) -> None:
+async def create_transaction(user, transaction_data: TransactionData) -> None:
     """
-    Create a new transaction record.
+    Create a new transaction record. With WRITE_BEHIND.ENABLED the record is
+    group committed with the creates of concurrent requests.
 
     Args:
         transaction_data (TransactionData) : The transaction data to be inserted.
     """
-    transaction_database = TransactionDatabase()
     transaction_data["user_id"] = user
-    transaction_database.create(transaction_data)
+    if Config.WRITE_BEHIND_ENABLED:
+        await get_transaction_writer().create(transaction_data)
+    else:
+        transaction_database = AsyncTransactionDatabase()
+        await transaction_database.create(transaction_data)
+
+
+async def apply_transaction_batch(
+    user_id: int, operations: list[TransactionOperation]
+) -> Dict:
+    """
+    Apply create, update and delete operations in one database transaction.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        operations (list[TransactionOperation]) : Up to MAX_BATCH_OPERATIONS operations.
+
+    Returns:
+        dict: The "results" of the operations in request order, each with its
+        "index" and "status".
+
+    Raises:
+        InvalidTransactionBatchError: If the batch is empty, too large or an
+        operation misses the transaction_id or data it needs.
+    """
+    if not 0 < len(operations) <= MAX_BATCH_OPERATIONS:
+        raise InvalidTransactionBatchError
+    for operation in operations:
+        if operation["action"] != "create" and operation.get("transaction_id") is None:
+            raise InvalidTransactionBatchError
+        if operation["action"] != "delete" and operation.get("data") is None:
+            raise InvalidTransactionBatchError
 
-    # TODO: update item db with transaction data
+    transaction_database = AsyncTransactionDatabase()
+    statuses = await transaction_database.apply_batch(user_id, operations)
+    return {
+        "results": [
+            {"index": index, "status": status} for index, status in enumerate(statuses)
+        ]
+    }
 
 
-def query_user_transactions(user_id: int) -> Dict:
+async def patch_transaction(
+    user_id: int, transaction_id: int, patch_data: PatchTransactionData
+) -> None:
     """
-    Retrieve a dict of transactions for a specific user.
+    Update the given columns of a transaction record of the user.
 
     Args:
         user_id (int) : The unique identifier of the user.
+        transaction_id (int) : The ID of the transaction record.
+        patch_data (PatchTransactionData) : The columns to update.
+
+    Raises:
+        InvalidTransactionPatchError: If patch_data has no column to update.
+    """
+    if not patch_data:
+        raise InvalidTransactionPatchError
+    transaction_database = AsyncTransactionDatabase()
+    await transaction_database.patch(transaction_id, user_id, patch_data)
+
+
+def encode_cursor(sort: list[str], record: Mapping) -> str:
+    """
+    Encode the sort key of the last record on a page.
+
+    Args:
+        sort (list[str]) : The sort keys of the listing.
+        record (Mapping) : The last record of the page.
+
+    Returns:
+        str: An opaque URL safe cursor, only valid for the same sort.
+    """
+    key = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in TransactionDatabase.sort_key(sort, record)
+    ]
+    raw = json.dumps({"sort": sort, "key": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: list[str]) -> tuple:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor (str) : The cursor from the previous page.
+        sort (list[str]) : The sort keys of the listing.
+
     Returns:
-        dict: A dictionary of transaction records.
-        Each transaction uses the transaction ID as the key and the transaction data as the value.
+        tuple: The key to seek after, the values of the sort keys and the
+        transaction_id.
+
+    Raises:
+        InvalidTransactionCursorError: If the cursor is malformed or was made
+            for another sort.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        data = json.loads(raw)
+        if not isinstance(data, dict) or data.get("sort") != sort:
+            raise ValueError("The cursor belongs to another sort")
+        names = [key.removeprefix("-") for key in sort] + ["transaction_id"]
+        values = data["key"]
+        if not isinstance(values, list) or len(values) != len(names):
+            raise ValueError("The cursor does not match the sort keys")
+        key = []
+        for name, value in zip(names, values):
+            if not isinstance(value, _CURSOR_TYPES[name]) or isinstance(value, bool):
+                raise ValueError(f"Invalid {name} in cursor")
+            key.append(datetime.fromisoformat(value) if name == "date" else value)
+        return tuple(key)
+    except (ValueError, KeyError, UnicodeError, binascii.Error) as e:
+        raise InvalidTransactionCursorError from e
+
+
+def validate_transaction_filter(transaction_filter: TransactionFilter) -> None:
+    """
+    Check that the sort keys exist and the ranges of a filter are not empty.
+
+    Raises:
+        InvalidTransactionFilterError: If the filter can never match or sort.
+    """
+    for key in transaction_filter.get("sort") or []:
+        if key.removeprefix("-") not in SORT_KEYS:
+            raise InvalidTransactionFilterError
+    date_from = transaction_filter.get("date_from")
+    date_to = transaction_filter.get("date_to")
+    if date_from is not None and date_to is not None and date_from >= date_to:
+        raise InvalidTransactionFilterError
+    min_cost = transaction_filter.get("min_total_cost")
+    max_cost = transaction_filter.get("max_total_cost")
+    if min_cost is not None and max_cost is not None and min_cost > max_cost:
+        raise InvalidTransactionFilterError
+
+
+def _filter_shape(transaction_filter: TransactionFilter) -> tuple:
+    """Return a hashable form of a filter for the cache key."""
+    return tuple(
+        sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in transaction_filter.items()
+            if value is not None
+        )
+    )
+
+
+async def query_user_transactions(
+    user_id: int,
+    limit: int | None = None,
+    cursor: str | None = None,
+    transaction_filter: TransactionFilter | None = None,
+    version: int | None = None,
+) -> Dict:
+    """
+    Retrieve a page of transactions for a specific user, newest first unless
+    the filter sorts them otherwise.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        limit (int|None) : The page size, None returns every transaction.
+        cursor (str|None) : The next_cursor of the previous page.
+        transaction_filter (TransactionFilter|None) : The conditions and order of the records.
+        version (int|None) : The data version of the user read before the call,
+            read here when None.
+    Returns:
+        dict: The transaction records of the page under "transactions" and the
+        cursor of the next page under "next_cursor", None on the last page.
+        A cursor only pages through the sort it was returned for.
+        The result is cached under the data version of the user, so it must not
+        be modified.
+
+    Raises:
+        InvalidTransactionFilterError: If the filter is invalid.
+        InvalidTransactionCursorError: If the cursor is malformed or was returned
+            for another sort.
+    """
+    transaction_filter = transaction_filter or {}
+    validate_transaction_filter(transaction_filter)
+    sort = transaction_filter.get("sort") or DEFAULT_SORT
+
+    transaction_database = AsyncTransactionDatabase()
+    if version is None:
+        version = await transaction_database.version(user_id)
+    cache = get_transaction_cache()
+    # The version is read before querying, a write that lands meanwhile bumps
+    # it and the result below is cached where nobody reads it.
+    key = cache.key(
+        user_id, version, ("list", limit, cursor, _filter_shape(transaction_filter))
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    query_data = dict(transaction_filter, user_id=user_id)
+    if cursor is not None:
+        query_data["seek_after"] = decode_cursor(cursor, sort)
+    if limit is not None:
+        # fetch one extra record to know whether there is a next page
+        query_data["limit"] = limit + 1
+    rows = await transaction_database.query_rows(query_data)
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, rows[-1])
+
+    result = {"transactions": [dict(row) for row in rows], "next_cursor": next_cursor}
+    cache.set(key, result)
+    return result
+
+
+async def get_transactions_version(user_id: int) -> int:
+    """
+    Return the data version of a user, which every write bumps in any process.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+
+    Returns:
+        int: The version, 0 before the first write.
+    """
+    transaction_database = AsyncTransactionDatabase()
+    return await transaction_database.version(user_id)
+
+
+def make_transactions_etag(user_id: int, version: int) -> str:
+    """
+    Return the strong ETag of the transaction listings of a user.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        version (int) : The data version of the user.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    return f'"{user_id}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Return whether an If-None-Match header matches etag, using the weak
+    comparison RFC 9110 requires for If-None-Match.
+
+    Args:
+        if_none_match (str|None) : The If-None-Match request header.
+        etag (str) : The current entity tag.
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+async def summarize_user_transactions(
+    user_id: int,
+    group_by: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Dict:
+    """
+    Sum and count the transactions of a user, grouped by the database.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        group_by (list[str]) : Any of "category", "pay_by" and one of "day", "week", "month".
+        start (datetime|None) : Only include transactions on or after start.
+        end (datetime|None) : Only include transactions before end.
+    Returns:
+        dict: The overall "total_cost" and "count", and the per group
+        totals under "groups".
+    """
+    if len([key for key in group_by if key in SUMMARY_PERIODS]) > 1:
+        raise InvalidSummaryGroupError
+    transaction_database = AsyncTransactionDatabase()
+    groups = await transaction_database.summarize(
+        {"user_id": user_id, "group_by": group_by, "start": start, "end": end}
+    )
+    return {
+        "total_cost": sum(group["total_cost"] for group in groups),
+        "count": sum(group["count"] for group in groups),
+        "groups": groups,
+    }
+
+
+async def suggest_product_names(user_id: int, prefix: str, limit: int = 10) -> Dict:
+    """
+    Return the product names of a user starting with prefix, most frequent first.
+    The prefix index of the user is built on first use and cached under the
+    data version of the user, so a write of the user drops it.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        prefix (str) : The typed text, matched ignoring case.
+        limit (int) : The number of names, at most MAX_PRODUCT_SUGGESTIONS.
+    Returns:
+        dict: The matching "products", each with its "product_name" and "count".
+    """
+    transaction_database = AsyncTransactionDatabase()
+    cache = get_product_index_cache()
+    key = cache.key(user_id, await transaction_database.version(user_id), "index")
+    index = cache.get(key)
+    if index is None:
+        counts = await transaction_database.product_counts(user_id, MAX_PRODUCT_NAMES)
+        index = PrefixIndex(counts, MAX_PRODUCT_SUGGESTIONS)
+        cache.set(key, index)
+    return {
+        "products": [
+            {"product_name": name, "count": count}
+            for name, count in index.search(prefix, limit)
+        ]
+    }
+
+
+# Leading characters that make a spreadsheet read a CSV cell as a formula.
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def _export_value(value):
+    """Return value as it is written to a CSV export."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        # quoted so a spreadsheet shows the text instead of evaluating it
+        return "'" + value
+    return value
+
+
+def format_csv(rows: Iterable[tuple]) -> str:
+    """
+    Format rows of EXPORT_COLUMNS as CSV lines, text starting with one of
+    CSV_FORMULA_PREFIXES is prefixed with a single quote.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[_export_value(value) for value in row] for row in rows])
+    return buffer.getvalue()
+
+
+def format_ndjson(rows: Iterable[tuple]) -> str:
+    """
+    Format rows of EXPORT_COLUMNS as one JSON object per line.
+    """
+    return "".join(
+        dumps(dict(zip(EXPORT_COLUMNS, row))).decode("utf-8") + "\n" for row in rows
+    )
+
+
+async def export_user_transactions(
+    user_id: int, export_format: Literal["csv", "ndjson"]
+) -> AsyncIterator[str]:
+    """
+    Export every transaction of a user, one chunk per database batch, so memory
+    stays flat however many transactions the user has. The query runs and its
+    first batch is read before returning, so a database error is raised here
+    rather than after the response has started.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        export_format (str) : "csv" or "ndjson".
+
+    Returns:
+        AsyncIterator[str]: The chunks of the export, newest transaction first.
+
+    Raises:
+        DatabaseQueryTransactionError: If the query fails.
+    """
+    batches = AsyncTransactionDatabase().stream(user_id)
+    first = await anext(batches, None)
+    return _export_chunks(batches, first, export_format)
+
+
+async def _export_chunks(
+    batches: AsyncIterator[list], first: list | None, export_format: str
+) -> AsyncIterator[str]:
+    """Format the batches of an opened export stream, first is its first batch."""
+    try:
+        if export_format == "csv":
+            yield format_csv([EXPORT_COLUMNS])
+            formatter = format_csv
+        else:
+            formatter = format_ndjson
+        if first is not None:
+            yield formatter(first)
+        async for rows in batches:
+            yield formatter(rows)
+    finally:
+        await batches.aclose()
+
+
+def parse_transaction_row(user_id: int, row: dict) -> TransactionData:
+    """
+    Validate a CSV row against TransactionData.
+
+    Args:
+        user_id (int) : The owner of the transaction, a user_id column is ignored.
+        row (dict) : The row read by csv.DictReader.
+
+    Returns:
+        TransactionData: The validated transaction, a blank quantity defaults
+        to 1 and a blank pay_by to "cash".
+
+    Raises:
+        ValidationError: If a field is missing or has a wrong type.
+    """
+    values = {
+        key: value.strip()
+        for key, value in row.items()
+        if isinstance(key, str) and isinstance(value, str) and value.strip()
+    }
+    values.setdefault("quantity", 1)
+    values.setdefault("pay_by", "cash")
+    values["user_id"] = user_id
+    return _transaction_data_adapter.validate_python(values)
+
+
+def check_import_file(file: TextIO) -> None:
+    """
+    Read the whole file once to find decoding and CSV errors, so a broken file
+    is rejected before any of its rows is committed.
+
+    Args:
+        file (TextIO) : The CSV file.
+
+    Raises:
+        InvalidTransactionImportError: If the file is not a UTF-8 CSV file.
+    """
+    try:
+        for _ in csv.reader(file):
+            pass
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise InvalidTransactionImportError from e
+
+
+def read_import_chunk(
+    user_id: int, reader: csv.DictReader, chunk_size: int, errors: list
+) -> tuple[list, int]:
+    """
+    Read rows until chunk_size of them are valid or the file ends.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        reader (csv.DictReader) : The reader of the file.
+        chunk_size (int) : The most valid rows returned.
+        errors (list) : The reported invalid rows, appended to while it holds
+            less than MAX_IMPORT_ERRORS.
+
+    Returns:
+        tuple[list, int]: The create operations of the valid rows and the number
+        of invalid rows read.
+    """
+    chunk = []
+    error_count = 0
+    for row in reader:
+        try:
+            chunk.append(
+                {"action": "create", "data": parse_transaction_row(user_id, row)}
+            )
+        except ValidationError as e:
+            error_count += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(
+                    {
+                        "line": reader.line_num,
+                        "errors": [
+                            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                            for error in e.errors()
+                        ],
+                    }
+                )
+            continue
+        if len(chunk) >= chunk_size:
+            break
+    return chunk, error_count
+
+
+async def import_transactions(
+    user_id: int, file: TextIO, chunk_size: int | None = None
+) -> Dict:
+    """
+    Import transactions from a CSV file with a header row. The file is checked
+    whole first, then read again and valid rows are inserted every chunk_size
+    rows, so memory does not grow with the size of the file. Both passes run in
+    a worker thread, only the inserts run on the event loop.
+
+    Args:
+        user_id (int) : The unique identifier of the user.
+        file (TextIO) : The CSV file, it must be seekable.
+        chunk_size (int|None) : Rows per insert, Config.IMPORT_CHUNK_SIZE when None.
+
+    Returns:
+        dict: The number of "imported" rows, the "error_count" of invalid rows and
+        the first MAX_IMPORT_ERRORS of them under "errors" with their "line" and "errors".
+
+    Raises:
+        InvalidTransactionImportError: If the file is not a UTF-8 CSV file, no row
+            is imported then.
     """
-    transaction_database = TransactionDatabase()
-    data = transaction_database.query({"user_id": user_id})
-    transactions = [transaction.to_dict() for transaction in data]
-    for transaction in transactions:
-        del transaction["user_id"]
-    return transactions
+    chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+    await asyncio.to_thread(check_import_file, file)
+    file.seek(0)
+    transaction_database = AsyncTransactionDatabase()
+    reader = csv.DictReader(file)
+    imported = 0
+    error_count = 0
+    errors = []
+    while True:
+        chunk, chunk_errors = await asyncio.to_thread(
+            read_import_chunk, user_id, reader, chunk_size, errors
+        )
+        error_count += chunk_errors
+        if not chunk:
+            break
+        await transaction_database.apply_batch(user_id, chunk)
+        imported += len(chunk)
+    return {"imported": imported, "error_count": error_count, "errors": errors}
@@ -1,8 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from router import api_router
+from core.config.config import Config
+from core.database import get_engine, pool_statistics
+from core.migration import migrate
+from core.revocation import get_revocation_store
+from core.statistics import log_statistics
+from controller.transaction import get_product_index_cache, get_transaction_cache
+from model.transaction_writer import get_transaction_writer
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Migrate the schema when running against the sqlite stand-in, load the
+    revoked tokens before the first request, log the connection pool and cache
+    usage every STATISTICS.LOG_SECONDS and write the queued transaction
+    creates when the service stops.
+    """
+    if Config.DATABASE_BACKEND == "sqlite":
+        migrate(get_engine(Config.USER_DATABASE_URL))
+    await asyncio.to_thread(get_revocation_store().sync)
+    statistics_log = asyncio.create_task(
+        log_statistics(
+            Config.STATISTICS_LOG_SECONDS,
+            {
+                "Connection pool": pool_statistics,
+                "Transaction cache": get_transaction_cache().statistics,
+                "Product index cache": get_product_index_cache().statistics,
+            },
+        )
+    )
+    yield
+    statistics_log.cancel()
+    await get_transaction_writer().close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(api_router)
@@ -1,14 +1,40 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from typing import TypedDict
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    Index,
+    and_,
+    or_,
+    func,
+    select,
+    delete,
+    insert,
+    update,
+    literal,
+    union_all,
+)
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.sql import ColumnElement, Select, Subquery
+from typing import Any, Callable, Literal, Mapping, NotRequired, TypedDict
+from collections import defaultdict
+import threading
+import weakref
 from sqlalchemy.ext.declarative import declarative_base
 import logging
 from fastapi import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased, column_property
 from datetime import datetime
-from typing import List
+from typing import List, AsyncIterator, Iterator
+from sqlalchemy.engine import Row, RowMapping
 
-from core.database import DataBase
+from core.cache import LRUCacheBackend
+from core.config.config import Config
+from core.database import DataBase, AsyncDataBase
 from core.error import (
+    DatabaseBatchTransactionError,
     DatabaseCreateTransactionError,
     DatabaseQueryTransactionError,
     DatabaseUpdateTransactionNotFoundError,
@@ -17,15 +43,26 @@ from core.error import (
     DatabaseDeleteTransactionError,
 )
 
-# TODO: add new database item
-"""
-item
+Base = declarative_base()
+
+# product_name -> item_id of committed items per database engine. Items are
+# never renamed or deleted, so entries never go stale and only need a size bound.
+_item_caches: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_item_caches_lock = threading.Lock()
 
-id
-product_name
-quantity
-user_name
-"""
+
+def _item_cache(session: Session) -> LRUCacheBackend:
+    """
+    Return the product name cache of the database session is bound to.
+    """
+    engine = session.get_bind()
+    cache = _item_caches.get(engine)
+    if cache is None:
+        with _item_caches_lock:
+            cache = _item_caches.setdefault(
+                engine, LRUCacheBackend(Config.CACHE_ITEM_ENTRIES, ttl=float("inf"))
+            )
+    return cache
 
 
 class TransactionData(TypedDict):
@@ -63,9 +100,51 @@ class TransactionData(TypedDict):
     date: datetime
 
 
-class QueryTransactionData(TypedDict):
+class TransactionFilter(TypedDict, total=False):
+    """
+    A class to represent the range, list and prefix conditions of a transaction
+    query, every given condition must hold
+
+    date_from : datetime
+        Only records at or after this date.
+
+    date_to : datetime
+        Only records before this date.
+
+    min_total_cost : float
+        Only records costing at least this amount.
+
+    max_total_cost : float
+        Only records costing at most this amount.
+
+    categories : list[str]
+        Only records in one of these categories.
+
+    pay_bys : list[str]
+        Only records paid by one of these methods.
+
+    product_name_prefix : str
+        Only records whose product name starts with this text, ignoring case.
+
+    sort : list[str]
+        The SORT_KEYS to order by, a leading "-" sorts descending.
+        The default is newest first.
+    """
+
+    date_from: datetime
+    date_to: datetime
+    min_total_cost: float
+    max_total_cost: float
+    categories: list[str]
+    pay_bys: list[str]
+    product_name_prefix: str
+    sort: list[str]
+
+
+class QueryTransactionData(TransactionFilter):
     """
-    A class to represent data which query transaction record need
+    A class to represent data which query transaction record need,
+    with the conditions of TransactionFilter
 
     user_id : int|None
         The ID of the user associated with the transaction.
@@ -74,13 +153,21 @@ class QueryTransactionData(TypedDict):
         The category of the transaction (e.g., traffic, entertainment).
 
     product_name : str|None
-        The name of the product involved in the transaction.
+        The name of the product involved in the transaction, ignoring case.
 
     pay_by : str|None
         The method of payment (e.g., cash, credit card).
 
     date : datetime|None
         The date and time when the transaction occurred.
+
+    seek_after : tuple|None
+        Only return records after this key in the order of sort, newest first by
+        default, used for keyset pagination. The key is the value of every sort
+        key followed by the transaction_id, see TransactionDatabase.sort_key.
+
+    limit : int|None
+        The maximum number of records to return, newest first.
     """
 
     user_id: int | None
@@ -88,6 +175,108 @@ class QueryTransactionData(TypedDict):
     product_name: str | None
     pay_by: str | None
     date: DateTime | None
+    seek_after: tuple | None
+    limit: int | None
+
+
+class PatchTransactionData(TypedDict, total=False):
+    """
+    A class to represent the columns of a transaction record to update,
+    columns that are left out keep their value
+
+    category : str|None
+        The category of the transaction (e.g., traffic, entertainment).
+
+    product_name : str
+        The name of the product involved in the transaction.
+
+    quantity : int
+        The number of items involved in the transaction.
+
+    total_cost : float
+        The total amount for the transaction.
+
+    pay_by : str
+        The method of payment (e.g., cash, credit card).
+
+    date : datetime
+        The date and time when the transaction occurred.
+    """
+
+    category: str | None
+    product_name: str
+    quantity: int
+    total_cost: float
+    pay_by: str
+    date: datetime
+
+
+# The transaction columns the monthly_spending rollup depends on.
+ROLLUP_COLUMNS = frozenset({"category", "pay_by", "total_cost", "date"})
+
+
+class TransactionOperation(TypedDict):
+    """
+    A class to represent one operation of a transaction batch
+
+    action : str
+        One of "create", "update" or "delete".
+
+    transaction_id : int
+        The ID of the transaction to update or delete.
+
+    data : TransactionData
+        The transaction data to create or to update with.
+    """
+
+    action: Literal["create", "update", "delete"]
+    transaction_id: NotRequired[int]
+    data: NotRequired[TransactionData]
+
+
+# The columns of a transaction exported to the user, in export order.
+EXPORT_COLUMNS = (
+    "transaction_id",
+    "category",
+    "product_name",
+    "quantity",
+    "total_cost",
+    "pay_by",
+    "date",
+)
+
+# The columns a TransactionFilter can sort by.
+SORT_KEYS = ("date", "total_cost", "quantity", "product_name", "category", "pay_by")
+DEFAULT_SORT = ["-date"]
+
+SUMMARY_PERIODS = ("day", "week", "month")
+# Group keys that can be answered from the monthly_spending rollup.
+ROLLUP_GROUPS = ("month", "category", "pay_by")
+
+
+class SummaryQueryData(TypedDict):
+    """
+    A class to represent data which summarize transaction records need
+
+    user_id : int
+        The ID of the user whose transactions are summarized.
+
+    group_by : list[str]
+        The keys to group by, any of "category", "pay_by" and
+        at most one period of "day", "week" or "month".
+        Weeks start on Monday and are labeled with the date of that Monday.
+
+    start : datetime|None
+        Only include transactions on or after start.
+
+    end : datetime|None
+        Only include transactions before end.
+    """
+
+    user_id: int
+    group_by: list[str]
+    start: datetime | None
+    end: datetime | None
 
 
 class TransactionDatabase(DataBase):
@@ -98,15 +287,61 @@ class TransactionDatabase(DataBase):
     --------
     create(transaction_data):
         Create a transaction record from transaction_data in the database.
+    create_many(transactions):
+        Create the transaction records of any users with one commit.
     query(query_data):
         Query transaction records that match all conditions provided in query_data.
+    query_rows(query_data):
+        Query the exported columns of the matching records as plain row mappings.
     update(transaction_id , update_data)
         Update a transaction record identified by transaction_id using update_data.
     delete(transaction_id)
         Delete the transaction record identified by transaction_id.
+    summarize(summary_data)
+        Sum and count transaction records grouped as requested in summary_data.
+    rebuild_rollup(user_id)
+        Recompute the monthly_spending rollup from the transaction records.
+    check_rollup(user_id)
+        Return the monthly_spending rows that differ from the transaction records.
+    archive_batch(before, batch_size)
+        Move a batch of records older than before to the archive table.
+    apply_batch(user_id, operations)
+        Apply create, update and delete operations of a user in one database transaction.
+    stream(user_id, batch_size)
+        Iterate over every transaction record of a user in batches of plain rows.
+    version(user_id)
+        Return the data version of a user, bumped by every write.
     """
 
-    class Transaction(declarative_base()):
+    class Item(Base):
+        """
+        A class to represent table "items" data structure, the dictionary of
+        product names referenced by the transactions
+
+        item_id : int
+            The unique identifier for the product name (Primary Key).
+
+        product_name : str
+            The product name, unique and compared case sensitively.
+        """
+
+        __tablename__ = "items"
+
+        item_id = Column(Integer, primary_key=True, autoincrement=True)
+        product_name = Column(
+            String(255).with_variant(
+                mysql.VARCHAR(255, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"
+            ),
+            unique=True,
+            nullable=False,
+        )
+
+    # Joined to the queries sorted by product name, an alias so the IN subqueries
+    # of the product name filters and the product_name column property do not
+    # correlate to it.
+    SortItem = aliased(Item, name="sort_items")
+
+    class Transaction(Base):
         """
         A class to represent table "transactions" data structure
 
@@ -119,8 +354,12 @@ class TransactionDatabase(DataBase):
         category : str
             The category of the transaction (e.g., traffic, entertainment).
 
+        item_id : int
+            The ID of the product name in table "items".
+
         product_name : str
-            The name of the product involved in the transaction.
+            The name of the product involved in the transaction, read only,
+            loaded from table "items".
 
         quantity : int
             The number of items involved in the transaction.
@@ -138,145 +377,1765 @@ class TransactionDatabase(DataBase):
         """
 
         __tablename__ = "transactions"
+        # Keep in sync with the migrations in core/migration.py.
+        __table_args__ = (
+            Index("ix_transactions_user_date", "user_id", "date"),
+            Index("ix_transactions_user_category_date", "user_id", "category", "date"),
+            Index("ix_transactions_user_pay_by_date", "user_id", "pay_by", "date"),
+            Index("ix_transactions_user_item", "user_id", "item_id"),
+        )
 
         transaction_id = Column(Integer, primary_key=True, autoincrement=True)
         user_id = Column(Integer, nullable=False)
         category = Column(String(100))
-        product_name = Column(String(255), nullable=False)
+        item_id = Column(Integer, nullable=False)
         quantity = Column(Integer, nullable=False, default=1)
         total_cost = Column(Float, nullable=False)
         pay_by = Column(String(255), nullable=False, default="cash")
         date = Column(DateTime, nullable=False)
 
         def to_dict(self):
-            return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+            return {name: getattr(self, name) for name in ("user_id", *EXPORT_COLUMNS)}
 
-    def create(self, transaction_data: TransactionData):
+    # A primary key lookup per returned row, evaluated after WHERE and LIMIT.
+    Transaction.product_name = column_property(
+        select(Item.product_name)
+        .where(Item.item_id == Transaction.item_id)
+        .scalar_subquery()
+    )
+
+    class TransactionArchive(Base):
+        """
+        A class to represent table "transactions_archive" data structure, the
+        transactions older than the archive horizon moved out of "transactions"
+        by archive_batch. The columns are the same as Transaction and
+        transaction_id keeps its value, so a record is in exactly one of the tables.
+        """
+
+        __tablename__ = "transactions_archive"
+        # Keep in sync with the migrations in core/migration.py.
+        __table_args__ = (
+            Index("ix_transactions_archive_user_date", "user_id", "date"),
+            Index("ix_transactions_archive_user_item", "user_id", "item_id"),
+        )
+
+        transaction_id = Column(Integer, primary_key=True, autoincrement=False)
+        user_id = Column(Integer, nullable=False)
+        category = Column(String(100))
+        item_id = Column(Integer, nullable=False)
+        quantity = Column(Integer, nullable=False, default=1)
+        total_cost = Column(Float, nullable=False)
+        pay_by = Column(String(255), nullable=False, default="cash")
+        date = Column(DateTime, nullable=False)
+
+    TransactionArchive.product_name = column_property(
+        select(Item.product_name)
+        .where(Item.item_id == TransactionArchive.item_id)
+        .scalar_subquery()
+    )
+
+    class MonthlySpending(Base):
+        """
+        A class to represent table "monthly_spending" data structure,
+        the per month totals of the transactions kept up to date by every write.
+
+        user_id : int
+            The ID of the user associated with the transactions.
+
+        month : str
+            The month of the transactions in "YYYY-MM" format.
+
+        category : str
+            The category of the transactions, "" for transactions without category.
+
+        pay_by : str
+            The method of payment of the transactions.
+
+        total_cost : float
+            The summed total_cost of the transactions.
+
+        count : int
+            The number of transactions.
         """
-        Insert a transaction record into the database.
+
+        __tablename__ = "monthly_spending"
+
+        user_id = Column(Integer, primary_key=True, autoincrement=False)
+        month = Column(String(7), primary_key=True)
+        category = Column(String(100), primary_key=True)
+        pay_by = Column(String(255), primary_key=True)
+        total_cost = Column(Float, nullable=False, default=0)
+        count = Column(Integer, nullable=False, default=0)
+
+    class TransactionVersion(Base):
+        """
+        A class to represent table "transaction_versions" data structure,
+        a counter bumped by every write to the transactions of a user.
+
+        user_id : int
+            The ID of the user (Primary Key).
+
+        version : int
+            The number of writes to the transactions of the user.
+        """
+
+        __tablename__ = "transaction_versions"
+
+        user_id = Column(Integer, primary_key=True, autoincrement=False)
+        version = Column(Integer, nullable=False, default=0)
+
+    @staticmethod
+    def _upsert_add(
+        session: Session, table, key: list[str], rows: dict | list[dict] | Select
+    ) -> None:
+        """
+        Insert rows, or add their non key columns to the existing row with the
+        same key, in one atomic statement.
 
         Args:
-            transaction_data (TransactionData) : The transaction data to be inserted.
+            key (list[str]) : The primary key columns of table.
+            rows (dict|list[dict]|Select) : One row of values, rows with the same
+                columns run as one executemany, or a SELECT of rows run by the
+                database whose labels are column names of table.
         """
-        session = self.session()
-        try:
-            new_transaction_record = self.Transaction(
-                user_id=transaction_data["user_id"],
-                category=transaction_data["category"],
-                product_name=transaction_data["product_name"],
-                quantity=transaction_data["quantity"],
-                total_cost=transaction_data["total_cost"],
-                pay_by=transaction_data["pay_by"],
-                date=transaction_data["date"],
+        dialect_insert = (
+            mysql.insert
+            if session.get_bind().dialect.name == "mysql"
+            else sqlite.insert
+        )
+        parameters = None
+        if isinstance(rows, dict):
+            statement = dialect_insert(table).values(**rows)
+            names = list(rows)
+        elif isinstance(rows, list):
+            statement = dialect_insert(table)
+            names = list(rows[0])
+            parameters = rows
+        else:
+            names = [column.name for column in rows.selected_columns]
+            statement = dialect_insert(table).from_select(names, rows)
+        added = [name for name in names if name not in key]
+        if session.get_bind().dialect.name == "mysql":
+            statement = statement.on_duplicate_key_update(
+                **{name: table.c[name] + statement.inserted[name] for name in added}
             )
-            session.add(new_transaction_record)
-            session.commit()
-        except SQLAlchemyError as e:
-            session.rollback()
-            logging.error("Error occurred while creating transaction record: %s", e)
-            raise DatabaseCreateTransactionError from e
-        finally:
-            session.close()
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=key,
+                set_={name: table.c[name] + statement.excluded[name] for name in added},
+            )
+        session.execute(statement, parameters)
 
-    def query(self, query_data: TransactionData) -> List[Transaction]:
+    @classmethod
+    def _bump_version(cls, session: Session, user_id: int) -> None:
         """
-        Query transaction records from the database that match the given conditions.
+        Increase the data version of user_id, in the same database transaction
+        as the write so readers never see new data with an old version.
+        """
+        cls._upsert_add(
+            session,
+            cls.TransactionVersion.__table__,
+            ["user_id"],
+            {"user_id": user_id, "version": 1},
+        )
+
+    @classmethod
+    def _version(cls, session: Session, user_id: int) -> int:
+        """
+        Return the data version of user_id, 0 before the first write.
+        """
+        version = session.scalar(
+            select(cls.TransactionVersion.version).where(
+                cls.TransactionVersion.user_id == user_id
+            )
+        )
+        return version or 0
+
+    @classmethod
+    def _apply_rollup(
+        cls,
+        session: Session,
+        user_id: int,
+        date: datetime,
+        category: str | None,
+        pay_by: str,
+        total_cost: float,
+        count: int,
+    ) -> None:
+        """
+        Add total_cost and count to the monthly_spending row of the transaction
+        with a single upsert, so concurrent writers never lose an update.
+        """
+        table = cls.MonthlySpending.__table__
+        key = {
+            "user_id": user_id,
+            "month": date.strftime("%Y-%m"),
+            "category": category or "",
+            "pay_by": pay_by,
+        }
+        cls._upsert_add(
+            session, table, list(key), dict(key, total_cost=total_cost, count=count)
+        )
+        if count < 0:
+            session.execute(
+                delete(table).where(
+                    *[table.c[name] == value for name, value in key.items()],
+                    table.c.count <= 0,
+                )
+            )
+
+    @classmethod
+    def _rollup_where(
+        cls, session: Session, condition: ColumnElement, sign: int
+    ) -> None:
+        """
+        Add (sign 1) or subtract (sign -1) the transactions matching condition
+        to monthly_spending with one INSERT ... SELECT upsert, so the database
+        reads the current values instead of a round trip to fetch them.
+        """
+        transaction = cls.Transaction
+        cls._upsert_add(
+            session,
+            cls.MonthlySpending.__table__,
+            ["user_id", "month", "category", "pay_by"],
+            select(
+                transaction.user_id,
+                cls._period(session, "month").label("month"),
+                func.coalesce(transaction.category, "").label("category"),
+                transaction.pay_by,
+                (transaction.total_cost * sign).label("total_cost"),
+                literal(sign).label("count"),
+            ).where(condition),
+        )
+
+    @classmethod
+    def _item_ids(cls, session: Session, names: list[str]) -> dict[str, int]:
+        """
+        Return the item_id of every product name, creating the missing items.
+        Names are served from _item_cache first, the rest costs one SELECT and,
+        for new names, one INSERT and one more SELECT.
+        """
+        cache = _item_cache(session)
+        ids = {}
+        missing = []
+        for name in set(names):
+            item_id = cache.get(name)
+            if item_id is None:
+                missing.append(name)
+            else:
+                ids[name] = item_id
+        if not missing:
+            return ids
+
+        item = cls.Item
+        # Items created by this session are not committed yet, a rollback would
+        # leave their ids dangling in the cache.
+        created = session.info.setdefault("created_items", set())
+        statement = select(item.product_name, item.item_id).where(
+            item.product_name.in_(missing)
+        )
+        for name, item_id in session.execute(statement):
+            ids[name] = item_id
+            if name not in created:
+                cache.set(name, item_id)
+
+        new_names = [name for name in missing if name not in ids]
+        if new_names:
+            if session.get_bind().dialect.name == "mysql":
+                insert_item = mysql.insert(item).on_duplicate_key_update(
+                    item_id=item.item_id
+                )
+            else:
+                insert_item = sqlite.insert(item).on_conflict_do_nothing(
+                    index_elements=["product_name"]
+                )
+            session.execute(insert_item, [{"product_name": name} for name in new_names])
+            created.update(new_names)
+            ids.update(
+                session.execute(
+                    select(item.product_name, item.item_id).where(
+                        item.product_name.in_(new_names)
+                    )
+                ).all()
+            )
+        return ids
+
+    @staticmethod
+    def _move(
+        session: Session,
+        source,
+        target,
+        condition: ColumnElement,
+        limit: int | None = None,
+    ) -> int:
+        """
+        Move the rows of source matching condition to target, which has the same
+        columns, with one INSERT ... SELECT and one DELETE. The rows are locked
+        first, so a concurrent move or write can not copy them twice.
 
         Args:
-            query_data (TransactionData) : The data used to filter transaction records.
+            source (Table) : The table to move the rows from.
+            target (Table) : The table to move the rows to.
+            condition (ColumnElement) : The condition on the columns of source.
+            limit (int|None) : The maximum number of rows, lowest transaction_id first.
 
         Returns:
-            list[Transaction]: A list of transaction records that match the conditions specified in `query_data`.
+            int: The number of moved rows.
         """
-        session = self.session()
-        try:
-            query = session.query(self.Transaction)
-            if query_data.get("user_id") is not None:
-                query = query.filter(self.Transaction.user_id == query_data["user_id"])
+        transaction_ids = session.scalars(
+            select(source.c.transaction_id)
+            .where(condition)
+            .order_by(source.c.transaction_id)
+            .limit(limit)
+            .with_for_update()
+        ).all()
+        if not transaction_ids:
+            return 0
+        names = [column.name for column in source.columns]
+        moved = source.c.transaction_id.in_(transaction_ids)
+        session.execute(
+            insert(target).from_select(
+                names, select(*[source.c[name] for name in names]).where(moved)
+            )
+        )
+        session.execute(delete(source).where(moved))
+        return len(transaction_ids)
+
+    @classmethod
+    def _unarchive(
+        cls, session: Session, transaction_ids: list[int], user_id: int | None = None
+    ) -> int:
+        """
+        Move archived records back to the hot table before they are written,
+        so updates and deletes only ever touch "transactions". The archive job
+        moves them out again once they are past the horizon.
+
+        Returns:
+            int: The number of records moved back.
+        """
+        archive = cls.TransactionArchive.__table__
+        condition = archive.c.transaction_id.in_(transaction_ids)
+        if user_id is not None:
+            condition = and_(condition, archive.c.user_id == user_id)
+        return cls._move(session, archive, cls.Transaction.__table__, condition)
+
+    @classmethod
+    def _archive_batch(cls, session: Session, before: datetime, batch_size: int) -> int:
+        """
+        Move at most batch_size records dated before before to the archive table.
+        The monthly_spending rollup and the data versions do not change, the
+        records are only stored elsewhere.
+        """
+        transactions = cls.Transaction.__table__
+        # The newest record stays, the hot table must keep its highest
+        # transaction_id or sqlite and MySQL before 8.0 hand it out again.
+        newest = select(func.max(transactions.c.transaction_id)).scalar_subquery()
+        return cls._move(
+            session,
+            transactions,
+            cls.TransactionArchive.__table__,
+            and_(transactions.c.date < before, transactions.c.transaction_id < newest),
+            batch_size,
+        )
+
+    @classmethod
+    def _insert(cls, session: Session, transaction_data: TransactionData) -> None:
+        """
+        Add a transaction record to session.
+        """
+        cls._apply_rollup(
+            session,
+            transaction_data["user_id"],
+            transaction_data["date"],
+            transaction_data["category"],
+            transaction_data["pay_by"],
+            transaction_data["total_cost"],
+            1,
+        )
+        cls._bump_version(session, transaction_data["user_id"])
+        product_name = transaction_data["product_name"]
+        new_transaction_record = cls.Transaction(
+            user_id=transaction_data["user_id"],
+            category=transaction_data["category"],
+            item_id=cls._item_ids(session, [product_name])[product_name],
+            quantity=transaction_data["quantity"],
+            total_cost=transaction_data["total_cost"],
+            pay_by=transaction_data["pay_by"],
+            date=transaction_data["date"],
+        )
+        session.add(new_transaction_record)
 
-            if query_data.get("category") is not None:
-                query = query.filter(
-                    self.Transaction.category == query_data["category"]
+    @classmethod
+    def _where(cls, query, query_data: QueryTransactionData, model=None):
+        """
+        Apply the conditions of query_data to an ORM Query or a Select of model,
+        Transaction by default.
+        """
+        transaction = cls.Transaction if model is None else model
+        if query_data.get("user_id") is not None:
+            query = query.filter(transaction.user_id == query_data["user_id"])
+
+        if query_data.get("category") is not None:
+            query = query.filter(transaction.category == query_data["category"])
+
+        # items.product_name has a binary collation on MySQL, both name filters
+        # compare lower cased names, like the casefolded product name suggestions.
+        # That scans items rather than its unique index, once per query.
+        if query_data.get("product_name") is not None:
+            query = query.filter(
+                transaction.item_id.in_(
+                    select(cls.Item.item_id).where(
+                        func.lower(cls.Item.product_name)
+                        == func.lower(query_data["product_name"])
+                    )
+                )
+            )
+
+        if query_data.get("pay_by") is not None:
+            query = query.filter(transaction.pay_by == query_data["pay_by"])
+
+        if query_data.get("date") is not None:
+            query = query.filter(transaction.date == query_data["date"])
+
+        if query_data.get("date_from") is not None:
+            query = query.filter(transaction.date >= query_data["date_from"])
+
+        if query_data.get("date_to") is not None:
+            query = query.filter(transaction.date < query_data["date_to"])
+
+        if query_data.get("min_total_cost") is not None:
+            query = query.filter(transaction.total_cost >= query_data["min_total_cost"])
+
+        if query_data.get("max_total_cost") is not None:
+            query = query.filter(transaction.total_cost <= query_data["max_total_cost"])
+
+        if query_data.get("categories"):
+            query = query.filter(transaction.category.in_(query_data["categories"]))
+
+        if query_data.get("pay_bys"):
+            query = query.filter(transaction.pay_by.in_(query_data["pay_bys"]))
+
+        if query_data.get("product_name_prefix"):
+            # LIKE 'prefix%' with % and _ escaped, which can still use an index.
+            query = query.filter(
+                transaction.item_id.in_(
+                    select(cls.Item.item_id).where(
+                        func.lower(cls.Item.product_name).startswith(
+                            query_data["product_name_prefix"].lower(), autoescape=True
+                        )
+                    )
                 )
+            )
 
-            if query_data.get("product_name") is not None:
-                query = query.filter(
-                    self.Transaction.product_name == query_data["product_name"]
+        if query_data.get("seek_after") is not None:
+            query = query.filter(
+                cls._seek(
+                    query_data.get("sort") or DEFAULT_SORT,
+                    query_data["seek_after"],
+                    model,
                 )
+            )
+        return query
 
-            if query_data.get("pay_by") is not None:
-                query = query.filter(self.Transaction.pay_by == query_data["pay_by"])
+    @classmethod
+    def _order_limit(cls, query, query_data: QueryTransactionData, model=None):
+        """
+        Apply the order and limit of query_data to an ORM Query or a Select of model.
+        """
+        if query_data.get("sort"):
+            query = query.order_by(*cls._order_by(query_data["sort"], model))
+        elif (
+            query_data.get("seek_after") is not None
+            or query_data.get("limit") is not None
+        ):
+            query = query.order_by(*cls._order_by(DEFAULT_SORT, model))
 
-            if query_data.get("date") is not None:
-                query = query.filter(self.Transaction.date == query_data["date"])
-            return query.all()
-        except SQLAlchemyError as e:
-            session.rollback()
-            logging.error("Error occurred while query transaction record: %s", e)
-            raise DatabaseQueryTransactionError from e
-        finally:
-            session.close()
+        if query_data.get("limit") is not None:
+            query = query.limit(query_data["limit"])
+        return query
 
-    def update(self, transaction_id: int, update_data: TransactionData) -> bool:
+    @classmethod
+    def _insert_many(
+        cls, session: Session, transactions: list[TransactionData]
+    ) -> None:
         """
-        Update the transaction record in the database that matches the given transaction_id.
+        Add the transaction records of any users to session with one executemany
+        INSERT, one executemany upsert of the changed monthly_spending rows and one
+        of the versions of the users. The rows are upserted in key order, so
+        concurrent writers lock them in the same order.
+        """
+        item_ids = cls._item_ids(
+            session, [transaction["product_name"] for transaction in transactions]
+        )
+        rollup = defaultdict(lambda: [0.0, 0])
+        rows = []
+        for transaction_data in transactions:
+            row = dict(transaction_data)
+            row["item_id"] = item_ids[row.pop("product_name")]
+            rows.append(row)
+            date = row["date"]
+            key = (
+                row["user_id"],
+                datetime(date.year, date.month, 1),
+                row["category"] or "",
+                row["pay_by"],
+            )
+            rollup[key][0] += row["total_cost"]
+            rollup[key][1] += 1
 
-        Args:
-            transaction_id (int) : The ID used to filter transaction records.
-            update_data (TransactionData): The data used to update transaction record.
+        session.execute(insert(cls.Transaction), rows)
+        cls._upsert_add(
+            session,
+            cls.MonthlySpending.__table__,
+            ["user_id", "month", "category", "pay_by"],
+            [
+                {
+                    "user_id": user_id,
+                    "month": month.strftime("%Y-%m"),
+                    "category": category,
+                    "pay_by": pay_by,
+                    "total_cost": total_cost,
+                    "count": count,
+                }
+                for (user_id, month, category, pay_by), (total_cost, count) in sorted(
+                    rollup.items()
+                )
+            ],
+        )
+        cls._upsert_add(
+            session,
+            cls.TransactionVersion.__table__,
+            ["user_id"],
+            [
+                {"user_id": user_id, "version": 1}
+                for user_id in sorted({row["user_id"] for row in rows})
+            ],
+        )
+
+    @classmethod
+    def _filter(cls, query, query_data: QueryTransactionData, model=None):
+        """
+        Apply the conditions, order and limit of query_data to an ORM Query or a Select.
         """
+        query = cls._join_sort(query, query_data, model)
+        query = cls._where(query, query_data, model)
+        return cls._order_limit(query, query_data, model)
 
-        session = self.session()
-        query = session.query(self.Transaction)
-        try:
-            update_record = query.filter(
-                self.Transaction.transaction_id == transaction_id
-            ).first()
-            if update_record:
-                update_record.user_id = update_data["user_id"]
-                update_record.category = update_data["category"]
-                update_record.product_name = update_data["product_name"]
-                update_record.quantity = update_data["quantity"]
-                update_record.total_cost = update_data["total_cost"]
-                update_record.pay_by = update_data["pay_by"]
-                update_record.date = update_data["date"]
+    @classmethod
+    def _join_sort(cls, query, query_data: QueryTransactionData, model=None):
+        """
+        Join SortItem to an ORM Query or a Select of model when query_data sorts by
+        product name, so the order and seek read the joined name instead of
+        running the product_name subquery for every row.
+        """
+        sort = query_data.get("sort") or []
+        if "product_name" not in [key.removeprefix("-") for key in sort]:
+            return query
+        transaction = cls.Transaction if model is None else model
+        return query.join(cls.SortItem, cls.SortItem.item_id == transaction.item_id)
+
+    @classmethod
+    def _sort_columns(
+        cls, sort: list[str], model=None
+    ) -> list[tuple[ColumnElement, bool]]:
+        """
+        Return the (column, descending) pairs of sort keys, with transaction_id as
+        the last key so the order is total. A NULL category sorts as "", so every
+        key of a record can be compared in a seek condition. The product name is
+        read from SortItem, see _join_sort.
+        """
+        transaction = cls.Transaction if model is None else model
+        columns = []
+        for key in sort:
+            name = key.removeprefix("-")
+            if name == "product_name":
+                column = cls.SortItem.product_name
             else:
-                raise DatabaseUpdateTransactionNotFoundError
-            session.commit()
-        except SQLAlchemyError as e:
-            session.rollback()
-            logging.error("Error occurred while updating transaction record: %s", e)
-            raise DatabaseUpdateTransactionError from e
-        finally:
-            session.close()
+                column = getattr(transaction, name)
+            if name == "category":
+                column = func.coalesce(column, "")
+            columns.append((column, key.startswith("-")))
+        columns.append((transaction.transaction_id, sort[-1].startswith("-")))
+        return columns
 
-    def delete(self, transaction_id: int) -> bool:
+    @classmethod
+    def _order_by(cls, sort: list[str], model=None) -> list[ColumnElement]:
         """
-        Delete the transaction record in the database that matches the given transaction_id.
+        Return the ORDER BY clauses of sort keys, with transaction_id as the
+        last key so the order is total.
+        """
+        return [
+            column.desc() if descending else column.asc()
+            for column, descending in cls._sort_columns(sort, model)
+        ]
+
+    @classmethod
+    def _seek(cls, sort: list[str], seek_after: tuple, model=None) -> ColumnElement:
+        """
+        Return the condition of the records after the key seek_after in the
+        order of sort, (k1 > v1) OR (k1 = v1 AND ((k2 > v2) OR ...)) with > read
+        as < for a descending key.
+        """
+        condition = None
+        for (column, descending), value in reversed(
+            list(zip(cls._sort_columns(sort, model), seek_after))
+        ):
+            after = column < value if descending else column > value
+            if condition is not None:
+                after = or_(after, and_(column == value, condition))
+            condition = after
+        return condition
+
+    @staticmethod
+    def sort_key(sort: list[str], record: Mapping) -> tuple:
+        """
+        Return the key of a record in the order of sort, the seek_after of the
+        page that follows it.
 
         Args:
-            transaction_id (int) : The ID used to filter transaction records.
+            sort (list[str]) : The sort keys of the query.
+            record (Mapping) : A record with the sort columns and transaction_id.
+
+        Returns:
+            tuple: The values of the sort keys and the transaction_id.
         """
-        session = self.session()
-        try:
-            transaction = (
-                session.query(self.Transaction)
-                .filter(self.Transaction.transaction_id == transaction_id)
-                .first()
-            )
-            if transaction:
-                session.delete(transaction)
-                session.commit()
-            else:
-                raise DatabaseDeleteTransactionNotFoundError
+        values = []
+        for key in sort:
+            name = key.removeprefix("-")
+            value = record[name]
+            values.append("" if name == "category" and value is None else value)
+        return (*values, record["transaction_id"])
 
-        except SQLAlchemyError as e:
-            session.rollback()
-            logging.error(
-                "Error occurred while deleting transaction record for transaction_id %d: %s",
-                transaction_id,
-                e,
-            )
-            raise DatabaseDeleteTransactionError from e
-        finally:
-            session.close()
+    @classmethod
+    def _archived_until(
+        cls, session: Session, user_id: int | None, since: datetime | None = None
+    ) -> datetime | None:
+        """
+        Return the date of the newest archived record of user_id, or None when
+        no archived record is at or after since, so the hot table alone has
+        every record the query can return. Without user_id it is datetime.max
+        as soon as anything is archived.
+        """
+        archive = cls.TransactionArchive
+        if user_id is None:
+            if session.scalar(select(archive.transaction_id).limit(1)) is None:
+                return None
+            return datetime.max
+        archived_until = session.scalar(
+            select(func.max(archive.date)).where(archive.user_id == user_id)
+        )
+        if archived_until is None or (since is not None and since > archived_until):
+            return None
+        return archived_until
+
+    @classmethod
+    def _union(cls, query_data: QueryTransactionData) -> Subquery:
+        """
+        Return the records matching query_data in the hot and the archive table
+        as one subquery with the columns of Transaction. Each table applies the
+        conditions, order and limit itself, so both read their own indexes and
+        contribute at most limit records.
+        """
+        names = [column.name for column in cls.Transaction.__table__.columns]
+        branches = []
+        for model in (cls.Transaction, cls.TransactionArchive):
+            branch = select(*[getattr(model, name) for name in names])
+            branches.append(select(cls._filter(branch, query_data, model).subquery()))
+        return union_all(*branches).subquery()
+
+    @classmethod
+    def _read(
+        cls,
+        session: Session,
+        query_data: QueryTransactionData,
+        build: Callable[[Any], Any],
+    ) -> list:
+        """
+        Run the query of the records matching query_data, reading the archive
+        table as well only when the requested dates reach the archived ones.
+
+        Args:
+            build (Callable) : Return the ORM Query or Select of the wanted columns
+                of an entity with the columns of Transaction.
+
+        Returns:
+            list: The ORM objects or row mappings of the query.
+        """
+
+        def run(query) -> list:
+            if isinstance(query, Select):
+                return session.execute(query).mappings().all()
+            return query.all()
+
+        since = query_data.get("date") or query_data.get("date_from")
+        archived_until = cls._archived_until(session, query_data.get("user_id"), since)
+        if archived_until is None:
+            return run(cls._filter(build(cls.Transaction), query_data))
+
+        limit = query_data.get("limit")
+        if limit and query_data.get("sort", DEFAULT_SORT) in (None, [], DEFAULT_SORT):
+            # A full newest first page whose oldest record is newer than every
+            # archived record can not contain an archived record.
+            records = run(cls._filter(build(cls.Transaction), query_data))
+            if len(records) == limit:
+                last = records[-1]
+                last_date = last["date"] if isinstance(last, RowMapping) else last.date
+                if last_date > archived_until:
+                    return records
+
+        entity = aliased(cls.Transaction, cls._union(query_data))
+        query = cls._join_sort(build(entity), query_data, entity)
+        return run(cls._order_limit(query, query_data, entity))
+
+    @classmethod
+    def _select(
+        cls, session: Session, query_data: QueryTransactionData
+    ) -> List[Transaction]:
+        """
+        Select the transaction records matching query_data with session.
+        """
+        return cls._read(session, query_data, session.query)
+
+    @classmethod
+    def _select_rows(
+        cls, session: Session, query_data: QueryTransactionData
+    ) -> List[RowMapping]:
+        """
+        Select only the EXPORT_COLUMNS of the records matching query_data,
+        without building Transaction objects.
+        """
+        return cls._read(
+            session,
+            query_data,
+            lambda entity: select(*[getattr(entity, name) for name in EXPORT_COLUMNS]),
+        )
+
+    @classmethod
+    def _patch(
+        cls,
+        session: Session,
+        transaction_id: int,
+        user_id: int,
+        patch_data: PatchTransactionData,
+    ) -> None:
+        """
+        Update the supplied columns of the transaction record identified by
+        transaction_id and owned by user_id with a single UPDATE statement.
+        The rollup is only touched when a column it sums by changes.
+        """
+        transaction = cls.Transaction
+        condition = and_(
+            transaction.transaction_id == transaction_id,
+            transaction.user_id == user_id,
+        )
+        changes_rollup = not ROLLUP_COLUMNS.isdisjoint(patch_data)
+        values = dict(patch_data)
+        if "product_name" in values:
+            product_name = values.pop("product_name")
+            values["item_id"] = cls._item_ids(session, [product_name])[product_name]
+        if changes_rollup:
+            cls._rollup_where(session, condition, -1)
+        result = session.execute(
+            update(transaction)
+            .where(condition)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            if cls._unarchive(session, [transaction_id], user_id):
+                return cls._patch(session, transaction_id, user_id, patch_data)
+            raise DatabaseUpdateTransactionNotFoundError
+        if changes_rollup:
+            cls._rollup_where(session, condition, 1)
+        cls._bump_version(session, user_id)
+
+    @classmethod
+    def _update(
+        cls, session: Session, transaction_id: int, update_data: TransactionData
+    ) -> None:
+        """
+        Replace every column of the transaction record identified by transaction_id
+        and owned by update_data["user_id"] with session.
+        """
+        cls._patch(
+            session,
+            transaction_id,
+            update_data["user_id"],
+            {
+                name: update_data[name]
+                for name in PatchTransactionData.__annotations__
+                if name in update_data
+            },
+        )
+
+    @classmethod
+    def _delete(cls, session: Session, transaction_id: int) -> None:
+        """
+        Delete the transaction record identified by transaction_id with a single
+        DELETE statement, after the database moved its values out of the rollup.
+        """
+        transaction = cls.Transaction
+        condition = transaction.transaction_id == transaction_id
+        cls._rollup_where(session, condition, -1)
+        cls._upsert_add(
+            session,
+            cls.TransactionVersion.__table__,
+            ["user_id"],
+            select(transaction.user_id, literal(1).label("version")).where(condition),
+        )
+        result = session.execute(
+            delete(transaction)
+            .where(condition)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            if cls._unarchive(session, [transaction_id]):
+                return cls._delete(session, transaction_id)
+            raise DatabaseDeleteTransactionNotFoundError
+
+    @classmethod
+    def _apply_batch(
+        cls, session: Session, user_id: int, operations: list[TransactionOperation]
+    ) -> list[str]:
+        """
+        Apply the operations of a user with session. The records to update or delete
+        are loaded with one SELECT, archived ones are moved back and loaded with
+        one more, the new records are written with one executemany INSERT and the
+        rollup with one upsert per changed month.
+
+        Returns:
+            list[str]: The result of every operation, "created", "updated", "deleted"
+            or "not_found" when the record does not exist or belongs to another user.
+        """
+        target_ids = {
+            operation["transaction_id"]
+            for operation in operations
+            if operation["action"] != "create"
+        }
+
+        def load(transaction_ids):
+            return {
+                record.transaction_id: record
+                for record in session.query(cls.Transaction).filter(
+                    cls.Transaction.user_id == user_id,
+                    cls.Transaction.transaction_id.in_(transaction_ids),
+                )
+            }
+
+        records = {}
+        if target_ids:
+            records = load(target_ids)
+            archived = target_ids - records.keys()
+            if archived and cls._unarchive(session, list(archived), user_id):
+                records.update(load(archived))
+
+        item_ids = cls._item_ids(
+            session,
+            [
+                operation["data"]["product_name"]
+                for operation in operations
+                if operation["action"] != "delete"
+            ],
+        )
+        rollup = defaultdict(lambda: [0.0, 0])
+
+        def count(date, category, pay_by, total_cost, sign):
+            key = (datetime(date.year, date.month, 1), category or "", pay_by)
+            rollup[key][0] += sign * total_cost
+            rollup[key][1] += sign
+
+        new_records = []
+        results = []
+        for operation in operations:
+            if operation["action"] == "create":
+                data = dict(operation["data"], user_id=user_id)
+                data["item_id"] = item_ids[data.pop("product_name")]
+                new_records.append(data)
+                count(
+                    data["date"],
+                    data["category"],
+                    data["pay_by"],
+                    data["total_cost"],
+                    1,
+                )
+                results.append("created")
+                continue
+
+            record = records.get(operation["transaction_id"])
+            if record is None:
+                results.append("not_found")
+                continue
+            count(record.date, record.category, record.pay_by, record.total_cost, -1)
+            if operation["action"] == "delete":
+                session.delete(record)
+                del records[record.transaction_id]
+                results.append("deleted")
+                continue
+            data = operation["data"]
+            record.category = data["category"]
+            record.item_id = item_ids[data["product_name"]]
+            record.quantity = data["quantity"]
+            record.total_cost = data["total_cost"]
+            record.pay_by = data["pay_by"]
+            record.date = data["date"]
+            count(record.date, record.category, record.pay_by, record.total_cost, 1)
+            results.append("updated")
+
+        if new_records:
+            session.execute(insert(cls.Transaction), new_records)
+        for (month, category, pay_by), (total_cost, delta) in rollup.items():
+            if delta or total_cost:
+                cls._apply_rollup(
+                    session, user_id, month, category, pay_by, total_cost, delta
+                )
+        if any(result != "not_found" for result in results):
+            cls._bump_version(session, user_id)
+        return results
+
+    @classmethod
+    def _stream_statement(
+        cls, user_id: int, batch_size: int, archived: bool = False
+    ) -> Select:
+        """
+        Return the statement selecting the EXPORT_COLUMNS of a user newest first,
+        fetched through a server side cursor batch_size rows at a time.
+        The archive table is included when the user has archived records.
+        """
+        transaction = cls.Transaction
+        if archived:
+            transaction = aliased(cls.Transaction, cls._union({"user_id": user_id}))
+        return (
+            select(*[getattr(transaction, name) for name in EXPORT_COLUMNS])
+            .where(transaction.user_id == user_id)
+            .order_by(*cls._order_by(DEFAULT_SORT, transaction))
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+
+    @classmethod
+    def _period(cls, session: Session, period: str, model=None) -> ColumnElement:
+        """
+        Return a SQL expression labeling the date of a transaction with its period.
+        """
+        date = (cls.Transaction if model is None else model).date
+        if session.get_bind().dialect.name == "mysql":
+            if period == "week":
+                return func.date_format(
+                    func.subdate(date, func.weekday(date)), "%Y-%m-%d"
+                )
+            return func.date_format(date, "%Y-%m-%d" if period == "day" else "%Y-%m")
+        if period == "week":
+            return func.strftime("%Y-%m-%d", date, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-%d" if period == "day" else "%Y-%m", date)
+
+    @staticmethod
+    def _is_month_start(date: datetime | None) -> bool:
+        """Return whether date is unset or the first instant of a month."""
+        return date is None or date == datetime(date.year, date.month, 1)
+
+    @classmethod
+    def _summarize(cls, session: Session, summary_data: SummaryQueryData) -> list[dict]:
+        """
+        Sum and count the transaction records of a user with a single GROUP BY statement,
+        over the archive table too when the date range reaches archived records.
+        Month aligned summaries by month, category and pay_by read the
+        monthly_spending rollup instead of the transaction records.
+        """
+        if (
+            all(key in ROLLUP_GROUPS for key in summary_data["group_by"])
+            and cls._is_month_start(summary_data.get("start"))
+            and cls._is_month_start(summary_data.get("end"))
+        ):
+            return cls._summarize_rollup(session, summary_data)
+
+        user_id, start, end = (
+            summary_data["user_id"],
+            summary_data.get("start"),
+            summary_data.get("end"),
+        )
+        transaction = cls.Transaction
+        if cls._archived_until(session, user_id, start) is not None:
+            records = cls._union(
+                {"user_id": user_id, "date_from": start, "date_to": end}
+            )
+            transaction = aliased(cls.Transaction, records)
+        groups = []
+        for key in summary_data["group_by"]:
+            if key in SUMMARY_PERIODS:
+                groups.append(cls._period(session, key, transaction).label(key))
+            else:
+                groups.append(getattr(transaction, key).label(key))
+
+        statement = select(
+            *groups,
+            func.sum(transaction.total_cost).label("total_cost"),
+            func.count().label("count"),
+        ).where(transaction.user_id == user_id)
+        if start is not None:
+            statement = statement.where(transaction.date >= start)
+        if end is not None:
+            statement = statement.where(transaction.date < end)
+        if groups:
+            statement = statement.group_by(*groups).order_by(*groups)
+
+        return [
+            dict(row, total_cost=row["total_cost"] or 0)
+            for row in session.execute(statement).mappings()
+        ]
+
+    @classmethod
+    def _summarize_rollup(
+        cls, session: Session, summary_data: SummaryQueryData
+    ) -> list[dict]:
+        """
+        Sum and count the monthly_spending rows of a user, the result is the same
+        as _summarize over the transaction records.
+        """
+        rollup = cls.MonthlySpending
+        groups = [getattr(rollup, key).label(key) for key in summary_data["group_by"]]
+        statement = select(
+            *groups,
+            func.sum(rollup.total_cost).label("total_cost"),
+            func.sum(rollup.count).label("count"),
+        ).where(rollup.user_id == summary_data["user_id"])
+        if summary_data.get("start") is not None:
+            statement = statement.where(
+                rollup.month >= summary_data["start"].strftime("%Y-%m")
+            )
+        if summary_data.get("end") is not None:
+            statement = statement.where(
+                rollup.month < summary_data["end"].strftime("%Y-%m")
+            )
+        if groups:
+            # Single statement updates and deletes can leave emptied rows behind.
+            statement = (
+                statement.group_by(*groups)
+                .having(func.sum(rollup.count) != 0)
+                .order_by(*groups)
+            )
+
+        result = []
+        for row in session.execute(statement).mappings():
+            group = dict(
+                row, total_cost=row["total_cost"] or 0, count=row["count"] or 0
+            )
+            if "category" in group:
+                group["category"] = group["category"] or None
+            result.append(group)
+        return result
+
+    @classmethod
+    def _product_counts(
+        cls, session: Session, user_id: int, limit: int
+    ) -> list[tuple[str, int]]:
+        """
+        Count the transactions of user_id per product name, read from the
+        (user_id, item_id) index, most frequent first.
+        """
+        transaction = cls.Transaction
+        if cls._archived_until(session, user_id) is not None:
+            transaction = aliased(cls.Transaction, cls._union({"user_id": user_id}))
+        counts = (
+            select(transaction.item_id, func.count().label("count"))
+            .where(transaction.user_id == user_id)
+            .group_by(transaction.item_id)
+            .subquery()
+        )
+        statement = (
+            select(cls.Item.product_name, counts.c.count)
+            .join(counts, counts.c.item_id == cls.Item.item_id)
+            .order_by(counts.c.count.desc(), cls.Item.product_name)
+            .limit(limit)
+        )
+        return [tuple(row) for row in session.execute(statement)]
+
+    @classmethod
+    def _rollup_source(cls, session: Session, user_id: int | None) -> Select:
+        """
+        Return the statement aggregating the transaction records, archived ones
+        included, the way monthly_spending stores them.
+        """
+        transaction = cls.Transaction
+        if cls._archived_until(session, user_id) is not None:
+            transaction = aliased(cls.Transaction, cls._union({"user_id": user_id}))
+        groups = [
+            transaction.user_id,
+            cls._period(session, "month", transaction).label("month"),
+            func.coalesce(transaction.category, "").label("category"),
+            transaction.pay_by,
+        ]
+        statement = select(
+            *groups,
+            func.sum(transaction.total_cost).label("total_cost"),
+            func.count().label("count"),
+        ).group_by(*groups)
+        if user_id is not None:
+            statement = statement.where(transaction.user_id == user_id)
+        return statement
+
+    @classmethod
+    def _rebuild_rollup(cls, session: Session, user_id: int | None = None) -> None:
+        """
+        Replace the monthly_spending rows of user_id, or of every user when
+        user_id is None, with totals recomputed from the transaction records.
+        """
+        table = cls.MonthlySpending.__table__
+        statement = delete(table)
+        if user_id is not None:
+            statement = statement.where(table.c.user_id == user_id)
+        session.execute(statement)
+        session.execute(
+            insert(table).from_select(
+                ["user_id", "month", "category", "pay_by", "total_cost", "count"],
+                cls._rollup_source(session, user_id),
+            )
+        )
+
+    @classmethod
+    def _check_rollup(
+        cls, session: Session, user_id: int | None = None, tolerance: float = 0.01
+    ) -> list[dict]:
+        """
+        Compare monthly_spending with the transaction records.
+        """
+        key_names = ("user_id", "month", "category", "pay_by")
+        expected = {
+            tuple(row[name] for name in key_names): row
+            for row in session.execute(cls._rollup_source(session, user_id)).mappings()
+        }
+        statement = select(cls.MonthlySpending.__table__).where(
+            cls.MonthlySpending.count != 0
+        )
+        if user_id is not None:
+            statement = statement.where(cls.MonthlySpending.user_id == user_id)
+        actual = {
+            tuple(row[name] for name in key_names): row
+            for row in session.execute(statement).mappings()
+        }
+
+        mismatches = []
+        for key in sorted(expected.keys() | actual.keys()):
+            want, have = expected.get(key), actual.get(key)
+            if (
+                want is not None
+                and have is not None
+                and want["count"] == have["count"]
+                and abs(want["total_cost"] - have["total_cost"]) <= tolerance
+            ):
+                continue
+            mismatch = dict(zip(key_names, key))
+            mismatch["expected_total_cost"] = want["total_cost"] if want else 0
+            mismatch["expected_count"] = want["count"] if want else 0
+            mismatch["total_cost"] = have["total_cost"] if have else 0
+            mismatch["count"] = have["count"] if have else 0
+            mismatches.append(mismatch)
+        return mismatches
+
+    def create(self, transaction_data: TransactionData):
+        """
+        Insert a transaction record into the database.
+
+        Args:
+            transaction_data (TransactionData) : The transaction data to be inserted.
+        """
+        session = self.session()
+        try:
+            self._insert(session, transaction_data)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while creating transaction record: %s", e)
+            raise DatabaseCreateTransactionError from e
+        finally:
+            session.close()
+
+    def create_many(self, transactions: list[TransactionData]) -> None:
+        """
+        Insert the transaction records of any users with one commit.
+
+        Args:
+            transactions (list[TransactionData]) : The transaction data to be inserted.
+        """
+        session = self.session()
+        try:
+            self._insert_many(session, transactions)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while creating transaction records: %s", e)
+            raise DatabaseCreateTransactionError from e
+        finally:
+            session.close()
+
+    def query(self, query_data: QueryTransactionData) -> List[Transaction]:
+        """
+        Query transaction records from the database that match the given conditions.
+
+        Args:
+            query_data (QueryTransactionData) : The data used to filter transaction records.
+
+        Returns:
+            list[Transaction]: A list of transaction records that match the conditions specified in `query_data`.
+        """
+        session = self.session()
+        try:
+            return self._select(session, query_data)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while query transaction record: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def query_rows(self, query_data: QueryTransactionData) -> List[RowMapping]:
+        """
+        Query the EXPORT_COLUMNS of the transaction records that match the given
+        conditions, skipping the ORM identity map and attribute instrumentation.
+
+        Args:
+            query_data (QueryTransactionData) : The data used to filter transaction records.
+
+        Returns:
+            list[RowMapping]: The matching records as read only mappings.
+        """
+        session = self.session()
+        try:
+            return self._select_rows(session, query_data)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while query transaction record: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def update(self, transaction_id: int, update_data: TransactionData) -> bool:
+        """
+        Update the transaction record in the database that matches the given transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+            update_data (TransactionData): The data used to update transaction record.
+        """
+
+        session = self.session()
+        try:
+            self._update(session, transaction_id, update_data)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while updating transaction record: %s", e)
+            raise DatabaseUpdateTransactionError from e
+        finally:
+            session.close()
+
+    def patch(
+        self, transaction_id: int, user_id: int, patch_data: PatchTransactionData
+    ) -> None:
+        """
+        Update only the given columns of the transaction record of user_id that
+        matches transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+            user_id (int) : The owner of the transaction record.
+            patch_data (PatchTransactionData): The columns to update.
+        """
+        session = self.session()
+        try:
+            self._patch(session, transaction_id, user_id, patch_data)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while updating transaction record: %s", e)
+            raise DatabaseUpdateTransactionError from e
+        finally:
+            session.close()
+
+    def delete(self, transaction_id: int) -> bool:
+        """
+        Delete the transaction record in the database that matches the given transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+        """
+        session = self.session()
+        try:
+            self._delete(session, transaction_id)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error(
+                "Error occurred while deleting transaction record for transaction_id %d: %s",
+                transaction_id,
+                e,
+            )
+            raise DatabaseDeleteTransactionError from e
+        finally:
+            session.close()
+
+    def summarize(self, summary_data: SummaryQueryData) -> list[dict]:
+        """
+        Sum and count the transaction records of a user, grouped in the database.
+
+        Args:
+            summary_data (SummaryQueryData) : The user, grouping and date range to summarize.
+
+        Returns:
+            list[dict]: One dict per group with the group keys, "total_cost" and "count".
+        """
+        session = self.session()
+        try:
+            return self._summarize(session, summary_data)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while summarize transaction record: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def apply_batch(
+        self, user_id: int, operations: list[TransactionOperation]
+    ) -> list[str]:
+        """
+        Apply create, update and delete operations of a user in one database transaction.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            operations (list[TransactionOperation]) : The operations to apply in order.
+
+        Returns:
+            list[str]: The result of every operation, "created", "updated", "deleted"
+            or "not_found".
+        """
+        session = self.session()
+        try:
+            results = self._apply_batch(session, user_id, operations)
+            session.commit()
+            return results
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while applying transaction batch: %s", e)
+            raise DatabaseBatchTransactionError from e
+        finally:
+            session.close()
+
+    def stream(self, user_id: int, batch_size: int = 1000) -> Iterator[list[Row]]:
+        """
+        Iterate over every transaction record of a user without loading them all.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            batch_size (int) : The number of rows fetched from the cursor at a time.
+
+        Returns:
+            Iterator[list[Row]]: Batches of rows with the EXPORT_COLUMNS, newest first.
+        """
+        session = self.session()
+        try:
+            archived = self._archived_until(session, user_id) is not None
+            result = session.execute(
+                self._stream_statement(user_id, batch_size, archived)
+            )
+            yield from result.partitions()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while streaming transaction record: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def version(self, user_id: int) -> int:
+        """
+        Return the data version of a user, bumped by every create, update and delete.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+
+        Returns:
+            int: The version, 0 before the first write.
+        """
+        session = self.session()
+        try:
+            return self._version(session, user_id)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while query transaction version: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def product_counts(self, user_id: int, limit: int) -> list[tuple[str, int]]:
+        """
+        Return the product names of a user with their number of transactions.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            limit (int) : The maximum number of names, the most frequent are kept.
+
+        Returns:
+            list[tuple[str, int]]: (product_name, count) pairs, most frequent first.
+        """
+        session = self.session()
+        try:
+            return self._product_counts(session, user_id, limit)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while query product names: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+    def rebuild_rollup(self, user_id: int | None = None) -> None:
+        """
+        Recompute the monthly_spending rollup from the transaction records
+        in one database transaction.
+
+        Args:
+            user_id (int|None) : The user to rebuild, every user when None.
+        """
+        session = self.session()
+        try:
+            self._rebuild_rollup(session, user_id)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while rebuilding monthly spending: %s", e)
+            raise DatabaseUpdateTransactionError from e
+        finally:
+            session.close()
+
+    def archive_batch(self, before: datetime, batch_size: int) -> int:
+        """
+        Move at most batch_size transaction records dated before before to the
+        archive table in one database transaction.
+
+        Args:
+            before (datetime) : Records older than this date are moved.
+            batch_size (int) : The maximum number of records to move.
+
+        Returns:
+            int: The number of moved records, 0 when nothing is left to archive.
+        """
+        session = self.session()
+        try:
+            moved = self._archive_batch(session, before, batch_size)
+            session.commit()
+            return moved
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while archiving transaction record: %s", e)
+            raise DatabaseUpdateTransactionError from e
+        finally:
+            session.close()
+
+    def check_rollup(self, user_id: int | None = None) -> list[dict]:
+        """
+        Compare the monthly_spending rollup with the transaction records.
+
+        Args:
+            user_id (int|None) : The user to check, every user when None.
+
+        Returns:
+            list[dict]: The rollup rows that differ, with the key, the stored
+            "total_cost" and "count" and the "expected_total_cost" and
+            "expected_count" computed from the transaction records.
+        """
+        session = self.session()
+        try:
+            return self._check_rollup(session, user_id)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logging.error("Error occurred while checking monthly spending: %s", e)
+            raise DatabaseQueryTransactionError from e
+        finally:
+            session.close()
+
+
+class AsyncTransactionDatabase(AsyncDataBase):
+    """
+    A class to represent a database of transaction for asyncio code.
+
+    It runs the same statements as TransactionDatabase through an AsyncSession,
+    so the connection is driven by the async driver on the event loop.
+
+    Methods:
+    --------
+    create(transaction_data):
+        Create a transaction record from transaction_data in the database.
+    create_many(transactions):
+        Create the transaction records of any users with one commit.
+    query(query_data):
+        Query transaction records that match all conditions provided in query_data.
+    query_rows(query_data):
+        Query the exported columns of the matching records as plain row mappings.
+    update(transaction_id , update_data)
+        Update a transaction record identified by transaction_id using update_data.
+    delete(transaction_id)
+        Delete the transaction record identified by transaction_id.
+    summarize(summary_data)
+        Sum and count transaction records grouped as requested in summary_data.
+    apply_batch(user_id, operations)
+        Apply create, update and delete operations of a user in one database transaction.
+    stream(user_id, batch_size)
+        Iterate over every transaction record of a user in batches of plain rows.
+    version(user_id)
+        Return the data version of a user, bumped by every write.
+    """
+
+    Transaction = TransactionDatabase.Transaction
+    Item = TransactionDatabase.Item
+    MonthlySpending = TransactionDatabase.MonthlySpending
+    TransactionVersion = TransactionDatabase.TransactionVersion
+
+    async def create(self, transaction_data: TransactionData):
+        """
+        Insert a transaction record into the database.
+
+        Args:
+            transaction_data (TransactionData) : The transaction data to be inserted.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(TransactionDatabase._insert, transaction_data)
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while creating transaction record: %s", e)
+                raise DatabaseCreateTransactionError from e
+
+    async def create_many(self, transactions: list[TransactionData]):
+        """
+        Insert the transaction records of any users with one commit.
+
+        Args:
+            transactions (list[TransactionData]) : The transaction data to be inserted.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(TransactionDatabase._insert_many, transactions)
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error(
+                    "Error occurred while creating transaction records: %s", e
+                )
+                raise DatabaseCreateTransactionError from e
+
+    async def query(self, query_data: QueryTransactionData) -> List[Transaction]:
+        """
+        Query transaction records from the database that match the given conditions.
+
+        Args:
+            query_data (QueryTransactionData) : The data used to filter transaction records.
+
+        Returns:
+            list[Transaction]: A list of transaction records that match the conditions specified in `query_data`.
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(TransactionDatabase._select, query_data)
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while query transaction record: %s", e)
+                raise DatabaseQueryTransactionError from e
+
+    async def query_rows(self, query_data: QueryTransactionData) -> List[RowMapping]:
+        """
+        Query the EXPORT_COLUMNS of the transaction records that match the given
+        conditions, skipping the ORM identity map and attribute instrumentation.
+
+        Args:
+            query_data (QueryTransactionData) : The data used to filter transaction records.
+
+        Returns:
+            list[RowMapping]: The matching records as read only mappings.
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(
+                    TransactionDatabase._select_rows, query_data
+                )
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while query transaction record: %s", e)
+                raise DatabaseQueryTransactionError from e
+
+    async def update(self, transaction_id: int, update_data: TransactionData):
+        """
+        Update the transaction record in the database that matches the given transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+            update_data (TransactionData): The data used to update transaction record.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(
+                    TransactionDatabase._update, transaction_id, update_data
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while updating transaction record: %s", e)
+                raise DatabaseUpdateTransactionError from e
+
+    async def patch(
+        self, transaction_id: int, user_id: int, patch_data: PatchTransactionData
+    ):
+        """
+        Update only the given columns of the transaction record of user_id that
+        matches transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+            user_id (int) : The owner of the transaction record.
+            patch_data (PatchTransactionData): The columns to update.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(
+                    TransactionDatabase._patch, transaction_id, user_id, patch_data
+                )
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while updating transaction record: %s", e)
+                raise DatabaseUpdateTransactionError from e
+
+    async def delete(self, transaction_id: int):
+        """
+        Delete the transaction record in the database that matches the given transaction_id.
+
+        Args:
+            transaction_id (int) : The ID used to filter transaction records.
+        """
+        async with self.session() as session:
+            try:
+                await session.run_sync(TransactionDatabase._delete, transaction_id)
+                await session.commit()
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error(
+                    "Error occurred while deleting transaction record for transaction_id %d: %s",
+                    transaction_id,
+                    e,
+                )
+                raise DatabaseDeleteTransactionError from e
+
+    async def summarize(self, summary_data: SummaryQueryData) -> list[dict]:
+        """
+        Sum and count the transaction records of a user, grouped in the database.
+
+        Args:
+            summary_data (SummaryQueryData) : The user, grouping and date range to summarize.
+
+        Returns:
+            list[dict]: One dict per group with the group keys, "total_cost" and "count".
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(
+                    TransactionDatabase._summarize, summary_data
+                )
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error(
+                    "Error occurred while summarize transaction record: %s", e
+                )
+                raise DatabaseQueryTransactionError from e
+
+    async def apply_batch(
+        self, user_id: int, operations: list[TransactionOperation]
+    ) -> list[str]:
+        """
+        Apply create, update and delete operations of a user in one database transaction.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            operations (list[TransactionOperation]) : The operations to apply in order.
+
+        Returns:
+            list[str]: The result of every operation, "created", "updated", "deleted"
+            or "not_found".
+        """
+        async with self.session() as session:
+            try:
+                results = await session.run_sync(
+                    TransactionDatabase._apply_batch, user_id, operations
+                )
+                await session.commit()
+                return results
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while applying transaction batch: %s", e)
+                raise DatabaseBatchTransactionError from e
+
+    async def stream(
+        self, user_id: int, batch_size: int = 1000
+    ) -> AsyncIterator[list[Row]]:
+        """
+        Iterate over every transaction record of a user without loading them all.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            batch_size (int) : The number of rows fetched from the cursor at a time.
+
+        Returns:
+            AsyncIterator[list[Row]]: Batches of rows with the EXPORT_COLUMNS, newest first.
+        """
+        async with self.session() as session:
+            try:
+                archived_until = await session.run_sync(
+                    TransactionDatabase._archived_until, user_id
+                )
+                result = await session.stream(
+                    TransactionDatabase._stream_statement(
+                        user_id, batch_size, archived_until is not None
+                    )
+                )
+                async for partition in result.partitions():
+                    yield partition
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error(
+                    "Error occurred while streaming transaction record: %s", e
+                )
+                raise DatabaseQueryTransactionError from e
+
+    async def version(self, user_id: int) -> int:
+        """
+        Return the data version of a user, bumped by every create, update and delete.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+
+        Returns:
+            int: The version, 0 before the first write.
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(TransactionDatabase._version, user_id)
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while query transaction version: %s", e)
+                raise DatabaseQueryTransactionError from e
+
+    async def product_counts(self, user_id: int, limit: int) -> list[tuple[str, int]]:
+        """
+        Return the product names of a user with their number of transactions.
+
+        Args:
+            user_id (int) : The owner of the transactions.
+            limit (int) : The maximum number of names, the most frequent are kept.
+
+        Returns:
+            list[tuple[str, int]]: (product_name, count) pairs, most frequent first.
+        """
+        async with self.session() as session:
+            try:
+                return await session.run_sync(
+                    TransactionDatabase._product_counts, user_id, limit
+                )
+            except SQLAlchemyError as e:
+                await session.rollback()
+                logging.error("Error occurred while query product names: %s", e)
+                raise DatabaseQueryTransactionError from e
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from typing import TypedDict
+
+from core.config.config import Config
+from core.error import DatabaseCreateTransactionError, TransactionWriterOverloadedError
+from model.transaction_database import AsyncTransactionDatabase, TransactionData
+
+
+class WriterStatistics(TypedDict):
+    """
+    A class to represent the usage of a TransactionWriter.
+
+    batches : int
+        The number of commits written by the flusher.
+    writes : int
+        The number of transaction records committed.
+    retries : int
+        The number of batches that failed and were written one record at a time.
+    pending : int
+        The number of creates waiting for the flusher.
+    """
+
+    batches: int
+    writes: int
+    retries: int
+    pending: int
+
+
+class TransactionWriter:
+    """
+    Group commit the transaction creates of concurrent requests.
+
+    create puts the record in a bounded asyncio queue and waits. A single flusher
+    task takes up to max_batch queued records, waiting at most max_delay seconds
+    after the first one for more, and writes them with one INSERT and one commit.
+    Every create returns only once the commit of its batch is done, so an
+    acknowledged record is as durable as with a commit per request.
+
+    Attributes:
+        transaction_database (AsyncTransactionDatabase): The database written to.
+        max_batch (int): The most records written by one commit.
+        max_delay (float): The most seconds a batch waits for more records.
+        queue_depth (int): The number of records allowed to wait for the flusher.
+    """
+
+    def __init__(
+        self,
+        transaction_database: AsyncTransactionDatabase,
+        max_batch: int,
+        max_delay: float,
+        queue_depth: int,
+    ):
+        self.transaction_database = transaction_database
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_depth = queue_depth
+        self.batches = 0
+        self.writes = 0
+        self.retries = 0
+        self._queue: asyncio.Queue | None = None
+        self._flusher: asyncio.Task | None = None
+
+    def _start(self) -> None:
+        """
+        Start the flusher on the running event loop on first use, and again if it
+        died. The queue is kept, so the creates waiting in it are written by the
+        new flusher.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.queue_depth)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+
+    async def create(self, transaction_data: TransactionData) -> None:
+        """
+        Queue a transaction record and wait until its batch is committed.
+
+        Args:
+            transaction_data (TransactionData) : The transaction data to be inserted.
+
+        Raises:
+            TransactionWriterOverloadedError: If the queue is full.
+            DatabaseCreateTransactionError: If the record could not be written.
+        """
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((transaction_data, future))
+        except asyncio.QueueFull:
+            raise TransactionWriterOverloadedError
+        await future
+
+    async def _flush(self) -> None:
+        """
+        Write the queued records batch by batch until cancelled. The creates of
+        a batch being written when the flusher dies fail, as their records may
+        or may not be committed.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            except BaseException:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(DatabaseCreateTransactionError())
+                raise
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list[tuple[TransactionData, asyncio.Future]]):
+        """
+        Commit batch and resolve the futures of its creates. A failed batch is
+        written again one record at a time, so an invalid record only fails
+        its own request.
+        """
+        try:
+            await self.transaction_database.create_many([data for data, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                logging.warning("Retry a failed batch of %d creates alone", len(batch))
+                self.retries += 1
+                for item in batch:
+                    await self._write([item])
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for _, future in batch:
+            # The request may have been cancelled, its record is written anyway.
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """
+        Write every queued record, then stop the flusher.
+        """
+        if self._flusher is None or self._flusher.done():
+            return
+        await self._queue.join()
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+
+    def statistics(self) -> WriterStatistics:
+        """
+        Return the batch, write and retry counters and the queue length.
+        """
+        return WriterStatistics(
+            batches=self.batches,
+            writes=self.writes,
+            retries=self.retries,
+            pending=self._queue.qsize() if self._queue is not None else 0,
+        )
+
+
+_transaction_writer: TransactionWriter | None = None
+
+
+def get_transaction_writer() -> TransactionWriter:
+    """
+    Return the process-wide transaction writer, created from Config on first use.
+
+    Returns:
+        TransactionWriter: The shared transaction writer.
+    """
+    global _transaction_writer
+    if _transaction_writer is None:
+        _transaction_writer = TransactionWriter(
+            AsyncTransactionDatabase(),
+            Config.WRITE_BEHIND_MAX_BATCH,
+            Config.WRITE_BEHIND_MAX_DELAY_MS / 1000,
+            Config.WRITE_BEHIND_QUEUE_DEPTH,
+        )
+    return _transaction_writer
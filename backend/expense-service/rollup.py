@@ -0,0 +1,32 @@
+import argparse
+import logging
+import sys
+
+from model.transaction_database import TransactionDatabase
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(
+        description="Maintain the monthly_spending rollup of the transactions."
+    )
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument(
+        "--user-id", type=int, default=None, help="Only this user, default every user."
+    )
+    args = parser.parse_args()
+    transaction_database = TransactionDatabase()
+
+    if args.command == "rebuild":
+        transaction_database.rebuild_rollup(args.user_id)
+        logging.info("Rebuilt monthly_spending")
+    else:
+        mismatches = transaction_database.check_rollup(args.user_id)
+        for mismatch in mismatches:
+            logging.info(
+                "user %(user_id)s %(month)s %(category)r %(pay_by)s: "
+                "total_cost %(total_cost)s expected %(expected_total_cost)s, "
+                "count %(count)s expected %(expected_count)s",
+                mismatch,
+            )
+        logging.info("%d mismatched rows", len(mismatches))
+        sys.exit(1 if mismatches else 0)
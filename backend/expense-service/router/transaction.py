@@ -1,15 +1,61 @@
-from fastapi import APIRouter, Request, HTTPException, Depends
+import io
+from datetime import datetime
+from typing import Literal
+from fastapi import (
+    APIRouter,
+    Request,
+    HTTPException,
+    Depends,
+    Query,
+    UploadFile,
+    Header,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
-from model.transaction_database import TransactionData
-from controller.transaction import create_transaction
+from model.transaction_database import (
+    TransactionData,
+    TransactionOperation,
+    PatchTransactionData,
+    TransactionFilter,
+)
+from controller.transaction import (
+    create_transaction,
+    apply_transaction_batch,
+    patch_transaction,
+)
 from core.error import (
+    BaseAPIException,
     DatabaseCreateTransactionError,
+    DatabaseBatchTransactionError,
     DatabaseQueryTransactionError,
+    DatabaseUpdateTransactionError,
+    DatabaseUpdateTransactionNotFoundError,
+    InvalidTransactionCursorError,
+    InvalidSummaryGroupError,
+    InvalidTransactionBatchError,
+    InvalidTransactionImportError,
+    InvalidTransactionPatchError,
+    InvalidTransactionFilterError,
+    TransactionWriterOverloadedError,
     make_error_content,
     ErrorResponse,
 )
 from core.token import JWTToken, TokenService
-from controller.transaction import query_user_transactions
+from core.response import FastJSONResponse
+from controller.transaction import (
+    query_user_transactions,
+    summarize_user_transactions,
+    export_user_transactions,
+    import_transactions,
+    get_transactions_version,
+    make_transactions_etag,
+    etag_matches,
+    suggest_product_names,
+    EXPORT_MEDIA_TYPES,
+    MAX_PRODUCT_SUGGESTIONS,
+)
 
 router = APIRouter()
 
@@ -23,9 +69,13 @@ router = APIRouter()
             "model": ErrorResponse,
             "content": make_error_content([DatabaseCreateTransactionError]),
         },
+        503: {
+            "model": ErrorResponse,
+            "content": make_error_content([TransactionWriterOverloadedError]),
+        },
     },
 )
-def create_transaction_record(
+async def create_transaction_record(
     create_transaction_request: TransactionData,
     user: str = Depends(TokenService(JWTToken).get_current_user_from_cookie),
 ) -> dict:
@@ -35,27 +85,322 @@ def create_transaction_record(
     Args:
         create_transaction_request (TransactionData) : The transaction data to be inserted.
     """
-    create_transaction(user, create_transaction_request)
+    try:
+        await create_transaction(user, create_transaction_request)
+    except TransactionWriterOverloadedError as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
     return {"message": "Transaction created successfully"}
 
 
+@router.post(
+    "/transaction/batch",
+    tags=["expense"],
+    response_model=dict,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseBatchTransactionError]),
+        },
+        400: {
+            "model": ErrorResponse,
+            "content": make_error_content([InvalidTransactionBatchError]),
+        },
+    },
+)
+async def apply_transaction_batch_records(
+    operations: list[TransactionOperation],
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> dict:
+    """
+    Create, update and delete transaction records in one database transaction.
+
+    Args:
+        operations (list[TransactionOperation]) : The operations to apply in order.
+
+    Returns: The status of every operation, "created", "updated", "deleted" or "not_found".
+    """
+    try:
+        return await apply_transaction_batch(user_id, operations)
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
+@router.patch(
+    "/transaction/{transaction_id}",
+    tags=["expense"],
+    response_model=dict,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseUpdateTransactionError]),
+        },
+        404: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseUpdateTransactionNotFoundError]),
+        },
+        400: {
+            "model": ErrorResponse,
+            "content": make_error_content([InvalidTransactionPatchError]),
+        },
+    },
+)
+async def patch_transaction_record(
+    transaction_id: int,
+    patch_transaction_request: PatchTransactionData,
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> dict:
+    """
+    Update the given columns of a transaction record, the others keep their value.
+
+    Args:
+        transaction_id (int) : The ID of the transaction record.
+        patch_transaction_request (PatchTransactionData) : The columns to update.
+    """
+    try:
+        await patch_transaction(user_id, transaction_id, patch_transaction_request)
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+    return {"message": "Transaction updated successfully"}
+
+
+@router.post(
+    "/transaction/import",
+    tags=["expense"],
+    response_model=dict,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseBatchTransactionError]),
+        },
+        400: {
+            "model": ErrorResponse,
+            "content": make_error_content([InvalidTransactionImportError]),
+        },
+    },
+)
+async def import_transaction_records(
+    file: UploadFile,
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> dict:
+    """
+    Import transaction records from a CSV statement with the header
+    category,product_name,quantity,total_cost,pay_by,date.
+
+    Args:
+        file (UploadFile) : The CSV file.
+
+    Returns: The number of imported rows and the errors of the rejected rows.
+    """
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await import_transactions(user_id, csv_file)
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
 @router.get(
     "/transaction",
     tags=["expense"],
     response_model=dict,
+    response_class=FastJSONResponse,
     responses={
         500: {
             "model": ErrorResponse,
             "content": make_error_content([DatabaseQueryTransactionError]),
         },
+        400: {
+            "model": ErrorResponse,
+            "content": make_error_content(
+                [InvalidTransactionCursorError, InvalidTransactionFilterError]
+            ),
+        },
+        304: {"description": "The transactions did not change since the ETag"},
     },
 )
-def query_user_transaction_records(
+async def query_user_transaction_records(
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    min_total_cost: float | None = None,
+    max_total_cost: float | None = None,
+    category: list[str] | None = Query(default=None),
+    pay_by: list[str] | None = Query(default=None),
+    product_name_prefix: str | None = Query(default=None, min_length=1),
+    sort: list[str] | None = Query(default=None),
+    if_none_match: str | None = Header(default=None),
     user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
-) -> dict:
+) -> Response:
+    """
+    Query a page of transaction records for a specific user, newest first.
+    The response has an ETag, a request with a matching If-None-Match gets
+    304 Not Modified without running the listing query.
+
+    Args:
+        limit (int) : The page size.
+        cursor (str|None) : The next_cursor returned with the previous page.
+        date_from (datetime|None) : Only records at or after this date.
+        date_to (datetime|None) : Only records before this date.
+        min_total_cost (float|None) : Only records costing at least this amount.
+        max_total_cost (float|None) : Only records costing at most this amount.
+        category (list[str]|None) : Only records in one of these categories, repeatable.
+        pay_by (list[str]|None) : Only records paid by one of these methods, repeatable.
+        product_name_prefix (str|None) : Only records whose product name starts with it.
+        sort (list[str]|None) : Sort keys such as -total_cost, repeatable. The
+            next page of a sort must be requested with the same sort.
+        if_none_match (str|None) : The ETag of a cached response.
+
+    Returns: A dictionary of transaction records and the cursor of the next page.
+    """
+    transaction_filter = TransactionFilter(
+        date_from=date_from,
+        date_to=date_to,
+        min_total_cost=min_total_cost,
+        max_total_cost=max_total_cost,
+        categories=category,
+        pay_bys=pay_by,
+        product_name_prefix=product_name_prefix,
+        sort=sort,
+    )
+    try:
+        # Read the version before the listing, so a concurrent write can only
+        # make the ETag older than the data, never newer.
+        version = await get_transactions_version(user_id)
+        etag = make_transactions_etag(user_id, version)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Cookie"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return FastJSONResponse(
+            await query_user_transactions(
+                user_id, limit, cursor, transaction_filter, version
+            ),
+            headers=headers,
+        )
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
+@router.get(
+    "/transaction/export",
+    tags=["expense"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}
+        },
+    },
+)
+async def export_user_transaction_records(
+    format: Literal["csv", "ndjson"] = "csv",
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> StreamingResponse:
+    """
+    Download every transaction record of a user as CSV or NDJSON, newest first.
+
+    Args:
+        format (str) : csv or ndjson.
+
+    Returns: The export streamed in chunks.
+    """
+    return StreamingResponse(
+        await export_user_transactions(user_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
+
+
+@router.get(
+    "/transaction/products",
+    tags=["expense"],
+    response_model=dict,
+    response_class=FastJSONResponse,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseQueryTransactionError]),
+        },
+    },
+)
+async def suggest_user_product_names(
+    prefix: str = Query(default="", max_length=255),
+    limit: int = Query(default=10, ge=1, le=MAX_PRODUCT_SUGGESTIONS),
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> FastJSONResponse:
+    """
+    Autocomplete product names from the transaction history of a user.
+
+    Args:
+        prefix (str) : The typed text, matched ignoring case.
+        limit (int) : The number of names to return.
+
+    Returns: The matching product names with their number of transactions, most frequent first.
     """
-    Query transaction records for a specific user.
+    try:
+        return FastJSONResponse(await suggest_product_names(user_id, prefix, limit))
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
+
+
+@router.get(
+    "/transaction/summary",
+    tags=["expense"],
+    response_model=dict,
+    response_class=FastJSONResponse,
+    responses={
+        500: {
+            "model": ErrorResponse,
+            "content": make_error_content([DatabaseQueryTransactionError]),
+        },
+        400: {
+            "model": ErrorResponse,
+            "content": make_error_content([InvalidSummaryGroupError]),
+        },
+    },
+)
+async def summarize_user_transaction_records(
+    group_by: list[Literal["category", "pay_by", "day", "week", "month"]] = Query(
+        default=[]
+    ),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    user_id: int = Depends(TokenService(JWTToken).get_current_user_from_cookie),
+) -> FastJSONResponse:
+    """
+    Sum and count the transaction records of a user.
+
+    Args:
+        group_by (list[str]) : Any of category, pay_by and one of day, week, month.
+        start (datetime|None) : Only include transactions on or after start.
+        end (datetime|None) : Only include transactions before end.
 
-    Returns: A dictionary of transaction records.
+    Returns: The overall totals and the totals of every group.
     """
-    return {"transactions": query_user_transactions(user_id)}
+    try:
+        return FastJSONResponse(
+            await summarize_user_transactions(user_id, group_by, start, end)
+        )
+    except BaseAPIException as e:
+        error = e.to_dict()
+        raise HTTPException(
+            status_code=error["status_code"], detail=error["detail"]
+        ) from e
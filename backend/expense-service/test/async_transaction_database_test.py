@@ -0,0 +1,665 @@
+import unittest
+import os
+import tempfile
+import logging
+from datetime import datetime
+from unittest.mock import patch
+from sqlalchemy import event
+
+from model.transaction_database import (
+    TransactionDatabase,
+    AsyncTransactionDatabase,
+    TransactionData,
+    QueryTransactionData,
+)
+from core.error import (
+    DatabaseUpdateTransactionNotFoundError,
+    DatabaseDeleteTransactionNotFoundError,
+)
+
+logging.getLogger().addHandler(logging.NullHandler())
+
+
+class TestAsyncTransactionDatabase(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the asyncio transaction database against a sqlite stand-in.
+    """
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.temp_dir.name, 'test.db')}"
+        with patch("core.database.Config.ASYNC_USER_DATABASE_URL", url):
+            self.transaction_database = AsyncTransactionDatabase()
+        await self.transaction_database.create_tables(
+            self.transaction_database.Transaction.metadata
+        )
+        self.transaction_data: TransactionData = {
+            "user_id": 0,
+            "category": "food",
+            "product_name": "pizza",
+            "quantity": 1,
+            "total_cost": 200,
+            "pay_by": "cash",
+            "date": datetime(year=2025, month=1, day=1),
+        }
+        self.query_data: QueryTransactionData = {
+            "user_id": 0,
+            "category": "food",
+            "product_name": None,
+            "pay_by": "cash",
+            "date": datetime(year=2025, month=1, day=1),
+        }
+
+    async def asyncTearDown(self):
+        await self.transaction_database.engine.dispose()
+        self.temp_dir.cleanup()
+
+    async def test_crud(self):
+        """
+        Test the basic CRUD operations (Create, Read, Update, Delete) on the transaction database.
+        """
+        # create
+        await self.transaction_database.create(self.transaction_data)
+
+        # query
+        retrieved_data = await self.transaction_database.query(self.query_data)
+        self.assertEqual(len(retrieved_data), 1)
+        self.assertEqual(
+            retrieved_data[0].product_name, self.transaction_data["product_name"]
+        )
+        self.assertEqual(retrieved_data[0].date, self.transaction_data["date"])
+
+        # update
+        update_data = dict(self.transaction_data, product_name="hamburger")
+        await self.transaction_database.update(
+            retrieved_data[0].transaction_id, update_data
+        )
+        retrieved_data = await self.transaction_database.query(self.query_data)
+        self.assertEqual(retrieved_data[0].product_name, "hamburger")
+        with self.assertRaises(DatabaseUpdateTransactionNotFoundError):
+            await self.transaction_database.update(999, update_data)
+
+        # delete
+        await self.transaction_database.delete(retrieved_data[0].transaction_id)
+        self.assertEqual(await self.transaction_database.query(self.query_data), [])
+        with self.assertRaises(DatabaseDeleteTransactionNotFoundError):
+            await self.transaction_database.delete(retrieved_data[0].transaction_id)
+
+    async def test_query_rows(self):
+        """
+        Test that query_rows returns the exported columns of the same records as query.
+        """
+        await self.transaction_database.create(self.transaction_data)
+        await self.transaction_database.create(dict(self.transaction_data, user_id=1))
+
+        records = await self.transaction_database.query({"user_id": 0, "limit": 5})
+        rows = await self.transaction_database.query_rows({"user_id": 0, "limit": 5})
+
+        self.assertEqual(len(rows), 1)
+        expected = records[0].to_dict()
+        del expected["user_id"]
+        self.assertEqual(dict(rows[0]), expected)
+
+    async def test_version(self):
+        """
+        Test that every write bumps the data version of its user only.
+        """
+        self.assertEqual(await self.transaction_database.version(0), 0)
+        await self.transaction_database.create(self.transaction_data)
+        self.assertEqual(await self.transaction_database.version(0), 1)
+
+        record = (await self.transaction_database.query({"user_id": 0}))[0]
+        await self.transaction_database.update(
+            record.transaction_id, dict(self.transaction_data, quantity=2)
+        )
+        self.assertEqual(await self.transaction_database.version(0), 2)
+        with self.assertRaises(DatabaseUpdateTransactionNotFoundError):
+            await self.transaction_database.update(
+                record.transaction_id, dict(self.transaction_data, user_id=1)
+            )
+        self.assertEqual(await self.transaction_database.version(1), 0)
+
+        await self.transaction_database.delete(record.transaction_id)
+        self.assertEqual(await self.transaction_database.version(0), 3)
+
+        await self.transaction_database.apply_batch(
+            0, [{"action": "delete", "transaction_id": record.transaction_id}]
+        )
+        self.assertEqual(await self.transaction_database.version(0), 3)
+        await self.transaction_database.apply_batch(
+            0, [{"action": "create", "data": self.transaction_data}] * 2
+        )
+        self.assertEqual(await self.transaction_database.version(0), 4)
+
+    async def test_patch(self):
+        """
+        Test that patch only changes the given columns of the records of the user,
+        in single statements without reading the record first.
+        """
+        await self.transaction_database.create(self.transaction_data)
+        record = (await self.transaction_database.query({"user_id": 0}))[0]
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement.split()[0].upper())
+
+        sync_engine = self.transaction_database.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record_statement)
+        try:
+            await self.transaction_database.patch(
+                record.transaction_id, 0, {"quantity": 2}
+            )
+            self.assertEqual(statements, ["UPDATE", "INSERT"])
+
+            statements.clear()
+            await self.transaction_database.patch(
+                record.transaction_id, 0, {"total_cost": 50, "pay_by": "card"}
+            )
+            self.assertEqual(statements, ["INSERT", "UPDATE", "INSERT", "INSERT"])
+
+            # A new product name is interned, then served from the item cache
+            # once it is committed.
+            for expected in (
+                ["SELECT", "INSERT", "SELECT", "UPDATE", "INSERT"],
+                ["SELECT", "UPDATE", "INSERT"],
+                ["UPDATE", "INSERT"],
+            ):
+                statements.clear()
+                await self.transaction_database.patch(
+                    record.transaction_id, 0, {"product_name": "hamburger"}
+                )
+                self.assertEqual(statements, expected)
+
+            statements.clear()
+            await self.transaction_database.delete(record.transaction_id)
+            self.assertEqual(statements, ["INSERT", "INSERT", "DELETE"])
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record_statement)
+
+        await self.transaction_database.create(self.transaction_data)
+        record = (await self.transaction_database.query({"user_id": 0}))[0]
+        await self.transaction_database.patch(
+            record.transaction_id, 0, {"total_cost": 50, "pay_by": "card"}
+        )
+        with self.assertRaises(DatabaseUpdateTransactionNotFoundError):
+            await self.transaction_database.patch(
+                record.transaction_id, 1, {"product_name": "hamburger"}
+            )
+        record = (await self.transaction_database.query({"user_id": 0}))[0]
+        self.assertEqual(
+            (record.product_name, record.total_cost, record.pay_by),
+            ("pizza", 50, "card"),
+        )
+        await self.transaction_database.patch(
+            record.transaction_id, 0, {"product_name": "Pizza"}
+        )
+        record = (await self.transaction_database.query({"user_id": 0}))[0]
+        self.assertEqual(record.product_name, "Pizza")
+        async with self.transaction_database.session() as session:
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+            summary = await session.run_sync(
+                TransactionDatabase._summarize_rollup,
+                {"user_id": 0, "group_by": ["pay_by"], "start": None, "end": None},
+            )
+        self.assertEqual(summary, [{"pay_by": "card", "total_cost": 50, "count": 1}])
+
+    async def test_filter(self):
+        """
+        Test the range, list, prefix and sort conditions of a query.
+        """
+        for product_name, category, pay_by, total_cost, day in (
+            ("pizza", "food", "cash", 200, 1),
+            ("pizza_xl", "food", "card", 350, 5),
+            ("pizzeria", "food", "cash", 120, 9),
+            ("game", "entertainment", "card", 600, 12),
+            ("bus", "traffic", "cash", 30, 20),
+        ):
+            await self.transaction_database.create(
+                dict(
+                    self.transaction_data,
+                    product_name=product_name,
+                    category=category,
+                    pay_by=pay_by,
+                    total_cost=total_cost,
+                    date=datetime(2025, 1, day),
+                )
+            )
+
+        async def names(**conditions):
+            rows = await self.transaction_database.query_rows(
+                dict(conditions, user_id=0)
+            )
+            return [row["product_name"] for row in rows]
+
+        self.assertEqual(
+            await names(
+                date_from=datetime(2025, 1, 5), date_to=datetime(2025, 1, 12), limit=10
+            ),
+            ["pizzeria", "pizza_xl"],
+        )
+        self.assertEqual(
+            await names(min_total_cost=120, max_total_cost=350, limit=10),
+            ["pizzeria", "pizza_xl", "pizza"],
+        )
+        self.assertEqual(
+            await names(categories=["traffic", "entertainment"], limit=10),
+            ["bus", "game"],
+        )
+        self.assertEqual(await names(pay_bys=["card"], limit=10), ["game", "pizza_xl"])
+        # "_" must match itself, not any character
+        self.assertEqual(
+            await names(product_name_prefix="pizza_", limit=10), ["pizza_xl"]
+        )
+        self.assertEqual(
+            await names(product_name_prefix="pizz", sort=["-total_cost"]),
+            ["pizza_xl", "pizza", "pizzeria"],
+        )
+        self.assertEqual(
+            await names(sort=["pay_by", "total_cost"], limit=3),
+            ["pizza_xl", "game", "bus"],
+        )
+        # product names are compared ignoring case, sorting by them joins items
+        self.assertEqual(await names(product_name="Pizza_XL"), ["pizza_xl"])
+        self.assertEqual(
+            await names(product_name_prefix="PIZZ", sort=["product_name"]),
+            ["pizza", "pizza_xl", "pizzeria"],
+        )
+        self.assertEqual(
+            await names(sort=["-product_name"], seek_after=("pizza_xl", 0), limit=10),
+            ["pizza", "game", "bus"],
+        )
+
+    async def test_product_counts(self):
+        """
+        Test that product names are counted per user, most frequent first.
+        """
+        for product_name in ("pizza", "bus", "pizza", "cola", "bus", "pizza"):
+            await self.transaction_database.create(
+                dict(self.transaction_data, product_name=product_name)
+            )
+        await self.transaction_database.create(dict(self.transaction_data, user_id=1))
+
+        self.assertEqual(
+            await self.transaction_database.product_counts(0, 2),
+            [("pizza", 3), ("bus", 2)],
+        )
+        self.assertEqual(
+            await self.transaction_database.product_counts(1, 10), [("pizza", 1)]
+        )
+
+    async def test_keyset_pagination(self):
+        """
+        Test that seeking after the last (date, transaction_id) walks every record once,
+        newest first, including records that share a date.
+        """
+        dates = [datetime(2025, 1, day) for day in (1, 2, 2, 2, 3)]
+        for date in dates:
+            await self.transaction_database.create(
+                dict(self.transaction_data, date=date)
+            )
+
+        pages = []
+        seek_after = None
+        while True:
+            page = await self.transaction_database.query(
+                {"user_id": 0, "seek_after": seek_after, "limit": 2}
+            )
+            if not page:
+                break
+            pages.append(page)
+            seek_after = (page[-1].date, page[-1].transaction_id)
+
+        records = [record for page in pages for record in page]
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(len({record.transaction_id for record in records}), 5)
+        self.assertEqual(
+            [(record.date, record.transaction_id) for record in records],
+            sorted(
+                [(record.date, record.transaction_id) for record in records],
+                reverse=True,
+            ),
+        )
+
+    async def test_keyset_pagination_custom_sort(self):
+        """
+        Test that seeking after the sort key of the last record walks every record
+        once in a custom sort, including cost ties and a NULL category.
+        """
+        for total_cost, category in (
+            (30, "food"),
+            (10, None),
+            (30, None),
+            (20, "game"),
+            (10, "food"),
+        ):
+            await self.transaction_database.create(
+                dict(self.transaction_data, total_cost=total_cost, category=category)
+            )
+        sort = ["category", "-total_cost"]
+
+        pages = []
+        seek_after = None
+        while True:
+            page = await self.transaction_database.query_rows(
+                {"user_id": 0, "sort": sort, "seek_after": seek_after, "limit": 2}
+            )
+            if not page:
+                break
+            pages.append(page)
+            seek_after = TransactionDatabase.sort_key(sort, page[-1])
+
+        records = [record for page in pages for record in page]
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(
+            [record["transaction_id"] for record in records],
+            [
+                record["transaction_id"]
+                for record in sorted(
+                    records,
+                    key=lambda record: (
+                        record["category"] or "",
+                        -record["total_cost"],
+                        -record["transaction_id"],
+                    ),
+                )
+            ],
+        )
+        self.assertEqual(len({record["transaction_id"] for record in records}), 5)
+
+    async def test_summarize(self):
+        """
+        Test that summarize groups by category and period inside the date range.
+        """
+        records = [
+            ("food", datetime(2025, 1, 6), 100),  # Monday
+            ("food", datetime(2025, 1, 12), 50),  # Sunday of the same week
+            ("game", datetime(2025, 1, 13), 300),
+            ("food", datetime(2025, 2, 1), 20),
+            ("food", datetime(2024, 12, 31), 999),  # before start
+        ]
+        for category, date, total_cost in records:
+            await self.transaction_database.create(
+                dict(
+                    self.transaction_data,
+                    category=category,
+                    date=date,
+                    total_cost=total_cost,
+                )
+            )
+        date_range = {"start": datetime(2025, 1, 1), "end": datetime(2025, 3, 1)}
+
+        by_category = await self.transaction_database.summarize(
+            {"user_id": 0, "group_by": ["category"], **date_range}
+        )
+        self.assertEqual(
+            by_category,
+            [
+                {"category": "food", "total_cost": 170, "count": 3},
+                {"category": "game", "total_cost": 300, "count": 1},
+            ],
+        )
+
+        by_week = await self.transaction_database.summarize(
+            {"user_id": 0, "group_by": ["week"], **date_range}
+        )
+        self.assertEqual(
+            [(group["week"], group["total_cost"]) for group in by_week],
+            [("2025-01-06", 150), ("2025-01-13", 300), ("2025-01-27", 20)],
+        )
+
+        by_month = await self.transaction_database.summarize(
+            {"user_id": 0, "group_by": ["month", "category"], **date_range}
+        )
+        self.assertEqual(
+            [(group["month"], group["category"], group["count"]) for group in by_month],
+            [("2025-01", "food", 2), ("2025-01", "game", 1), ("2025-02", "food", 1)],
+        )
+
+        self.assertEqual(
+            await self.transaction_database.summarize(
+                {"user_id": 1, "group_by": [], "start": None, "end": None}
+            ),
+            [{"total_cost": 0, "count": 0}],
+        )
+
+    async def test_monthly_rollup(self):
+        """
+        Test that create, update and delete keep monthly_spending consistent and
+        that month aligned summaries read the same totals from it.
+        """
+        for date in (datetime(2025, 1, 5), datetime(2025, 1, 20), datetime(2025, 2, 3)):
+            await self.transaction_database.create(
+                dict(self.transaction_data, date=date)
+            )
+        records = await self.transaction_database.query({"user_id": 0})
+        moved = next(record for record in records if record.date.month == 2)
+        await self.transaction_database.update(
+            moved.transaction_id,
+            dict(self.transaction_data, category=None, date=datetime(2025, 1, 9)),
+        )
+        await self.transaction_database.delete(records[0].transaction_id)
+
+        summary_data = {
+            "user_id": 0,
+            "group_by": ["month", "category"],
+            "start": datetime(2025, 1, 1),
+            "end": datetime(2025, 3, 1),
+        }
+        async with self.transaction_database.session() as session:
+            rollup = await session.run_sync(
+                TransactionDatabase._summarize_rollup, summary_data
+            )
+            scanned = await session.run_sync(
+                TransactionDatabase._summarize,
+                dict(summary_data, start=datetime(2024, 12, 31)),
+            )
+            mismatches = await session.run_sync(TransactionDatabase._check_rollup)
+        self.assertEqual(mismatches, [])
+        self.assertEqual(rollup, scanned)
+        self.assertEqual(
+            rollup,
+            [
+                {"month": "2025-01", "category": None, "total_cost": 200, "count": 1},
+                {"month": "2025-01", "category": "food", "total_cost": 200, "count": 1},
+            ],
+        )
+
+    async def test_rebuild_rollup(self):
+        """
+        Test that check_rollup reports drift and rebuild_rollup repairs it.
+        """
+        await self.transaction_database.create(self.transaction_data)
+        async with self.transaction_database.session() as session:
+            await session.execute(
+                self.transaction_database.MonthlySpending.__table__.update().values(
+                    total_cost=1
+                )
+            )
+            await session.commit()
+            mismatches = await session.run_sync(TransactionDatabase._check_rollup)
+            self.assertEqual(len(mismatches), 1)
+            self.assertEqual(mismatches[0]["expected_total_cost"], 200)
+
+            await session.run_sync(TransactionDatabase._rebuild_rollup, 0)
+            await session.commit()
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+
+    async def test_apply_batch(self):
+        """
+        Test that a mixed batch is applied in order, only touches the records
+        of its user and keeps monthly_spending consistent.
+        """
+        await self.transaction_database.create(self.transaction_data)
+        await self.transaction_database.create(dict(self.transaction_data, user_id=1))
+        own, other = sorted(
+            await self.transaction_database.query({}),
+            key=lambda record: record.user_id,
+        )
+
+        results = await self.transaction_database.apply_batch(
+            0,
+            [
+                {"action": "create", "data": dict(self.transaction_data, user_id=1)},
+                {"action": "create", "data": self.transaction_data},
+                {
+                    "action": "update",
+                    "transaction_id": own.transaction_id,
+                    "data": dict(self.transaction_data, total_cost=50),
+                },
+                {"action": "delete", "transaction_id": own.transaction_id},
+                {"action": "delete", "transaction_id": own.transaction_id},
+                {"action": "delete", "transaction_id": other.transaction_id},
+            ],
+        )
+
+        self.assertEqual(
+            results,
+            ["created", "created", "updated", "deleted", "not_found", "not_found"],
+        )
+        records = await self.transaction_database.query({"user_id": 0})
+        self.assertEqual(len(records), 2)
+        self.assertTrue(all(record.total_cost == 200 for record in records))
+        self.assertEqual(len(await self.transaction_database.query({"user_id": 1})), 1)
+        async with self.transaction_database.session() as session:
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+
+    async def test_archive(self):
+        """
+        Test that archived records are still listed, summarized, exported and
+        written, and that queries after the archived dates skip the archive table.
+        """
+        for year, product_name in ((2020, "tea"), (2021, "cola"), (2025, "pizza")):
+            for month in (1, 2):
+                await self.transaction_database.create(
+                    dict(
+                        self.transaction_data,
+                        product_name=product_name,
+                        date=datetime(year, month, 1),
+                    )
+                )
+        async with self.transaction_database.session() as session:
+            moved = []
+            for _ in range(4):
+                moved.append(
+                    await session.run_sync(
+                        TransactionDatabase._archive_batch, datetime(2030, 1, 1), 3
+                    )
+                )
+                await session.commit()
+        # The newest record stays in the hot table to keep its transaction_id.
+        self.assertEqual(moved, [3, 2, 0, 0])
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        async def dates(**query_data):
+            statements.clear()
+            rows = await self.transaction_database.query_rows(
+                dict(query_data, user_id=0)
+            )
+            return [(row["date"].year, row["date"].month) for row in rows]
+
+        sync_engine = self.transaction_database.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record_statement)
+        try:
+            self.assertEqual(
+                await dates(limit=10),
+                [(2025, 2), (2025, 1), (2021, 2), (2021, 1), (2020, 2), (2020, 1)],
+            )
+            self.assertIn("UNION ALL", statements[-1])
+            self.assertEqual(await dates(date_from=datetime(2025, 1, 15)), [(2025, 2)])
+            self.assertNotIn("UNION ALL", statements[-1])
+            self.assertEqual(await dates(limit=1), [(2025, 2)])
+            self.assertNotIn("UNION ALL", statements[-1])
+            self.assertEqual(
+                await dates(date_to=datetime(2021, 1, 2), limit=10, sort=["date"]),
+                [(2020, 1), (2020, 2), (2021, 1)],
+            )
+            rows = await self.transaction_database.query_rows(
+                {"user_id": 0, "limit": 3, "sort": ["product_name", "-date"]}
+            )
+            self.assertIn("UNION ALL", statements[-1])
+            self.assertEqual(
+                [(row["product_name"], row["date"].year) for row in rows],
+                [("cola", 2021), ("cola", 2021), ("pizza", 2025)],
+            )
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record_statement)
+
+        records = await self.transaction_database.query({"user_id": 0})
+        self.assertEqual(len(records), 6)
+        self.assertEqual(
+            await self.transaction_database.product_counts(0, 10),
+            [("cola", 2), ("pizza", 2), ("tea", 2)],
+        )
+        summary = await self.transaction_database.summarize(
+            {
+                "user_id": 0,
+                "group_by": ["day"],
+                "start": datetime(2021, 1, 1),
+                "end": None,
+            }
+        )
+        self.assertEqual(
+            [(group["day"], group["count"]) for group in summary],
+            [
+                ("2021-01-01", 1),
+                ("2021-02-01", 1),
+                ("2025-01-01", 1),
+                ("2025-02-01", 1),
+            ],
+        )
+        exported = [
+            row.product_name
+            async for rows in self.transaction_database.stream(0)
+            for row in rows
+        ]
+        self.assertEqual(exported, ["pizza", "pizza", "cola", "cola", "tea", "tea"])
+
+        tea = [record for record in records if record.product_name == "tea"]
+        await self.transaction_database.patch(
+            tea[0].transaction_id, 0, {"total_cost": 50}
+        )
+        await self.transaction_database.delete(tea[1].transaction_id)
+        results = await self.transaction_database.apply_batch(
+            0,
+            [
+                {
+                    "action": "update",
+                    "transaction_id": record.transaction_id,
+                    "data": dict(self.transaction_data, product_name="water"),
+                }
+                for record in records
+                if record.product_name == "cola"
+            ],
+        )
+        self.assertEqual(results, ["updated", "updated"])
+        with self.assertRaises(DatabaseUpdateTransactionNotFoundError):
+            await self.transaction_database.patch(
+                tea[0].transaction_id, 1, {"total_cost": 1}
+            )
+        self.assertEqual(
+            await self.transaction_database.product_counts(0, 10),
+            [("pizza", 2), ("water", 2), ("tea", 1)],
+        )
+        async with self.transaction_database.session() as session:
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+            await session.run_sync(TransactionDatabase._rebuild_rollup, 0)
+            await session.commit()
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import patch
+
+from core.cache import LRUCacheBackend, UserCache
+
+
+class TestLRUCacheBackend(unittest.TestCase):
+    """
+    Test case for the in process LRU/TTL cache backend.
+    """
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted first."""
+        backend = LRUCacheBackend(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        self.assertEqual(backend.get("a"), 1)
+        backend.set("c", 3)
+
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), 1)
+        self.assertEqual(backend.get("c"), 3)
+        self.assertEqual(
+            backend.statistics(),
+            {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "max_entries": 2},
+        )
+
+    @patch("core.cache.time.monotonic")
+    def test_expires_after_ttl(self, mock_monotonic):
+        """Test that an entry is a miss once its ttl has passed."""
+        mock_monotonic.return_value = 100.0
+        backend = LRUCacheBackend(max_entries=2, ttl=10)
+        backend.set("a", 1)
+        backend.set("b", 2, ttl=30)
+
+        mock_monotonic.return_value = 115.0
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(backend.get("b"), 2)
+        self.assertEqual(backend.statistics()["size"], 1)
+
+    def test_disabled(self):
+        """Test that max_entries 0 caches nothing."""
+        backend = LRUCacheBackend(max_entries=0, ttl=10)
+        backend.set("a", 1)
+        self.assertIsNone(backend.get("a"))
+
+
+class TestUserCache(unittest.TestCase):
+    """
+    Test case for the per user cache keyed by the data version.
+    """
+
+    def setUp(self):
+        self.cache = UserCache(LRUCacheBackend(max_entries=10, ttl=60), "test")
+
+    def test_version_only_affects_user(self):
+        """Test that a new version of a user hides its entries but not other users'."""
+        for user_id in (1, 2):
+            self.cache.set(self.cache.key(user_id, 1, "shape"), user_id)
+
+        self.assertIsNone(self.cache.get(self.cache.key(1, 2, "shape")))
+        self.assertEqual(self.cache.get(self.cache.key(1, 1, "shape")), 1)
+        self.assertEqual(self.cache.get(self.cache.key(2, 1, "shape")), 2)
+        self.assertEqual(self.cache.statistics()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import os
+import json
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, insert
+
+from model.transaction_database import AsyncTransactionDatabase, EXPORT_COLUMNS
+from controller.transaction import export_user_transactions, format_csv
+from core.error import DatabaseQueryTransactionError
+
+# Enough rows for several export chunks, set EXPORT_TEST_ROWS=2000000 to check
+# that memory stays flat on a large export.
+EXPORT_TEST_ROWS = int(os.environ.get("EXPORT_TEST_ROWS", 20_000))
+# Upper bound for the memory allocated while streaming the whole export.
+EXPORT_PEAK_MEMORY = 32 * 1024 * 1024
+
+
+class TestExport(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the streaming transaction export against a sqlite stand-in.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.temp_dir.name, "export.db")
+        engine = create_engine(f"sqlite:///{path}")
+        table = AsyncTransactionDatabase.Transaction.__table__
+        item_table = AsyncTransactionDatabase.Item.__table__
+        table.metadata.create_all(engine)
+        start = datetime(2020, 1, 1)
+        with engine.begin() as connection:
+            items, batch = [], []
+            for i in range(EXPORT_TEST_ROWS):
+                items.append({"item_id": i + 1, "product_name": f"product_{i}"})
+                batch.append(
+                    {
+                        "user_id": 0,
+                        "category": "food",
+                        "item_id": i + 1,
+                        "quantity": 1,
+                        "total_cost": 100,
+                        "pay_by": "cash",
+                        "date": start + timedelta(minutes=i),
+                    }
+                )
+                if len(batch) == 10000:
+                    connection.execute(insert(item_table), items)
+                    connection.execute(insert(table), batch)
+                    items, batch = [], []
+            if batch:
+                connection.execute(insert(item_table), items)
+                connection.execute(insert(table), batch)
+        engine.dispose()
+        cls.url = f"sqlite+aiosqlite:///{path}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    async def asyncSetUp(self):
+        self.patcher = patch("core.database.Config.ASYNC_USER_DATABASE_URL", self.url)
+        self.patcher.start()
+
+    async def asyncTearDown(self):
+        await AsyncTransactionDatabase().engine.dispose()
+        self.patcher.stop()
+
+    @staticmethod
+    def expected_csv_size() -> int:
+        """Return the length of the CSV lines of the rows inserted in setUpClass."""
+        start = datetime(2020, 1, 1)
+        return sum(
+            len(
+                f"{i + 1},food,product_{i},1,100.0,cash,"
+                f"{(start + timedelta(minutes=i)).isoformat()}\r\n"
+            )
+            for i in range(EXPORT_TEST_ROWS)
+        )
+
+    async def test_export_csv_memory_is_flat(self):
+        """
+        Test that streaming every row as CSV keeps the peak allocation bounded.
+        """
+        lines = 0
+        size = 0
+        first_chunk = None
+        tracemalloc.start()
+        try:
+            async for chunk in await export_user_transactions(0, "csv"):
+                first_chunk = first_chunk or chunk
+                lines += chunk.count("\n")
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(first_chunk, ",".join(EXPORT_COLUMNS) + "\r\n")
+        self.assertEqual(lines, EXPORT_TEST_ROWS + 1)
+        self.assertLess(peak, EXPORT_PEAK_MEMORY)
+        self.assertEqual(size, len(first_chunk) + self.expected_csv_size())
+
+    async def test_export_ndjson(self):
+        """
+        Test that the NDJSON export starts with the newest transaction.
+        """
+        chunks = await export_user_transactions(0, "ndjson")
+        first_line = (await anext(chunks)).split("\n")[0]
+        await chunks.aclose()
+
+        record = json.loads(first_line)
+        self.assertEqual(list(record), list(EXPORT_COLUMNS))
+        self.assertEqual(record["product_name"], f"product_{EXPORT_TEST_ROWS - 1}")
+        self.assertEqual(
+            record["date"],
+            (
+                datetime(2020, 1, 1) + timedelta(minutes=EXPORT_TEST_ROWS - 1)
+            ).isoformat(),
+        )
+
+    async def test_export_other_user(self):
+        """
+        Test that a user without transactions gets only the CSV header.
+        """
+        chunks = [chunk async for chunk in await export_user_transactions(1, "csv")]
+        self.assertEqual(chunks, [",".join(EXPORT_COLUMNS) + "\r\n"])
+
+    async def test_export_database_error(self):
+        """
+        Test that a failing query raises before the export is returned.
+        """
+
+        async def failing_stream(self, user_id):
+            raise DatabaseQueryTransactionError
+            yield
+
+        with patch.object(AsyncTransactionDatabase, "stream", failing_stream):
+            with self.assertRaises(DatabaseQueryTransactionError):
+                await export_user_transactions(0, "csv")
+
+    def test_format_csv_formula(self):
+        """
+        Test that text a spreadsheet would evaluate as a formula is quoted.
+        """
+        row = (1, "=SUM(A1)", "+cola", 1, 100.0, "-cash", datetime(2020, 1, 1))
+        self.assertEqual(
+            format_csv([row, (2, "@tea", "tea", 1, 1.5, "cash", datetime(2020, 1, 1))]),
+            "1,'=SUM(A1),'+cola,1,100.0,'-cash,2020-01-01T00:00:00\r\n"
+            "2,'@tea,tea,1,1.5,cash,2020-01-01T00:00:00\r\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.response import FastJSONResponse
+
+
+class TestFastJSONResponse(unittest.TestCase):
+    """
+    Test case for the fast JSON response used by the transaction endpoints.
+    """
+
+    def setUp(self):
+        self.content = {
+            "transactions": [
+                {
+                    "transaction_id": transaction_id,
+                    "category": category,
+                    "product_name": "蘋果 pie",
+                    "quantity": 1,
+                    "total_cost": total_cost,
+                    "pay_by": "cash",
+                    "date": datetime(2025, 1, 2, 3, 4, 5, microsecond),
+                }
+                for transaction_id, category, total_cost, microsecond in [
+                    (1, "food", 10.0, 0),
+                    (2, None, 0.1, 123456),
+                    (3, "game", 199.99, 500),
+                ]
+            ],
+            "next_cursor": None,
+        }
+
+    def test_same_bytes_as_json_response(self):
+        """Test that the output is byte for byte the default FastAPI encoding."""
+        expected = JSONResponse(jsonable_encoder(self.content)).body
+        self.assertEqual(FastJSONResponse(self.content).body, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
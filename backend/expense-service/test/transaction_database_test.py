@@ -1,6 +1,7 @@
 import unittest
 from datetime import datetime
 from unittest.mock import patch, MagicMock
+from sqlalchemy import Delete, Update
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 from unittest.mock import call
@@ -54,6 +55,8 @@ class TestTransactionDatabase(unittest.TestCase):
         with patch(
             "model.transaction_database.TransactionDatabase.Transaction",
             return_value=mock_transaction,
+        ), patch.object(
+            TransactionDatabase, "_item_ids", return_value={"pizza": 7}
         ), patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
@@ -61,7 +64,7 @@ class TestTransactionDatabase(unittest.TestCase):
             self.transaction_database.Transaction.assert_called_once_with(
                 user_id=self.transaction_data["user_id"],
                 category=self.transaction_data["category"],
-                product_name=self.transaction_data["product_name"],
+                item_id=7,
                 quantity=self.transaction_data["quantity"],
                 total_cost=self.transaction_data["total_cost"],
                 pay_by=self.transaction_data["pay_by"],
@@ -79,6 +82,8 @@ class TestTransactionDatabase(unittest.TestCase):
         with patch(
             "model.transaction_database.TransactionDatabase.Transaction",
             return_value=mock_transaction,
+        ), patch.object(
+            TransactionDatabase, "_item_ids", return_value={"pizza": 7}
         ), patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
@@ -97,6 +102,8 @@ class TestTransactionDatabase(unittest.TestCase):
         mock_transaction_2 = MagicMock()
         mock_transactions = [mock_transaction_1, mock_transaction_2]
 
+        # The user has no archived records.
+        mock_session.scalar.return_value = None
         mock_query = mock_session.query.return_value
         mock_query.filter.side_effect = lambda *args, **kwargs: mock_query
         mock_query.all.return_value = mock_transactions
@@ -116,6 +123,7 @@ class TestTransactionDatabase(unittest.TestCase):
     def test_query_transaction_fail(self):
         """Test query a transaction fail."""
         mock_session = MagicMock()
+        mock_session.scalar.return_value = None
 
         mock_query = mock_session.query.return_value
         mock_query.filter.return_value = mock_query
@@ -130,44 +138,41 @@ class TestTransactionDatabase(unittest.TestCase):
             mock_session.rollback.assert_called_once()
             mock_session.close.assert_called_once()
 
+    def executed(self, mock_session, statement_type):
+        """Return the statements of statement_type passed to mock_session.execute."""
+        return [
+            args.args[0]
+            for args in mock_session.execute.call_args_list
+            if isinstance(args.args[0], statement_type)
+        ]
+
     def test_update_transaction_success(self):
-        """Test update a transaction successfully."""
+        """Test update a transaction successfully with a single UPDATE."""
         mock_session = MagicMock()
-        mock_transaction = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_transaction
+        mock_session.execute.return_value.rowcount = 1
 
-        with patch(
-            "model.transaction_database.TransactionDatabase.Transaction",
-            return_value=mock_transaction,
+        with patch.object(
+            TransactionDatabase, "_item_ids", return_value={"pizza": 7}
         ), patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
             self.transaction_database.update(1, self.transaction_data)
 
-            mock_session.query.assert_called_once_with(
-                self.transaction_database.Transaction
-            )
-            mock_query.filter.assert_called_once()
-            mock_filter.first.assert_called_once()
-
-            self.assertEqual(mock_transaction.user_id, self.transaction_data["user_id"])
-            self.assertEqual(
-                mock_transaction.category, self.transaction_data["category"]
-            )
-            self.assertEqual(
-                mock_transaction.product_name, self.transaction_data["product_name"]
-            )
-            self.assertEqual(
-                mock_transaction.quantity, self.transaction_data["quantity"]
-            )
-            self.assertEqual(
-                mock_transaction.total_cost, self.transaction_data["total_cost"]
-            )
-            self.assertEqual(mock_transaction.pay_by, self.transaction_data["pay_by"])
-            self.assertEqual(mock_transaction.date, self.transaction_data["date"])
+            mock_session.query.assert_not_called()
+            updates = self.executed(mock_session, Update)
+            self.assertEqual(len(updates), 1)
+            params = updates[0].compile().params
+            self.assertEqual(params["item_id"], 7)
+            for name in (
+                "category",
+                "quantity",
+                "total_cost",
+                "pay_by",
+                "date",
+            ):
+                self.assertEqual(params[name], self.transaction_data[name])
+            self.assertEqual(params["transaction_id_1"], 1)
+            self.assertEqual(params["user_id_1"], self.transaction_data["user_id"])
 
             mock_session.commit.assert_called_once()
             mock_session.close.assert_called_once()
@@ -175,31 +180,29 @@ class TestTransactionDatabase(unittest.TestCase):
     def test_update_transaction_not_found(self):
         """Test update when no transaction record is found."""
         mock_session = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = None
+        mock_session.execute.return_value.rowcount = 0
 
         with patch.object(
+            TransactionDatabase, "_item_ids", return_value={"pizza": 7}
+        ), patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
             with self.assertRaises(DatabaseUpdateTransactionNotFoundError):
                 self.transaction_database.update(1, self.transaction_data)
 
+            mock_session.commit.assert_not_called()
             mock_session.close.assert_called_once()
 
     def test_update_transaction_db_error(self):
         """Test update raises SQLAlchemyError and rolls back."""
         mock_session = MagicMock()
-        mock_transaction = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_transaction
+        mock_session.execute.return_value.rowcount = 1
 
         mock_session.commit.side_effect = SQLAlchemyError("DB Error")
 
         with patch.object(
+            TransactionDatabase, "_item_ids", return_value={"pizza": 7}
+        ), patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
             with self.assertRaises(DatabaseUpdateTransactionError):
@@ -209,35 +212,26 @@ class TestTransactionDatabase(unittest.TestCase):
             mock_session.close.assert_called_once()
 
     def test_delete_transaction_success(self):
-        """Test deleting a transaction successfully."""
+        """Test deleting a transaction successfully with a single DELETE."""
         mock_session = MagicMock()
-        mock_transaction = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_transaction
+        mock_session.execute.return_value.rowcount = 1
 
         with patch.object(
             self.transaction_database, "session", return_value=mock_session
         ):
             self.transaction_database.delete(1)
 
-            mock_session.query.assert_called_once_with(
-                self.transaction_database.Transaction
-            )
-            mock_query.filter.assert_called_once()
-            mock_filter.first.assert_called_once()
-            mock_session.delete.assert_called_once_with(mock_transaction)
+            mock_session.query.assert_not_called()
+            deletes = self.executed(mock_session, Delete)
+            self.assertEqual(len(deletes), 1)
+            self.assertEqual(deletes[0].compile().params, {"transaction_id_1": 1})
             mock_session.commit.assert_called_once()
             mock_session.close.assert_called_once()
 
     def test_delete_transaction_not_found(self):
         """Test deleting a transaction that does not exist."""
         mock_session = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = None
+        mock_session.execute.return_value.rowcount = 0
 
         with patch.object(
             self.transaction_database, "session", return_value=mock_session
@@ -245,7 +239,6 @@ class TestTransactionDatabase(unittest.TestCase):
             with self.assertRaises(DatabaseDeleteTransactionNotFoundError):
                 self.transaction_database.delete(1)
 
-            mock_session.delete.assert_not_called()
             mock_session.commit.assert_not_called()
             mock_session.rollback.assert_not_called()
             mock_session.close.assert_called_once()
@@ -253,11 +246,7 @@ class TestTransactionDatabase(unittest.TestCase):
     def test_delete_transaction_db_error(self):
         """Test deleting a transaction when a SQLAlchemyError occurs."""
         mock_session = MagicMock()
-        mock_transaction = MagicMock()
-
-        mock_query = mock_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.first.return_value = mock_transaction
+        mock_session.execute.return_value.rowcount = 1
 
         mock_session.commit.side_effect = SQLAlchemyError("DB Error")
 
@@ -267,7 +256,7 @@ class TestTransactionDatabase(unittest.TestCase):
             with self.assertRaises(DatabaseDeleteTransactionError):
                 self.transaction_database.delete(1)
 
-            mock_session.delete.assert_called_once_with(mock_transaction)
+            self.assertEqual(len(self.executed(mock_session, Delete)), 1)
             mock_session.rollback.assert_called_once()
             mock_session.close.assert_called_once()
 
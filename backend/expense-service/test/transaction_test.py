@@ -1,21 +1,55 @@
 import unittest
+import io
 from datetime import datetime
-from unittest.mock import patch, Mock, MagicMock
+from unittest.mock import patch, Mock, MagicMock, AsyncMock
 
 from model.transaction_database import (
     TransactionData,
     QueryTransactionData,
     TransactionDatabase,
 )
-from controller.transaction import create_transaction, query_user_transactions
+from controller.transaction import (
+    create_transaction,
+    query_user_transactions,
+    encode_cursor,
+    decode_cursor,
+    summarize_user_transactions,
+    apply_transaction_batch,
+    import_transactions,
+    get_transactions_version,
+    make_transactions_etag,
+    etag_matches,
+    suggest_product_names,
+    MAX_BATCH_OPERATIONS,
+)
+from core.cache import LRUCacheBackend, UserCache
+from core.error import (
+    InvalidTransactionCursorError,
+    InvalidSummaryGroupError,
+    InvalidTransactionBatchError,
+    InvalidTransactionImportError,
+    InvalidTransactionFilterError,
+)
 
 
-class TestTransaction(unittest.TestCase):
+class TestTransaction(unittest.IsolatedAsyncioTestCase):
     """
     Test case for transaction-related function.
     """
 
     def setUp(self):
+        cache_patcher = patch(
+            "controller.transaction._transaction_cache",
+            UserCache(LRUCacheBackend(max_entries=100, ttl=60), "test"),
+        )
+        self.cache = cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        product_cache_patcher = patch(
+            "controller.transaction._product_index_cache",
+            UserCache(LRUCacheBackend(max_entries=2, ttl=60), "test_products"),
+        )
+        self.product_cache = product_cache_patcher.start()
+        self.addCleanup(product_cache_patcher.stop)
         self.transaction_data: TransactionData = {
             "user_id": 0,
             "category": "food",
@@ -33,11 +67,11 @@ class TestTransaction(unittest.TestCase):
             "date": datetime(year=2025, month=1, day=1),
         }
 
-    def test_create_transaction(self):
+    async def test_create_transaction(self):
         """
         Test the creation of a new transaction.
         """
-        create_transaction(0, self.transaction_data)
+        await create_transaction(0, self.transaction_data)
         transction_database = TransactionDatabase()
         retrieved_data = transction_database.query(self.query_data)
         self.assertIsNotNone(retrieved_data, "retrieved data should not be None")
@@ -54,38 +88,31 @@ class TestTransaction(unittest.TestCase):
         self.assertEqual(retrieved_data[0].date, self.transaction_data["date"])
         transction_database.delete(retrieved_data[0].transaction_id)
 
-        # TODO: update item db relate function
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    @patch("controller.transaction.get_transaction_writer")
+    @patch("controller.transaction.Config.WRITE_BEHIND_ENABLED", True)
+    async def test_create_transaction_write_behind(
+        self, mock_get_writer, mock_database_class
+    ):
+        """
+        Test that creates go through the group commit writer when write-behind is on.
+        """
+        mock_writer = mock_get_writer.return_value
+        mock_writer.create = AsyncMock()
+
+        await create_transaction(7, dict(self.transaction_data))
+
+        mock_writer.create.assert_awaited_once_with(
+            dict(self.transaction_data, user_id=7)
+        )
+        mock_database_class.assert_not_called()
 
-    @patch("controller.transaction.TransactionDatabase")
-    def test_get_user_transactions(self, mock_database_class):
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_get_user_transactions(self, mock_database_class):
         """
         Test retrieving transactions for a specific user
         """
-        mock_instance = MagicMock()
-        mock_transaction1 = MagicMock()
-        mock_transaction1.to_dict.return_value = {
-            "transaction_id": 0,
-            "user_id": 0,
-            "category": "food",
-            "product_name": "apple",
-            "quantity": 1,
-            "total_cost": 10,
-            "pay_by": "cash",
-            "date": datetime(2025, 1, 1),
-        }
-        mock_transaction2 = MagicMock()
-        mock_transaction2.to_dict.return_value = {
-            "transaction_id": 1,
-            "user_id": 0,
-            "category": "food",
-            "product_name": "banana",
-            "quantity": 1,
-            "total_cost": 20,
-            "pay_by": "cash",
-            "date": datetime(2025, 1, 1),
-        }
-        mock_instance.query.return_value = [mock_transaction1, mock_transaction2]
-        mock_database_class.return_value = mock_instance
+        mock_instance = AsyncMock()
         excepted_data = [
             {
                 "transaction_id": 0,
@@ -106,9 +133,354 @@ class TestTransaction(unittest.TestCase):
                 "date": datetime(2025, 1, 1),
             },
         ]
+        mock_instance.query_rows.return_value = excepted_data
+        mock_database_class.return_value = mock_instance
+
+        data = await query_user_transactions(0)
+        self.assertEqual(data, {"transactions": excepted_data, "next_cursor": None})
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_get_user_transactions_page(self, mock_database_class):
+        """
+        Test that a full page returns the cursor of its last record.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.query_rows.return_value = [
+            {
+                "transaction_id": transaction_id,
+                "date": datetime(2025, 1, transaction_id),
+            }
+            for transaction_id in (3, 2, 1)
+        ]
+        mock_database_class.return_value = mock_instance
+
+        cursor = encode_cursor(
+            ["-date"], {"date": datetime(2025, 1, 4), "transaction_id": 4}
+        )
+        data = await query_user_transactions(0, limit=2, cursor=cursor)
+
+        mock_instance.query_rows.assert_called_once_with(
+            {"user_id": 0, "seek_after": (datetime(2025, 1, 4), 4), "limit": 3}
+        )
+        self.assertEqual(
+            [row["transaction_id"] for row in data["transactions"]], [3, 2]
+        )
+        self.assertEqual(
+            decode_cursor(data["next_cursor"], ["-date"]), (datetime(2025, 1, 2), 2)
+        )
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_get_user_transactions_custom_sort_page(self, mock_database_class):
+        """
+        Test that a full page of a custom sort returns a cursor over its sort keys,
+        which the next page of the same sort seeks after.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.query_rows.return_value = [
+            {"transaction_id": transaction_id, "total_cost": 10, "category": None}
+            for transaction_id in (1, 2, 3)
+        ]
+        mock_database_class.return_value = mock_instance
+        transaction_filter = {"sort": ["category", "-total_cost"]}
+
+        data = await query_user_transactions(
+            0, limit=2, transaction_filter=transaction_filter
+        )
+        self.assertEqual(len(data["transactions"]), 2)
+        self.assertIsNotNone(data["next_cursor"])
+
+        await query_user_transactions(
+            0,
+            limit=2,
+            cursor=data["next_cursor"],
+            transaction_filter=transaction_filter,
+        )
+        self.assertEqual(
+            mock_instance.query_rows.call_args.args[0]["seek_after"], ("", 10, 2)
+        )
+
+    async def test_invalid_cursor(self):
+        """
+        Test that a malformed cursor or one of another sort raises
+        InvalidTransactionCursorError.
+        """
+        cursor = encode_cursor(
+            ["-date"], {"date": datetime(2025, 1, 4), "transaction_id": 4}
+        )
+        wrong_type = encode_cursor(
+            ["total_cost"], {"total_cost": "10", "transaction_id": 4}
+        )
+        for page_cursor, transaction_filter in (
+            ("not-a-cursor", None),
+            (cursor, {"sort": ["total_cost"]}),
+            (wrong_type, {"sort": ["total_cost"]}),
+        ):
+            with self.assertRaises(InvalidTransactionCursorError):
+                await query_user_transactions(
+                    0,
+                    limit=2,
+                    cursor=page_cursor,
+                    transaction_filter=transaction_filter,
+                )
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_get_user_transactions_filtered(self, mock_database_class):
+        """
+        Test that the filter reaches the database.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.query_rows.return_value = [
+            {"transaction_id": transaction_id, "total_cost": 10}
+            for transaction_id in (1, 2, 3)
+        ]
+        mock_database_class.return_value = mock_instance
+        transaction_filter = {
+            "date_from": datetime(2025, 1, 1),
+            "categories": ["food", "game"],
+            "sort": ["-total_cost"],
+            "pay_bys": None,
+        }
+
+        data = await query_user_transactions(
+            0, limit=2, transaction_filter=transaction_filter
+        )
+
+        mock_instance.query_rows.assert_called_once_with(
+            dict(transaction_filter, user_id=0, limit=3)
+        )
+        self.assertEqual(len(data["transactions"]), 2)
+
+        await query_user_transactions(
+            0, limit=2, transaction_filter=dict(transaction_filter, categories=["food"])
+        )
+        self.assertEqual(mock_instance.query_rows.call_count, 2)
+
+    async def test_invalid_transaction_filter(self):
+        """
+        Test that unknown sort keys and empty ranges raise
+        InvalidTransactionFilterError.
+        """
+        for transaction_filter in (
+            {"sort": ["-user_id"]},
+            {"date_from": datetime(2025, 2, 1), "date_to": datetime(2025, 1, 1)},
+            {"min_total_cost": 10, "max_total_cost": 5},
+        ):
+            with self.assertRaises(InvalidTransactionFilterError):
+                await query_user_transactions(
+                    0, limit=2, transaction_filter=transaction_filter
+                )
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_summarize_user_transactions(self, mock_database_class):
+        """
+        Test that the overall totals are added up from the groups.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.summarize.return_value = [
+            {"category": "food", "total_cost": 170, "count": 3},
+            {"category": "game", "total_cost": 300, "count": 1},
+        ]
+        mock_database_class.return_value = mock_instance
+
+        data = await summarize_user_transactions(0, ["category"])
+
+        mock_instance.summarize.assert_called_once_with(
+            {"user_id": 0, "group_by": ["category"], "start": None, "end": None}
+        )
+        self.assertEqual(data["total_cost"], 470)
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(data["groups"], mock_instance.summarize.return_value)
+
+    async def test_summarize_with_two_periods(self):
+        """
+        Test that grouping by more than one period raises InvalidSummaryGroupError.
+        """
+        with self.assertRaises(InvalidSummaryGroupError):
+            await summarize_user_transactions(0, ["day", "month"])
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_apply_transaction_batch(self, mock_database_class):
+        """
+        Test that the batch results are returned in request order.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.apply_batch.return_value = ["created", "not_found"]
+        mock_database_class.return_value = mock_instance
+        operations = [
+            {"action": "create", "data": self.transaction_data},
+            {"action": "delete", "transaction_id": 5},
+        ]
+
+        data = await apply_transaction_batch(0, operations)
+
+        mock_instance.apply_batch.assert_called_once_with(0, operations)
+        self.assertEqual(
+            data,
+            {
+                "results": [
+                    {"index": 0, "status": "created"},
+                    {"index": 1, "status": "not_found"},
+                ]
+            },
+        )
+
+    async def test_invalid_transaction_batch(self):
+        """
+        Test that empty, oversized and incomplete batches raise InvalidTransactionBatchError.
+        """
+        create = {"action": "create", "data": self.transaction_data}
+        for operations in (
+            [],
+            [create] * (MAX_BATCH_OPERATIONS + 1),
+            [{"action": "create"}],
+            [{"action": "update", "data": self.transaction_data}],
+            [{"action": "delete"}],
+        ):
+            with self.assertRaises(InvalidTransactionBatchError):
+                await apply_transaction_batch(0, operations)
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_import_transactions(self, mock_database_class):
+        """
+        Test that valid rows are inserted in chunks and invalid rows are reported.
+        """
+        mock_instance = AsyncMock()
+        mock_database_class.return_value = mock_instance
+        csv_file = io.StringIO(
+            "category,product_name,quantity,total_cost,pay_by,date\n"
+            "food,apple,2,10,card,2025-01-01T10:00:00\n"
+            "food,banana,,20,,2025-01-02\n"
+            "food,,1,abc,cash,2025-01-03\n"
+            "game,card,1,30,cash,2025-01-04\n"
+        )
+
+        data = await import_transactions(0, csv_file, chunk_size=2)
+
+        self.assertEqual(data["imported"], 3)
+        self.assertEqual(data["error_count"], 1)
+        self.assertEqual(data["errors"][0]["line"], 4)
+        self.assertEqual(len(data["errors"][0]["errors"]), 2)
+        chunks = [call.args[1] for call in mock_instance.apply_batch.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(
+            chunks[0][1]["data"],
+            {
+                "user_id": 0,
+                "category": "food",
+                "product_name": "banana",
+                "quantity": 1,
+                "total_cost": 20,
+                "pay_by": "cash",
+                "date": datetime(2025, 1, 2),
+            },
+        )
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_import_invalid_file(self, mock_database_class):
+        """
+        Test that a file which is not UTF-8 raises InvalidTransactionImportError
+        before any row is imported, even when the error is past the first chunk.
+        """
+        mock_instance = AsyncMock()
+        mock_database_class.return_value = mock_instance
+        csv_file = io.TextIOWrapper(
+            io.BytesIO(
+                b"category,product_name,quantity,total_cost,pay_by,date\n"
+                + b"food,apple,1,10,cash,2025-01-01\n" * 3
+                + b"food,\xff\xfe,1,10,cash,2025-01-01\n"
+            ),
+            encoding="utf-8",
+        )
+        with self.assertRaises(InvalidTransactionImportError):
+            await import_transactions(0, csv_file, chunk_size=2)
+        mock_instance.apply_batch.assert_not_called()
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_get_transactions_etag(self, mock_database_class):
+        """
+        Test that the ETag changes with the user and the data version.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.version.return_value = 3
+        mock_database_class.return_value = mock_instance
+
+        version = await get_transactions_version(7)
+        etag = make_transactions_etag(7, version)
+
+        self.assertEqual(etag, '"7-3"')
+        self.assertNotEqual(make_transactions_etag(7, 4), etag)
+        self.assertNotEqual(make_transactions_etag(8, version), etag)
+
+    def test_etag_matches(self):
+        """
+        Test If-None-Match with single, listed, weak and wildcard tags.
+        """
+        self.assertTrue(etag_matches('"7-3"', '"7-3"'))
+        self.assertTrue(etag_matches('"1-1", W/"7-3"', '"7-3"'))
+        self.assertTrue(etag_matches("*", '"7-3"'))
+        self.assertFalse(etag_matches('"7-2"', '"7-3"'))
+        self.assertFalse(etag_matches(None, '"7-3"'))
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_query_cache(self, mock_database_class):
+        """
+        Test that repeated listings hit the cache until the data version of the
+        user changes, whichever process wrote.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.query_rows.return_value = [
+            {"transaction_id": 1, "date": datetime(2025, 1, 1)}
+        ]
+        mock_instance.version.return_value = 1
+        mock_database_class.return_value = mock_instance
+
+        first = await query_user_transactions(0, limit=10)
+        second = await query_user_transactions(0, limit=10)
+        await query_user_transactions(0, limit=20)
+        await query_user_transactions(1, limit=10)
+        self.assertIs(first, second)
+        self.assertEqual(mock_instance.query_rows.call_count, 3)
+        self.assertEqual(self.cache.statistics()["hits"], 1)
+
+        mock_instance.version.return_value = 2
+        await query_user_transactions(0, limit=10)
+        self.assertEqual(mock_instance.query_rows.call_count, 4)
+        await query_user_transactions(0, limit=10, version=2)
+        self.assertEqual(mock_instance.query_rows.call_count, 4)
+
+    @patch("controller.transaction.AsyncTransactionDatabase")
+    async def test_suggest_product_names(self, mock_database_class):
+        """
+        Test that suggestions come from one cached index until the data version
+        of the user changes.
+        """
+        mock_instance = AsyncMock()
+        mock_instance.product_counts.return_value = [
+            ("pizza", 4),
+            ("Pineapple", 6),
+            ("bus", 9),
+        ]
+        mock_instance.version.return_value = 1
+        mock_database_class.return_value = mock_instance
+
+        data = await suggest_product_names(0, "pi")
+        self.assertEqual(
+            data,
+            {
+                "products": [
+                    {"product_name": "Pineapple", "count": 6},
+                    {"product_name": "pizza", "count": 4},
+                ]
+            },
+        )
+        await suggest_product_names(0, "b", limit=1)
+        self.assertEqual(mock_instance.product_counts.call_count, 1)
+        self.assertEqual(self.product_cache.statistics()["size"], 1)
+        self.assertEqual(self.cache.statistics()["size"], 0)
 
-        data = query_user_transactions({"user_id": 0})
-        self.assertEqual(data, excepted_data)
+        mock_instance.version.return_value = 2
+        await suggest_product_names(0, "pi")
+        self.assertEqual(mock_instance.product_counts.call_count, 2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import logging
+from datetime import datetime
+from unittest.mock import patch
+
+from model.transaction_database import (
+    TransactionDatabase,
+    AsyncTransactionDatabase,
+    TransactionData,
+)
+from model.transaction_writer import TransactionWriter
+from core.error import DatabaseCreateTransactionError, TransactionWriterOverloadedError
+
+logging.getLogger().addHandler(logging.NullHandler())
+
+
+class TestTransactionWriter(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for group committing transaction creates against a sqlite stand-in.
+    """
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.temp_dir.name, 'test.db')}"
+        with patch("core.database.Config.ASYNC_USER_DATABASE_URL", url):
+            self.transaction_database = AsyncTransactionDatabase()
+        await self.transaction_database.create_tables(
+            self.transaction_database.Transaction.metadata
+        )
+        self.transaction_data: TransactionData = {
+            "user_id": 0,
+            "category": "food",
+            "product_name": "pizza",
+            "quantity": 1,
+            "total_cost": 200,
+            "pay_by": "cash",
+            "date": datetime(year=2025, month=1, day=1),
+        }
+
+    async def asyncTearDown(self):
+        await self.transaction_database.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def writer(self, max_batch=8, max_delay=0.05, queue_depth=100):
+        return TransactionWriter(
+            self.transaction_database, max_batch, max_delay, queue_depth
+        )
+
+    async def test_group_commit(self):
+        """
+        Test that concurrent creates are committed in batches of at most max_batch
+        and that every create returns after its record is written.
+        """
+        writer = self.writer()
+        await asyncio.gather(
+            *[
+                writer.create(dict(self.transaction_data, user_id=i % 2, total_cost=i))
+                for i in range(20)
+            ]
+        )
+
+        self.assertEqual(
+            writer.statistics(),
+            {"batches": 3, "writes": 20, "retries": 0, "pending": 0},
+        )
+        records = await self.transaction_database.query({})
+        self.assertEqual(
+            sorted(record.total_cost for record in records), list(range(20))
+        )
+        self.assertEqual(await self.transaction_database.version(0), 3)
+        self.assertEqual(await self.transaction_database.version(1), 3)
+        async with self.transaction_database.session() as session:
+            self.assertEqual(
+                await session.run_sync(TransactionDatabase._check_rollup), []
+            )
+        await writer.close()
+
+    async def test_invalid_record_fails_alone(self):
+        """
+        Test that a record the database rejects only fails its own create.
+        """
+        written = []
+
+        async def create_many(transactions):
+            if any(data["product_name"] == "broken" for data in transactions):
+                raise DatabaseCreateTransactionError
+            written.extend(transactions)
+
+        writer = self.writer()
+        with patch.object(self.transaction_database, "create_many", create_many):
+            results = await asyncio.gather(
+                writer.create(self.transaction_data),
+                writer.create(dict(self.transaction_data, product_name="broken")),
+                writer.create(self.transaction_data),
+                return_exceptions=True,
+            )
+
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], DatabaseCreateTransactionError)
+        self.assertIsNone(results[2])
+        self.assertEqual(len(written), 2)
+        self.assertEqual(
+            writer.statistics(), {"batches": 2, "writes": 2, "retries": 1, "pending": 0}
+        )
+        await writer.close()
+
+    async def test_queue_full(self):
+        """
+        Test that creates beyond the queue depth are rejected.
+        """
+        writer = self.writer(queue_depth=2)
+        results = await asyncio.gather(
+            *[writer.create(self.transaction_data) for _ in range(4)],
+            return_exceptions=True,
+        )
+
+        self.assertEqual(results[:2], [None, None])
+        self.assertIsInstance(results[2], TransactionWriterOverloadedError)
+        self.assertIsInstance(results[3], TransactionWriterOverloadedError)
+        await writer.close()
+
+    async def test_flusher_restart(self):
+        """
+        Test that the creates queued when the flusher dies are written by the
+        next flusher, and that the create it was writing fails.
+        """
+        writer = self.writer(max_batch=1)
+        writing = asyncio.Event()
+
+        async def create_many(transactions):
+            writing.set()
+            await asyncio.Event().wait()
+
+        with patch.object(self.transaction_database, "create_many", create_many):
+            tasks = [
+                asyncio.create_task(writer.create(self.transaction_data))
+                for _ in range(3)
+            ]
+            await writing.wait()
+            writer._flusher.cancel()
+            with self.assertRaises(DatabaseCreateTransactionError):
+                await tasks[0]
+
+        self.assertEqual(writer.statistics()["pending"], 2)
+        await writer.create(self.transaction_data)
+        await asyncio.gather(*tasks[1:])
+
+        self.assertEqual(
+            writer.statistics(), {"batches": 3, "writes": 3, "retries": 0, "pending": 0}
+        )
+        self.assertEqual(len(await self.transaction_database.query({})), 3)
+        await writer.close()
+
+    async def test_close(self):
+        """
+        Test that close writes the queued records before it returns.
+        """
+        writer = self.writer(max_delay=0.01)
+        tasks = [
+            asyncio.create_task(writer.create(self.transaction_data)) for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        await writer.close()
+
+        self.assertTrue(all(task.done() for task in tasks))
+        self.assertEqual(len(await self.transaction_database.query({})), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from core.trie import PrefixIndex
+
+
+class TestPrefixIndex(unittest.TestCase):
+    """
+    Test case for the autocomplete prefix index.
+    """
+
+    def setUp(self):
+        self.index = PrefixIndex(
+            [("Pizza", 5), ("pizza_xl", 2), ("Pineapple", 9), ("bus", 7), ("pie", 2)],
+            top=3,
+        )
+
+    def test_search_by_weight(self):
+        """Test that matches are returned heaviest first, ties by name."""
+        self.assertEqual(
+            self.index.search("pi", 10), [("Pineapple", 9), ("Pizza", 5), ("pie", 2)]
+        )
+        self.assertEqual(self.index.search("piz", 10), [("Pizza", 5), ("pizza_xl", 2)])
+        self.assertEqual(self.index.search("pi", 1), [("Pineapple", 9)])
+
+    def test_search_ignores_case(self):
+        """Test that the prefix is matched ignoring case."""
+        self.assertEqual(self.index.search("PIZZA_", 10), [("pizza_xl", 2)])
+
+    def test_search_without_match(self):
+        """Test that an unknown prefix and an empty prefix behave."""
+        self.assertEqual(self.index.search("car", 10), [])
+        self.assertEqual(
+            self.index.search("", 10), [("Pineapple", 9), ("bus", 7), ("Pizza", 5)]
+        )
+        self.assertEqual(self.index.size, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
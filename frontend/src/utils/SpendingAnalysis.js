@@ -1,7 +1,25 @@
+import {refresh} from '@/utils/userProfile.js';
+
 const BASE_URL = '/expense';
 
+// A refresh token is accepted once, so concurrent requests share one refresh.
+let pending_refresh = null;
+
+// Access tokens are short lived, refresh the token pair once and retry on 401.
+async function fetch_with_refresh(url, options){
+    let response = await fetch(url, options);
+    if (response.status === 401) {
+        if (!pending_refresh) {
+            pending_refresh = refresh().finally(() => { pending_refresh = null; });
+        }
+        await pending_refresh;
+        response = await fetch(url, options);
+    }
+    return response;
+}
+
 export function create_transaction_record(userData){
-    return fetch(`${BASE_URL}/transaction`,{
+    return fetch_with_refresh(`${BASE_URL}/transaction`,{
         method:'POST',
         headers:{
             'Content-Type':'application/json',
@@ -15,8 +33,27 @@ export function create_transaction_record(userData){
     })
 }
 
-export function get_transaction_record(){
-    return fetch(`${BASE_URL}/transaction`,{
+export function get_transaction_record(cursor = null){
+    let url = `${BASE_URL}/transaction`;
+    if (cursor) {
+        url += `?cursor=${encodeURIComponent(cursor)}`;
+    }
+    return fetch_with_refresh(url,{
+        method:'GET',
+        headers:{
+            'Content-Type':'application/json',
+        },
+    }).then(response =>{
+        if (!response.ok) {
+            throw new Error('error：' + response.status);
+        }
+        return response.json();
+    })
+}
+
+export function get_product_suggestions(prefix = '', limit = 10){
+    let params = new URLSearchParams({prefix: prefix, limit: limit});
+    return fetch_with_refresh(`${BASE_URL}/transaction/products?${params.toString()}`,{
         method:'GET',
         headers:{
             'Content-Type':'application/json',
@@ -27,4 +64,4 @@ export function get_transaction_record(){
         }
         return response.json();
     })
-}
\ No newline at end of file
+}
@@ -28,4 +28,26 @@ export function register(userData){
         }
         return response.json();
     })
-}
\ No newline at end of file
+}
+
+export function refresh(){
+    return fetch(`${BASE_URL}/refresh`,{
+        method:'POST',
+    }).then(response =>{
+        if (!response.ok) {
+            throw new Error('error：' + response.status);
+        }
+        return response.json();
+    })
+}
+
+export function logout(){
+    return fetch(`${BASE_URL}/logout`,{
+        method:'POST',
+    }).then(response =>{
+        if (!response.ok) {
+            throw new Error('error：' + response.status);
+        }
+        return response.json();
+    })
+}
@@ -7,13 +7,56 @@ CREATE TABLE users(
     mail VARCHAR(255) UNIQUE NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+CREATE TABLE items (
+    item_id INT AUTO_INCREMENT PRIMARY KEY,
+    product_name VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE
+);
 CREATE TABLE transactions (
     transaction_id INT  AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
     category VARCHAR(100),
-    product_name VARCHAR(255) NOT NULL,
+    item_id INT NOT NULL,
+    quantity INT NOT NULL DEFAULT 1,
+    total_cost FLOAT NOT NULL,
+    pay_by VARCHAR(255) NOT NULL DEFAULT 'cash',
+    date DATETIME NOT NULL,
+    INDEX ix_transactions_user_date (user_id, date),
+    INDEX ix_transactions_user_category_date (user_id, category, date),
+    INDEX ix_transactions_user_pay_by_date (user_id, pay_by, date),
+    INDEX ix_transactions_user_item (user_id, item_id)
+);
+CREATE TABLE transactions_archive (
+    transaction_id INT PRIMARY KEY,
+    user_id INT NOT NULL,
+    category VARCHAR(100),
+    item_id INT NOT NULL,
     quantity INT NOT NULL DEFAULT 1,
     total_cost FLOAT NOT NULL,
     pay_by VARCHAR(255) NOT NULL DEFAULT 'cash',
-    date DATETIME NOT NULL
-);
\ No newline at end of file
+    date DATETIME NOT NULL,
+    INDEX ix_transactions_archive_user_date (user_id, date),
+    INDEX ix_transactions_archive_user_item (user_id, item_id)
+);
+CREATE TABLE monthly_spending (
+    user_id INT NOT NULL,
+    month CHAR(7) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    pay_by VARCHAR(255) NOT NULL,
+    total_cost DOUBLE NOT NULL DEFAULT 0,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, category, pay_by)
+);
+
+CREATE TABLE transaction_versions (
+    user_id INT NOT NULL PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE revoked_tokens (
+    token_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    kind VARCHAR(16) NOT NULL DEFAULT 'revoked',
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_revoked_tokens_expires_at (expires_at),
+    INDEX ix_revoked_tokens_revoked_at (revoked_at)
+);